@@ -0,0 +1,297 @@
+import io
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from openai.types import CompletionUsage
+from pydantic import BaseModel
+
+from app.ai.TweetGeneratorOpenAI import GENERATION_PARAMS, TweetGeneratorOpenAI
+from app.ai.completions import record_usage
+from app.ai.models import (
+    TweetModel,
+    TweetThreadModel,
+    CryptoAnalysisThreadModel
+)
+from app.core.exceptions import BatchGenerationError
+from app.db.models.GeneratedContent_model import GeneratedContent
+from app.twitter.TweetRecord import TweetRecord
+from config.prompts import TWITTER_PROMPT_SINGLE_TWEET, TWITTER_PROMPT_THREAD
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+
+# The kind is encoded in every custom_id so results can be parsed by a
+# different process than the one that submitted the batch
+RESPONSE_FORMATS = {
+    "tweet": TweetModel,
+    "thread": TweetThreadModel,
+    "crypto_analysis": CryptoAnalysisThreadModel,
+}
+
+FINISHED_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _strict_schema(schema):
+    """Close every object of a JSON schema and require all its properties, as strict mode needs"""
+    if isinstance(schema, dict):
+        if schema.get("type") == "object" and "properties" in schema:
+            schema["additionalProperties"] = False
+            schema["required"] = list(schema["properties"])
+        for value in schema.values():
+            _strict_schema(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            _strict_schema(value)
+    return schema
+
+
+def response_format(model: type[BaseModel]) -> dict:
+    """The strict json_schema response_format of a model, the one `parse` sends for it"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "schema": _strict_schema(model.model_json_schema()),
+            "name": model.__name__,
+            "strict": True,
+        },
+    }
+
+
+class TweetBatchGenerator:
+    """
+    Generate tweets and threads through the OpenAI Batch API.
+
+    Requests are built exactly like the synchronous calls of
+    `TweetGeneratorOpenAI` (same messages, sampling parameters and structured
+    `response_format`), serialized as JSONL and submitted as a single batch.
+    """
+
+    def __init__(self, generator: TweetGeneratorOpenAI, poll_interval: float = 30):
+        """
+        Initialize the batch generator
+
+        Args:
+            generator (TweetGeneratorOpenAI): Generator used to build the requests
+            poll_interval (float): Seconds between batch status checks
+        """
+        self.generator = generator
+        self.client = generator.client
+        self.poll_interval = poll_interval
+        self.requests = []
+
+    def add_request(self, kind: str, name: str, messages: list[dict]) -> str:
+        """
+        Queue a chat completion request
+
+        Args:
+            kind (str): One of RESPONSE_FORMATS
+            name (str): Name unique within the batch
+            messages (list[dict]): Chat messages for the request
+
+        Returns:
+            str: The custom_id of the request
+        """
+        if kind not in RESPONSE_FORMATS:
+            raise ValueError(f"Unknown batch request kind: {kind}")
+
+        custom_id = f"{kind}:{name}"
+        self.requests.append(
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    **GENERATION_PARAMS,
+                    "messages": messages,
+                    "response_format": response_format(RESPONSE_FORMATS[kind]),
+                },
+            }
+        )
+        return custom_id
+
+    def add_tweet(self, name: str, timeline: list[TweetRecord]) -> str:
+        """Queue a single tweet about the timeline"""
+        messages = self.generator._build_tweet_messages(timeline, TWITTER_PROMPT_SINGLE_TWEET)
+        return self.add_request("tweet", name, messages)
+
+    def add_thread(self, name: str, timeline: list[TweetRecord]) -> str:
+        """Queue a thread about the timeline"""
+        messages = self.generator._build_tweet_messages(timeline, TWITTER_PROMPT_THREAD)
+        return self.add_request("thread", name, messages)
+
+    def add_crypto_analysis(
+        self,
+        name: str,
+        market_data: dict,
+        category: str = 'latest',
+        analysis_type: str = 'market_overview',
+    ) -> str:
+        """Queue a cryptocurrency market analysis thread"""
+        messages = self.generator._build_crypto_messages(market_data, category, analysis_type)
+        return self.add_request("crypto_analysis", name, messages)
+
+    def to_jsonl(self) -> str:
+        """Serialize the queued requests as JSONL"""
+        return "".join(json.dumps(request) + "\n" for request in self.requests)
+
+    def submit(self) -> str:
+        """
+        Upload the queued requests and create the batch
+
+        Returns:
+            str: The batch ID
+        """
+        if not self.requests:
+            raise BatchGenerationError("No requests to submit")
+
+        input_file = self.client.files.create(
+            file=("batch.jsonl", io.BytesIO(self.to_jsonl().encode("utf-8"))),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(self.requests)} requests")
+        self.requests = []
+        return batch.id
+
+    def wait(self, batch_id: str, timeout: float = None):
+        """
+        Poll the batch until it finishes
+
+        Args:
+            batch_id (str): The batch ID
+            timeout (float, optional): Maximum number of seconds to wait
+
+        Returns:
+            Batch: The completed batch
+
+        Raises:
+            BatchGenerationError: If the batch fails, expires, is cancelled or times out
+        """
+        started = time.monotonic()
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in FINISHED_STATUSES:
+                break
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise BatchGenerationError(f"Timed out waiting for batch {batch_id} ({batch.status})")
+            time.sleep(self.poll_interval)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise BatchGenerationError(f"Batch {batch_id} finished with status {batch.status}")
+        return batch
+
+    def fetch_results(self, batch) -> dict:
+        """
+        Download and parse the output of a completed batch
+
+        Args:
+            batch (Batch): The completed batch
+
+        Returns:
+            dict: Parsed models keyed by custom_id. Failed requests are logged and skipped.
+        """
+        output = self.client.files.content(batch.output_file_id).text
+        results = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            custom_id = result["custom_id"]
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                logger.error(f"Batch request {custom_id} failed: {result.get('error') or response}")
+                continue
+
+            body = response["body"]
+            kind = custom_id.split(":", 1)[0]
+            try:
+                results[custom_id] = RESPONSE_FORMATS[kind].model_validate_json(
+                    body["choices"][0]["message"]["content"]
+                )
+            except (KeyError, ValueError) as e:
+                logger.error(f"Batch request {custom_id} returned invalid content: {e}")
+                continue
+            if body.get("usage"):
+                record_usage("batch", CompletionUsage.model_validate(body["usage"]))
+
+        for custom_id, content in results.items():
+            if isinstance(content, TweetThreadModel):
+                results[custom_id] = self.generator._deduplicate_mentions(content)
+        return results
+
+    def store_results(self, results: dict, Session, batch_id: str = None) -> int:
+        """
+        Store parsed results for later posting
+
+        Args:
+            results (dict): Parsed models keyed by custom_id
+            Session (sessionmaker): Session factory of the tweets database
+            batch_id (str, optional): The batch the results came from
+
+        Returns:
+            int: Number of newly stored items
+        """
+        session = Session()
+        stored = 0
+        try:
+            for custom_id, content in results.items():
+                if session.query(GeneratedContent).filter_by(custom_id=custom_id).first():
+                    continue
+                session.add(
+                    GeneratedContent(
+                        batch_id=batch_id,
+                        custom_id=custom_id,
+                        kind=custom_id.split(":", 1)[0],
+                        content=content.model_dump_json(),
+                        created_at=datetime.now(timezone.utc),
+                    )
+                )
+                stored += 1
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return stored
+
+    def collect(self, batch_id: str, Session, timeout: float = None) -> int:
+        """Wait for a batch, then parse and store its results"""
+        batch = self.wait(batch_id, timeout=timeout)
+        return self.store_results(self.fetch_results(batch), Session, batch_id=batch_id)
+
+
+def load_generated_content(row: GeneratedContent):
+    """Parse a stored GeneratedContent row back into its model"""
+    return RESPONSE_FORMATS[row.kind].model_validate_json(row.content)
+
+
+def apply_agents(content, tone_agent=None, crypto_market_analysis_format_agent=None):
+    """
+    Apply the tone and format passes the synchronous commands apply to the
+    same kind of content, which batch requests leave out
+
+    Args:
+        content (TweetModel | TweetThreadModel): Parsed batch content
+        tone_agent (ToneAgent, optional): Agent for adjusting tweet tone
+        crypto_market_analysis_format_agent (CryptoMarketAnalysisFormatAgent, optional):
+            Agent for formatting crypto analysis threads
+
+    Returns:
+        TweetModel | TweetThreadModel: The adjusted content
+    """
+    if isinstance(content, TweetModel):
+        return tone_agent.adjust_tone_single_tweet(content) if tone_agent else content
+
+    adjusted = tone_agent.adjust_tone_thread(content) if tone_agent else content
+    if isinstance(content, CryptoAnalysisThreadModel) and crypto_market_analysis_format_agent:
+        adjusted = crypto_market_analysis_format_agent.format_thread(adjusted)
+    return adjusted
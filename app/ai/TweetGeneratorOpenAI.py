@@ -1,4 +1,5 @@
 import logging
+from typing import Iterator
 
 from openai import OpenAI
 
@@ -9,7 +10,7 @@ from app.ai.models import (
     CryptoAnalysisThreadModel
 )
 from config.prompts import (
-    SYSTEM_PROMPT,
+    TWITTER_SYSTEM_PROMPT,
     USER_PROMPT_TWITTER,
     TWITTER_PROMPT_SINGLE_TWEET,
     TWITTER_PROMPT_THREAD,
@@ -18,27 +19,40 @@ from config.prompts import (
     get_analysis_prompt
 )
 from app.utils.utils import format_tweet_timeline
+from app.twitter.TweetRecord import TweetRecord
 from app.core.exceptions import (
     TweetGenerationError,
     MarketDataError,
 )
 from app.ai.agents.ToneAgent import ToneAgent
+from app.ai.completions import parse_completion, stream_completion
+from app.ai.streaming import iter_stream_items
 
 logger = logging.getLogger(__name__)
 
+# Sampling parameters shared by every generation request
+GENERATION_PARAMS = {
+    "model": "gpt-4o-mini",
+    "temperature": 1.2,
+    "top_p": 0.85,
+    # "frequency_penalty": 0.2,
+    "presence_penalty": 0.15,
+}
+
 
 class TweetGeneratorOpenAI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = None):
         """
         Initialize the tweet generator with OpenAI API key
         
         Args:
             api_key (str): OpenAI API key for authentication
+            base_url (str, optional): API base URL, OPENAI_BASE_URL or the OpenAI API if not set
         """
-        self.system = SYSTEM_PROMPT
+        self.system = TWITTER_SYSTEM_PROMPT
         self.crypto_system = CRYPTO_SYSTEM_PROMPT
         self.prompt = USER_PROMPT_TWITTER
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
 
     def _deduplicate_mentions(self, content: TweetModel | TweetThreadModel) -> TweetModel | TweetThreadModel:
         mentioned_tweets = {}
@@ -56,13 +70,13 @@ class TweetGeneratorOpenAI:
                 mentioned_tweets[tweet.quote_tweet_id] = True
         return content
 
-    def create_tweet(
-        self,
-        timeline: list[dict],
-        response_format: any = TweetModel,
-        action: str = TWITTER_PROMPT_SINGLE_TWEET,
-    ) -> TweetModel | TweetThreadModel:
-        messages = [
+    def _build_tweet_messages(self, timeline: list[TweetRecord], action: str) -> list[dict]:
+        """Build the chat messages for a tweet, thread or reply.
+
+        The system message is identical for every action so it forms a stable
+        prefix for prompt caching, the timeline and action follow it.
+        """
+        return [
             {"role": "system", "content": self.system},
             {
                 "role": "user",
@@ -73,14 +87,20 @@ class TweetGeneratorOpenAI:
             },
         ]
 
-        response = self.client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
+    def create_tweet(
+        self,
+        timeline: list[TweetRecord],
+        response_format: any = TweetModel,
+        action: str = TWITTER_PROMPT_SINGLE_TWEET,
+    ) -> TweetModel | TweetThreadModel:
+        messages = self._build_tweet_messages(timeline, action)
+
+        response = parse_completion(
+            self.client,
+            agent="generator",
             messages=messages,
             response_format=response_format,
-            temperature=1.2,
-            top_p=0.85,
-            # frequency_penalty=0.2,
-            presence_penalty=0.15,
+            **GENERATION_PARAMS,
         )
 
         content = response.choices[0].message.parsed
@@ -90,14 +110,47 @@ class TweetGeneratorOpenAI:
 
         return content
 
-    def create_thread(self, timeline: list[dict]) -> TweetThreadModel:
+    def create_thread(self, timeline: list[TweetRecord]) -> TweetThreadModel:
         return self.create_tweet(
             timeline=timeline,
             action=TWITTER_PROMPT_THREAD,
             response_format=TweetThreadModel,
         )
 
-    def create_reply(self, timeline: list[dict]) -> TweetModel:
+    def _stream_tweets(self, messages: list[dict], response_format: any) -> Iterator[TweetModel]:
+        """Stream a thread completion and yield each tweet as soon as it is complete"""
+        mentioned_tweets = set()
+        chunks = stream_completion(
+            self.client,
+            agent="generator",
+            messages=messages,
+            response_format=response_format,
+            **GENERATION_PARAMS,
+        )
+        for item in iter_stream_items(chunks):
+            tweet = TweetModel.model_validate(item)
+            # Allow a tweet to be mentioned only once, as in _deduplicate_mentions
+            if tweet.quote_tweet_id in mentioned_tweets:
+                tweet.quote_tweet_id = None
+            elif tweet.quote_tweet_id:
+                mentioned_tweets.add(tweet.quote_tweet_id)
+            yield tweet
+
+    def stream_thread(self, timeline: list[TweetRecord]) -> Iterator[TweetModel]:
+        """Generate a thread, yielding tweets while later ones are still being generated.
+
+        Args:
+            timeline (list[TweetRecord]): Timeline to write about
+
+        Yields:
+            TweetModel: Each tweet of the thread, in order
+        """
+        return self._stream_tweets(
+            self._build_tweet_messages(timeline, TWITTER_PROMPT_THREAD),
+            TweetThreadModel,
+        )
+
+    def create_reply(self, timeline: list[TweetRecord]) -> TweetModel:
         return self.create_tweet(
             timeline=timeline,
             action=TWITTER_PROMPT_REPLY,
@@ -116,6 +169,18 @@ class TweetGeneratorOpenAI:
             )
         return "\n".join(formatted_data)
 
+    def _build_crypto_messages(self, market_data: dict, category: str, analysis_type: str) -> list[dict]:
+        """Build the chat messages for a crypto market analysis thread"""
+        prompt = get_analysis_prompt(
+            category=category,
+            analysis_type=analysis_type,
+            market_data=market_data
+        )
+        return [
+            {"role": "system", "content": self.crypto_system},
+            {"role": "user", "content": prompt},
+        ]
+
     def create_crypto_analysis(
         self,
         market_data: dict,
@@ -147,22 +212,12 @@ class TweetGeneratorOpenAI:
                 logger.error("Invalid market data format")
                 raise MarketDataError("Invalid or empty market data")
 
-            prompt = get_analysis_prompt(
-                category=category,
-                analysis_type=analysis_type,
-                market_data=market_data
-            )
-            
-            response = self.client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": self.crypto_system},
-                    {"role": "user", "content": prompt},
-                ],
+            response = parse_completion(
+                self.client,
+                agent="generator",
+                messages=self._build_crypto_messages(market_data, category, analysis_type),
                 response_format=CryptoAnalysisThreadModel,
-                temperature=1.2,
-                top_p=0.85,
-                presence_penalty=0.15,
+                **GENERATION_PARAMS,
             )
             
             content = response.choices[0].message.parsed
@@ -178,4 +233,50 @@ class TweetGeneratorOpenAI:
             return content
         except Exception as e:
             logger.error(f"Failed to generate crypto analysis: {str(e)}")
-            raise TweetGenerationError("Failed to generate cryptocurrency analysis") from e
\ No newline at end of file
+            raise TweetGenerationError("Failed to generate cryptocurrency analysis") from e
+
+    def stream_crypto_analysis(
+        self,
+        market_data: dict,
+        category: str = 'latest',
+        analysis_type: str = 'market_overview',
+        tone_agent: ToneAgent = None,
+        crypto_market_analysis_format_agent: CryptoMarketAnalysisFormatAgent = None
+    ) -> Iterator[TweetModel]:
+        """Stream a cryptocurrency market analysis thread tweet by tweet.
+
+        Tone and format adjustments are applied per tweet as soon as each one is
+        complete. The thread-level formatting pass of `create_crypto_analysis`
+        needs the whole thread and is not applied.
+
+        Args:
+            market_data (dict): Market data from either search/trending or coins/markets endpoint
+            category (str): Source of the data ('latest' for search trending, or 'visited'/'gainers'/'losers' for market data)
+            analysis_type (str): Depth of analysis ('market_overview' or 'detailed_analysis')
+            tone_agent (ToneAgent, optional): Agent for adjusting tweet tone
+            crypto_market_analysis_format_agent (CryptoMarketAnalysisFormatAgent, optional): Agent for formatting tweets
+
+        Yields:
+            TweetModel: Each tweet of the thread, in order
+
+        Raises:
+            MarketDataError: If market data is invalid
+            TweetGenerationError: If generation fails
+        """
+        if not market_data or not isinstance(market_data, dict):
+            logger.error("Invalid market data format")
+            raise MarketDataError("Invalid or empty market data")
+
+        try:
+            for tweet in self._stream_tweets(
+                self._build_crypto_messages(market_data, category, analysis_type),
+                CryptoAnalysisThreadModel,
+            ):
+                if tone_agent:
+                    tweet = tone_agent.adjust_tone_single_tweet(tweet)
+                if crypto_market_analysis_format_agent:
+                    tweet = crypto_market_analysis_format_agent.format_single_tweet(tweet)
+                yield tweet
+        except Exception as e:
+            logger.error(f"Failed to stream crypto analysis: {str(e)}")
+            raise TweetGenerationError("Failed to generate cryptocurrency analysis") from e
@@ -2,6 +2,7 @@ from openai import OpenAI
 
 # Group app imports together
 from app.ai.models import TweetThreadModel, TweetModel
+from app.ai.completions import parse_completion
 from app.utils.utils import clean_tweet
 from config.prompts import CRYPTO_MARKET_ANALYSIS_FORMAT_THREAD_PROMPT, CRYPTO_MARKET_ANALYSIS_FORMAT_TWEET_PROMPT, TONE_ADJUSTMENT_SYSTEM_PROMPT
 
@@ -11,14 +12,15 @@ class CryptoMarketAnalysisFormatAgent:
     A class that uses OpenAI to format the content.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = None):
         """
         Initialize the CryptoMarketAnalysisFormatAgent.
 
         Args:
             api_key (str, optional): OpenAI API key. If not provided, will use environment variable.
+            base_url (str, optional): API base URL, OPENAI_BASE_URL or the OpenAI API if not set
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.crypto_market_analysis_format_thread_system_prompt = CRYPTO_MARKET_ANALYSIS_FORMAT_THREAD_PROMPT
         self.crypto_market_analysis_format_tweet_system_prompt = CRYPTO_MARKET_ANALYSIS_FORMAT_TWEET_PROMPT
 
@@ -36,7 +38,9 @@ class CryptoMarketAnalysisFormatAgent:
         prompt = f"Topic: {thread.topic}\n---\n"
         prompt += "\n---\n".join(tweet.text for tweet in thread.tweets)
 
-        response = self.client.beta.chat.completions.parse(
+        response = parse_completion(
+            self.client,
+            agent="format",
             model="gpt-4o-mini",
             messages=[
                 {
@@ -71,7 +75,9 @@ class CryptoMarketAnalysisFormatAgent:
         """
         prompt = tweet.text
 
-        response = self.client.beta.chat.completions.parse(
+        response = parse_completion(
+            self.client,
+            agent="format",
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": self.crypto_market_analysis_format_tweet_system_prompt},
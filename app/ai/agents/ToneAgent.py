@@ -2,6 +2,7 @@ from openai import OpenAI
 
 # Group app imports together
 from app.ai.models import TweetThreadModel, TweetModel
+from app.ai.completions import parse_completion
 from app.utils.utils import clean_tweet
 from config.prompts import TONE_ADJUSTMENT_SYSTEM_PROMPT
 
@@ -11,14 +12,15 @@ class ToneAgent:
     A class that uses OpenAI to optimize the tone of voice for content.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = None):
         """
         Initialize the ToneAgent.
 
         Args:
             api_key (str, optional): OpenAI API key. If not provided, will use environment variable.
+            base_url (str, optional): API base URL, OPENAI_BASE_URL or the OpenAI API if not set
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
 
     def adjust_tone_thread(self, thread: TweetThreadModel) -> TweetThreadModel:
         """
@@ -33,7 +35,9 @@ class ToneAgent:
         prompt = f"Topic: {thread.topic}\n---\n"
         prompt += "\n---\n".join(tweet.text for tweet in thread.tweets)
 
-        response = self.client.beta.chat.completions.parse(
+        response = parse_completion(
+            self.client,
+            agent="tone",
             model="gpt-4o-mini",
             messages=[
                 {
@@ -73,7 +77,9 @@ class ToneAgent:
         """
         prompt = tweet.text
 
-        response = self.client.beta.chat.completions.parse(
+        response = parse_completion(
+            self.client,
+            agent="tone",
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": TONE_ADJUSTMENT_SYSTEM_PROMPT},
@@ -0,0 +1,180 @@
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+from app.core import metrics
+from app.core.tracing import LLM, span, tracer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenUsage:
+    """Accumulated token usage reported by the OpenAI API."""
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        """Share of prompt tokens served from the provider-side prompt cache"""
+        if not self.prompt_tokens:
+            return 0.0
+        return self.cached_tokens / self.prompt_tokens
+
+    def add(self, usage: Any) -> None:
+        """Add the `usage` field of a chat completion response"""
+        self.calls += 1
+        if usage is None:
+            return
+        self.prompt_tokens += usage.prompt_tokens or 0
+        self.completion_tokens += usage.completion_tokens or 0
+        self.cached_tokens += get_cached_tokens(usage)
+
+
+# Process-wide usage, keyed by the agent that made the call
+usage_by_agent: Dict[str, TokenUsage] = {}
+
+# Usage of the current run, e.g. of one command run by the daemon next to others, see `track_usage`
+_run_usage: contextvars.ContextVar[Optional[TokenUsage]] = contextvars.ContextVar("run_usage", default=None)
+
+
+def get_cached_tokens(usage: Any) -> int:
+    """Return the cached prompt token count of a `usage` object, 0 if not reported"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return (getattr(details, "cached_tokens", None) or 0) if details else 0
+
+
+def record_usage(agent: str, usage: Any) -> None:
+    """Record the token usage of a single completion"""
+    usage_by_agent.setdefault(agent, TokenUsage()).add(usage)
+    run = _run_usage.get()
+    if run is not None:
+        run.add(usage)
+    if usage is not None:
+        metrics.openai_tokens.inc(usage.prompt_tokens or 0, agent=agent, type="prompt")
+        metrics.openai_tokens.inc(usage.completion_tokens or 0, agent=agent, type="completion")
+        metrics.openai_tokens.inc(get_cached_tokens(usage), agent=agent, type="cached")
+        logger.info(
+            f"{agent}: {usage.prompt_tokens} prompt tokens "
+            f"({get_cached_tokens(usage)} cached), "
+            f"{usage.completion_tokens} completion tokens"
+        )
+
+
+def usage_attributes(usage: Any) -> dict:
+    """Token counts of a completion as tracing span attributes"""
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": get_cached_tokens(usage),
+    }
+
+
+def total_usage() -> TokenUsage:
+    """Return the usage summed over all agents"""
+    total = TokenUsage()
+    for usage in usage_by_agent.values():
+        total.calls += usage.calls
+        total.prompt_tokens += usage.prompt_tokens
+        total.completion_tokens += usage.completion_tokens
+        total.cached_tokens += usage.cached_tokens
+    return total
+
+
+@contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """Count the usage of the calls made in this context on its own, see `run_usage`"""
+    usage = TokenUsage()
+    token = _run_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _run_usage.reset(token)
+
+
+def run_usage() -> TokenUsage:
+    """Return the usage of the current run, or of the whole process outside of `track_usage`"""
+    return _run_usage.get() or total_usage()
+
+
+def format_usage_summary() -> str:
+    """Format the usage of the current run as a one line summary"""
+    total = run_usage()
+    return (
+        f"Token usage: {total.calls} calls, {total.prompt_tokens} prompt tokens "
+        f"({total.cached_tokens} cached, {total.cache_hit_ratio:.0%}), "
+        f"{total.completion_tokens} completion tokens"
+    )
+
+
+def parse_completion(client, agent: str, **kwargs):
+    """
+    Call the structured output endpoint and record its token usage
+
+    Args:
+        client (OpenAI): OpenAI client to use
+        agent (str): Name of the calling agent, used to group usage
+        **kwargs: Arguments for `client.beta.chat.completions.parse`
+
+    Returns:
+        ParsedChatCompletion: The API response
+    """
+    started = time.perf_counter()
+    try:
+        with span(f"openai {agent}", kind=LLM, agent=agent, model=kwargs.get("model")) as s:
+            response = client.beta.chat.completions.parse(**kwargs)
+            usage = getattr(response, "usage", None)
+            record_usage(agent, usage)
+            s.set(**usage_attributes(usage))
+    except Exception:
+        metrics.openai_requests.inc(agent=agent, status="error")
+        raise
+    finally:
+        metrics.openai_request_seconds.observe(time.perf_counter() - started, agent=agent)
+    metrics.openai_requests.inc(agent=agent, status="ok")
+    return response
+
+
+def stream_completion(client, agent: str, **kwargs):
+    """
+    Stream a structured output completion and record its token usage
+
+    Args:
+        client (OpenAI): OpenAI client to use
+        agent (str): Name of the calling agent, used to group usage
+        **kwargs: Arguments for `client.beta.chat.completions.stream`
+
+    Yields:
+        str: Content deltas as they arrive
+    """
+    # Timed by hand rather than with `span()`: a generator must not stay the
+    # current span while the caller runs between two deltas
+    start, started = time.time(), time.perf_counter()
+    try:
+        with client.beta.chat.completions.stream(
+            stream_options={"include_usage": True}, **kwargs
+        ) as stream:
+            for event in stream:
+                if event.type == "content.delta":
+                    yield event.delta
+            completion = stream.get_final_completion()
+    except Exception:
+        metrics.openai_requests.inc(agent=agent, status="error")
+        raise
+    finally:
+        metrics.openai_request_seconds.observe(time.perf_counter() - started, agent=agent)
+    metrics.openai_requests.inc(agent=agent, status="ok")
+    usage = getattr(completion, "usage", None)
+    record_usage(agent, usage)
+    if tracer.enabled:
+        tracer.record(
+            f"openai {agent} stream", LLM, start, time.perf_counter() - started,
+            agent=agent, model=kwargs.get("model"), **usage_attributes(usage),
+        )
@@ -0,0 +1,80 @@
+import json
+from typing import Iterable, Iterator
+
+
+class ThreadStreamParser:
+    """
+    Incremental parser for a streamed thread JSON document.
+
+    The structured output of a thread is a single JSON object with a `tweets`
+    array. Chunks of that document are fed as they arrive and every element of
+    the top-level `tweets` array is returned as soon as its closing brace has
+    been received, long before the whole document is complete.
+    """
+
+    def __init__(self, array_key: str = "tweets"):
+        self.array_key = array_key
+        self._buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_key = None
+        self._in_array = False
+        self._item_start = None
+
+    def feed(self, chunk: str) -> list[dict]:
+        """
+        Feed the next chunk of the document
+
+        Args:
+            chunk (str): Next piece of the streamed JSON text
+
+        Returns:
+            list[dict]: Array items completed by this chunk, in order
+        """
+        self._buffer += chunk
+        completed = []
+
+        while self._pos < len(self._buffer):
+            char = self._buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    # Strings directly inside the root object are keys or
+                    # scalar values, the last one before a '[' is its key
+                    if len(self._stack) == 1:
+                        self._last_key = json.loads(self._buffer[self._string_start:self._pos + 1])
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char in "{[":
+                if char == "[" and len(self._stack) == 1 and self._last_key == self.array_key:
+                    self._in_array = True
+                elif char == "{" and self._in_array and len(self._stack) == 2:
+                    self._item_start = self._pos
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+                if char == "}" and self._in_array and len(self._stack) == 2 and self._item_start is not None:
+                    completed.append(json.loads(self._buffer[self._item_start:self._pos + 1]))
+                    self._item_start = None
+                elif char == "]" and self._in_array and len(self._stack) == 1:
+                    self._in_array = False
+
+            self._pos += 1
+
+        return completed
+
+
+def iter_stream_items(chunks: Iterable[str], array_key: str = "tweets") -> Iterator[dict]:
+    """Yield the items of the `array_key` array of a streamed JSON document as they complete"""
+    parser = ThreadStreamParser(array_key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
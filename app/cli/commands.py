@@ -1,27 +1,170 @@
-"""CLI commands for the Nate social media assistant application."""
+"""CLI commands for the Nate social media assistant application.
 
-from os import getenv
+Only lightweight modules are imported at module level. Commands import the
+modules they use (openai, tweepy, SQLAlchemy, pydantic, requests) when they
+run, so `nate --help` and commands that do not need them start fast.
+"""
+
+from datetime import datetime, timezone
+import functools
+import json
 from pathlib import Path
+import shlex
+import signal
 import time
 import click
-from dotenv import load_dotenv
-from requests.exceptions import RequestException, ConnectionError, Timeout
 
 # Group app imports together
-from app.ai.agents.CryptoMarketAnalysisFormatAgent import CryptoMarketAnalysisFormatAgent
-from app.ai.agents.ToneAgent import ToneAgent
-from app.ai.TweetGeneratorOpenAI import TweetGeneratorOpenAI
-from app.twitter.TwitterClient import TwitterClient
-from app.services.CryptoService import CryptoService
+from app.ai.completions import format_usage_summary, run_usage, track_usage
+from app.core.exceptions import TwitterRateLimitError
+from app.core.tracing import span, tracer
+from app.cli.context import (
+    get_crypto_service,
+    get_format_agent,
+    get_generator,
+    get_session_factory,
+    get_tone_agent,
+    get_twitter_client,
+)
+
+
+def build_market_data(coins, category):
+    """Format coins returned by CryptoService for the tweet generator"""
+    return {
+        "category": category,
+        "assets": [
+            {
+                "symbol": coin['symbol'],
+                "price": coin['quote']['USD']['price'],
+                "price_change": coin['quote']['USD']['percent_change_24h'],
+                "volume_24h": coin['quote']['USD']['volume_24h'],
+                "market_cap": coin['quote']['USD']['market_cap'],
+                "name": coin['name'],
+                "hashtags": ' '.join(sorted(coin['hashtags'])) if 'hashtags' in coin else ''
+            }
+            for coin in coins
+        ]
+    }
+
+
+def tracks_usage(command):
+    """Count the LLM usage of each run of a command on its own, runs of other daemon jobs are not included"""
+    @functools.wraps(command)
+    def run(*args, **kwargs):
+        with track_usage():
+            return command(*args, **kwargs)
+    return run
+
+
+def post_streamed_thread(client, tweets, dry_run, stages=(), source=None):
+    """
+    Display and post tweets of a streamed thread as they become available
+
+    The tweets are journaled as they are posted, so a thread that fails partway
+    through is resumed from the journal like any other entry.
+    """
+    from app.ai.models import TweetThreadModel
+
+    def show(index, tweet):
+        click.echo(f"Tweet {index}:")
+        click.echo(f"Quote Tweet ID: {tweet.quote_tweet_id}")
+        click.echo(tweet.text)
+        click.echo("---")
+
+    if dry_run:
+        for i, tweet in enumerate(tweets, 1):
+            for stage in stages:
+                tweet = stage(tweet)
+            show(i, tweet)
+        click.echo("Dry run - thread not posted")
+        return
 
-# Load environment variables at module level
-load_dotenv()
+    def on_posted(tweet, posted):
+        show(posted.index + 1, tweet)
+        click.echo(
+            f"Posted {posted.tweet_id}: ready after {posted.ready_after:.1f}s, "
+            f"posted after {posted.posted_after:.1f}s (post took {posted.post_seconds:.2f}s)"
+        )
+
+    entry_id = client.journal.record(
+        TweetThreadModel(topic="streamed thread", tweets=[], timestamp=datetime.now(timezone.utc).isoformat()),
+        source=source,
+    )
+    try:
+        with span("post journal entry", entry_id=entry_id):
+            client.post_entry_stream(entry_id, tweets, stages=stages, on_posted=on_posted)
+    except Exception as e:
+        # Tweets that were not generated yet are not part of the entry
+        click.echo(f"Resume with: nate twitter resume {entry_id}")
+        raise click.ClickException(f"Error posting journal entry {entry_id}: {e}") from e
+    click.echo(f"Journal entry {entry_id} posted successfully!")
+
+
+def post_journal_entry(client, entry_id):
+    """
+    Post a journal entry. When posting fails, show how to resume it and raise
+    click.ClickException, so the exit status and a daemon job run show the failure.
+    """
+    try:
+        with span("post journal entry", entry_id=entry_id):
+            client.post_entry(entry_id)
+    except Exception as e:
+        click.echo(f"Resume with: nate twitter resume {entry_id}")
+        raise click.ClickException(f"Error posting journal entry {entry_id}: {e}") from e
+    click.echo(f"Journal entry {entry_id} posted successfully!")
 
 
 @click.group()
-def cli():
+@click.option("--profile", is_flag=True, help="Print a per-stage timing breakdown when the command ends")
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False),
+    help="Write the recorded spans to this file",
+)
+@click.option(
+    "--trace-format",
+    type=click.Choice(["jsonl", "otlp"]),
+    default="jsonl",
+    help="Format of --trace-file: JSON lines or OpenTelemetry OTLP/JSON",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    help="Write Prometheus metrics to this file for the textfile collector when the command ends",
+)
+@click.pass_context
+def cli(ctx, profile, trace_file, trace_format, metrics_file):
     """Nate - Your AI-powered social media assistant"""
-    pass
+    from dotenv import load_dotenv
+
+    # Load environment variables before any command runs
+    load_dotenv()
+
+    if metrics_file:
+        from app.core.metrics import write_textfile
+
+        ctx.call_on_close(lambda: write_textfile(metrics_file))
+    if profile or trace_file:
+        start_tracing(ctx, profile, trace_file, trace_format)
+
+
+def start_tracing(ctx, profile, trace_file, trace_format):
+    """Trace the invoked command and report the spans when it ends"""
+    tracer.enable()
+
+    def report():
+        if trace_file:
+            if trace_format == "otlp":
+                tracer.export_otlp(trace_file)
+            else:
+                tracer.export_jsonl(trace_file)
+            click.echo(f"Trace written to {trace_file}", err=True)
+        if profile:
+            click.echo(tracer.format_report(), err=True)
+
+    # Close callbacks run in reverse order, so the root span ends before the report
+    ctx.call_on_close(report)
+    ctx.with_resource(span(f"nate {ctx.invoked_subcommand}"))
 
 
 @cli.group()
@@ -44,32 +187,60 @@ def twitter():
     is_flag=True,
     help="Use sample data instead of real Twitter timeline",
 )
-
-def twitter_post(dry_run, thread, sample):
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Stream the thread and post each tweet as soon as it is generated",
+)
+@click.option("--hours", default=24.0, show_default=True, help="Hours of stored timeline to write about")
+@click.option("--limit", default=40, show_default=True, help="Most timeline tweets given to the model")
+@click.option(
+    "--token-budget",
+    default=2000,
+    show_default=True,
+    help="Estimated prompt tokens the timeline may take",
+)
+@tracks_usage
+def twitter_post(dry_run, thread, sample, stream, hours, limit, token_budget):
     """Generate and post a tweet or thread based on timeline analysis"""
     # Initialize Twitter client
-    client = TwitterClient(
-        api_key=getenv("TWITTER_API_KEY"),
-        api_secret=getenv("TWITTER_API_SECRET"),
-        access_token=getenv("TWITTER_ACCESS_TOKEN"),
-        access_token_secret=getenv("TWITTER_ACCESS_TOKEN_SECRET"),
-        bearer_token=getenv("TWITTER_BEARER_TOKEN"),
-    )
+    client = get_twitter_client()
 
     # Get timeline and simplify
     if sample:
         timeline = client.get_sample_timeline()
     else:
-        timeline = client.get_timeline()
+        # Only the tweets added since the last run are fetched, the rest is stored
+        with span("sync timeline"):
+            try:
+                client.timeline.sync()
+            except Exception as e:
+                click.echo(f"Could not sync the timeline, using the stored one: {e}", err=True)
+        timeline = client.timeline.recent(hours=hours, limit=1000)
+
+    # Only the highest-signal tweets go into the prompt
+    from app.twitter.TimelineRanker import TimelineRanker
+
+    with span("rank timeline"):
+        timeline = TimelineRanker(client.Session).select(timeline, max_tweets=limit, token_budget=token_budget)
 
     # Initialize tweet generator
-    generator = TweetGeneratorOpenAI(api_key=getenv("OPENAI_API_KEY"))
+    generator = get_generator()
     # Generate new tweet or thread
-    if thread:
+    if thread and stream:
+        tone_agent = get_tone_agent()
+        post_streamed_thread(
+            client,
+            generator.stream_thread(timeline=timeline),
+            dry_run,
+            stages=[tone_agent.adjust_tone_single_tweet],
+            source="post",
+        )
+    elif thread:
         new_tweet_thread = generator.create_thread(timeline=timeline)
 
         # Adjust tone of tweet thread
-        tone_agent = ToneAgent(api_key=getenv("OPENAI_API_KEY"))
+        tone_agent = get_tone_agent()
         new_tweet_thread = tone_agent.adjust_tone_thread(new_tweet_thread)
 
         click.echo("Generated Thread:")
@@ -82,8 +253,8 @@ def twitter_post(dry_run, thread, sample):
             click.echo("---")
 
         if not dry_run and thread:  # Only post if there are valid tweets
-            client.post_thread(new_tweet_thread)
-            click.echo("Thread posted successfully!")
+            entry_id = client.journal.record(new_tweet_thread, source="post")
+            post_journal_entry(client, entry_id)
         elif not thread:
             click.echo("No valid tweets generated")
         else:
@@ -92,7 +263,7 @@ def twitter_post(dry_run, thread, sample):
         new_post = generator.create_tweet(timeline=timeline)
 
         # Adjust tone of tweet
-        tone_agent = ToneAgent(api_key=getenv("OPENAI_API_KEY"))
+        tone_agent = get_tone_agent()
         new_post = tone_agent.adjust_tone_single_tweet(new_post)
 
         click.echo("Generated Tweet")
@@ -102,11 +273,13 @@ def twitter_post(dry_run, thread, sample):
         click.echo("---")
 
         if not dry_run:
-            client.post_tweet(new_post)
-            click.echo("Tweet posted successfully!")
+            entry_id = client.journal.record(new_post, source="post")
+            post_journal_entry(client, entry_id)
         else:
             click.echo("Dry run - tweet not posted")
 
+    click.echo(format_usage_summary())
+
 
 @twitter.command(name="follow")
 @click.option("--users", "-u", help="Comma-separated list of usernames to follow")
@@ -143,33 +316,29 @@ def follow_users(users, file):
         click.echo("No valid usernames provided")
         return
 
-    client = TwitterClient(
-        api_key=getenv("TWITTER_API_KEY"),
-        api_secret=getenv("TWITTER_API_SECRET"),
-        access_token=getenv("TWITTER_ACCESS_TOKEN"),
-        access_token_secret=getenv("TWITTER_ACCESS_TOKEN_SECRET"),
-        bearer_token=getenv("TWITTER_BEARER_TOKEN"),
-    )
+    client = get_twitter_client()
 
-    success_count = 0
-    for username in usernames:
-        try:
-            # Remove '@' if present
-            if username.startswith("@"):
-                username = username[1:]
-
-            # Assuming there's an existing follow_user function in the API client
-            if client.follow_user(username):
-                click.echo(f"Successfully followed @{username}")
-                # Sleep for 1 second to avoid rate limiting
-                time.sleep(1)
-                success_count += 1
-            else:
-                click.echo(f"Failed to follow @{username}")
-        except Exception as e:
-            click.echo(f"Failed to follow @{username}: {e}")
+    messages = {
+        "followed": "Successfully followed @{}",
+        "already_following": "Already following @{}",
+        "not_found": "User @{} not found",
+        "failed": "Failed to follow @{}",
+    }
+    try:
+        result = client.follow_users(
+            usernames, on_result=lambda username, outcome: click.echo(messages[outcome].format(username))
+        )
+    except TwitterRateLimitError as e:
+        click.echo(f"{e}, run the same list again then to continue")
+        return
 
-    click.echo(f"\nFollowed {success_count} out of {len(usernames)} users")
+    click.echo(
+        f"\nFollowed {len(result.followed)} out of {len(usernames)} users"
+        f" ({len(result.already_following)} already followed, {len(result.not_found)} not found,"
+        f" {len(result.failed)} failed)"
+    )
+    if result.failed:
+        click.echo("Run the same list again to retry the failed users")
 
 
 @twitter.command(name="reply")
@@ -180,57 +349,87 @@ def follow_users(users, file):
     help="Use locally stored tweets from database",
 )
 @click.option("--dry-run", "-d", is_flag=True, help="Generate tweet without posting")
-def twitter_reply(local, dry_run):
+@click.option(
+    "--max-conversation-tweets",
+    default=500,
+    show_default=True,
+    help="Most tweets fetched per conversation",
+)
+@click.option(
+    "--reply-chain-only",
+    is_flag=True,
+    help="Fetch only the tweets each mention replies to, not the whole conversation",
+)
+@click.option(
+    "--context-tokens",
+    default=1500,
+    show_default=True,
+    help="Estimated prompt tokens of conversation context per reply",
+)
+@click.option("--max-replies", default=10, show_default=True, help="Most replies generated per run")
+@click.option("--max-tokens", default=50000, show_default=True, help="Most LLM tokens spent per run")
+@click.option("--max-seconds", default=600, show_default=True, help="Most seconds spent replying per run")
+@tracks_usage
+def twitter_reply(
+    local, dry_run, max_conversation_tweets, reply_chain_only, context_tokens, max_replies, max_tokens, max_seconds
+):
     """Generate and post replies to conversations"""
-    # Initialize Twitter client
-    client = TwitterClient(
-        api_key=getenv("TWITTER_API_KEY"),
-        api_secret=getenv("TWITTER_API_SECRET"),
-        access_token=getenv("TWITTER_ACCESS_TOKEN"),
-        access_token_secret=getenv("TWITTER_ACCESS_TOKEN_SECRET"),
-        bearer_token=getenv("TWITTER_BEARER_TOKEN"),
-    )
+    from app.twitter.ConversationFetcher import ConversationFetcher
+    from app.twitter.ReplyContext import ReplyContextBuilder
 
-    # Get conversations either from local DB or Twitter API
-    conversations = client.get_conversations(use_local=local)
+    # Initialize Twitter client
+    client = get_twitter_client()
+    # The client is shared by the daemon's jobs, the options only apply to this run
+    fetcher = ConversationFetcher(client, max_tweets=max_conversation_tweets, reply_chain_only=reply_chain_only)
 
-    # Filter for conversations needing replies
-    pending_replies = {
-        conv_id: conv
-        for conv_id, conv in conversations.items()
-        if client.needs_reply(conv)
-    }
+    # Conversations needing replies, most valuable first
+    pending_replies = client.get_pending_replies(use_local=local, fetcher=fetcher)
 
     if not pending_replies:
         click.echo("No conversations need replies")
         return
 
-    generator = TweetGeneratorOpenAI(api_key=getenv("OPENAI_API_KEY"))
+    generator = get_generator()
+    context_builder = ReplyContextBuilder(token_budget=context_tokens)
 
     # Display and process conversations needing replies
     click.echo(f"\nFound {len(pending_replies)} conversations needing replies:\n")
 
-    for conv_id, conversation in pending_replies.items():
+    started = time.monotonic()
+    usage = run_usage()
+    replied = 0
+    failed_posts = 0
+    for position, (conv_id, conversation) in enumerate(pending_replies.items()):
+        tokens = usage.prompt_tokens + usage.completion_tokens
+        if replied >= max_replies or tokens >= max_tokens or time.monotonic() - started >= max_seconds:
+            click.echo(
+                f"Reply budget reached after {replied} replies, {tokens} tokens and "
+                f"{time.monotonic() - started:.0f}s, {len(pending_replies) - position} conversations stay queued"
+            )
+            break
+
         click.echo(f"Conversation ID: {conv_id}")
-        click.echo("Participants: " + ", ".join(conversation["participants"]))
-        click.echo(f"Last activity: {conversation['last_tweet_time']}")
+        click.echo("Participants: " + ", ".join(conversation.participants))
+        click.echo(f"Last activity: {conversation.last_tweet_time}")
         click.echo("\nTweets:")
 
-        # Sort tweets by creation time
-        sorted_tweets = sorted(conversation["tweets"], key=lambda x: x["created_at"])
-
-        for tweet in sorted_tweets:
-            click.echo(f"\n@{tweet['username']} ({tweet['created_at']}):")
-            click.echo(f"{tweet['text']}")
+        # Tweets are kept in time order by the conversation
+        for tweet in conversation:
+            click.echo(f"\n@{tweet.username} ({tweet.created_at}):")
+            click.echo(f"{tweet.text}")
 
-        conversation = sorted_tweets
-
-        # Generate reply
-        reply = generator.create_reply(timeline=conversation)
+        try:
+            # Generate reply from the chain of tweets leading to the one we answer
+            reply = generator.create_reply(timeline=context_builder.build(conversation))
 
-        # Adjust tone of tweet
-        tone_agent = ToneAgent(api_key=getenv("OPENAI_API_KEY"))
-        reply = tone_agent.adjust_tone_single_tweet(reply)
+            # Adjust tone of tweet
+            tone_agent = get_tone_agent()
+            reply = tone_agent.adjust_tone_single_tweet(reply)
+        except Exception as e:
+            click.echo(f"Error generating reply: {e}")
+            client.reply_queue.set_status(conv_id, "failed", error=str(e))
+            continue
+        replied += 1
 
         click.echo("\nGenerated Reply:")
         click.echo("---")
@@ -239,16 +438,29 @@ def twitter_reply(local, dry_run):
 
         if not dry_run:
             # Get the last tweet in conversation to reply to
-            last_tweet_id = sorted_tweets[-1]["id"]
-            client.post_reply(
-                text=reply.text,
-                reply_to_tweet_id=last_tweet_id,
-                conversation_id=conv_id,
+            entry_id = client.journal.record(
+                reply,
+                source="reply",
+                reply_to_tweet_id=conversation.last_tweet.id,
+                conversation_id=conversation.id,
             )
-            click.echo("Reply posted successfully!")
+            # From here on the journal owns the reply, a failed post is resumed from it
+            client.reply_queue.set_status(conv_id, "done")
+            try:
+                post_journal_entry(client, entry_id)
+            except click.ClickException as e:
+                if isinstance(e.__cause__, TwitterRateLimitError):
+                    raise
+                # The other replies are still posted, the run fails at the end
+                click.echo(f"Error: {e.message}")
+                failed_posts += 1
         else:
             click.echo("Dry run - reply not posted")
 
+    click.echo(format_usage_summary())
+    if failed_posts:
+        raise click.ClickException(f"{failed_posts} replies failed to post")
+
 
 @twitter.command(name="trending-crypto")
 @click.option(
@@ -266,56 +478,73 @@ def twitter_reply(local, dry_run):
     help="Type of analysis to generate"
 )
 @click.option("--dry-run", "-d", is_flag=True, help="Generate tweet without posting")
-def twitter_trending_crypto(category, analysis, dry_run):
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Stream the thread and post each tweet as soon as it is generated",
+)
+@tracks_usage
+def twitter_trending_crypto(category, analysis, dry_run, stream):
     """Generate and post analytical tweets about trending cryptocurrencies"""
+    from requests.exceptions import RequestException, ConnectionError, Timeout
+    from app.twitter.PostingJournal import PostingJournal
+
     try:
-        crypto_service = CryptoService()
+        crypto_service = get_crypto_service()
         
         try:
-            coins = (
-                crypto_service.get_search_trending_coins(limit=3)
-                if category == 'latest'
-                else crypto_service.get_market_trending_coins(category=category, limit=3)
-            )
+            with span("fetch market data"):
+                coins = (
+                    crypto_service.get_search_trending_coins(limit=3)
+                    if category == 'latest'
+                    else crypto_service.get_market_trending_coins(category=category, limit=3)
+                )
         except (RequestException, ConnectionError, Timeout) as e:
-            click.echo(f"API Error: {str(e)}")
-            return
+            raise click.ClickException(f"API Error: {str(e)}") from e
             
         if not coins:
-            click.echo(f"Error: Unable to fetch {category} cryptocurrency data")
-            return
+            raise click.ClickException(f"Unable to fetch {category} cryptocurrency data")
 
         # Format data for the tweet generator including hashtags
-        market_data = {
-            "category": category,
-            "assets": [
-                {
-                    "symbol": coin['symbol'],
-                    "price": coin['quote']['USD']['price'],
-                    "price_change": coin['quote']['USD']['percent_change_24h'],
-                    "volume_24h": coin['quote']['USD']['volume_24h'],
-                    "market_cap": coin['quote']['USD']['market_cap'],
-                    "name": coin['name'],
-                    "hashtags": ' '.join(coin['hashtags']) if 'hashtags' in coin else ''
-                }
-                for coin in coins
-            ]
-        }
+        market_data = build_market_data(coins, category)
 
         # Initialize tweet generator
-        generator = TweetGeneratorOpenAI(api_key=getenv("OPENAI_API_KEY"))
+        generator = get_generator()
         
         # Generate analysis thread
-        tone_agent = ToneAgent(api_key=getenv("OPENAI_API_KEY"))
-        crypto_market_analysis_format_agent = CryptoMarketAnalysisFormatAgent(api_key=getenv("OPENAI_API_KEY"))
-
-        analysis_thread = generator.create_crypto_analysis(
-            market_data=market_data,
-            category=category,
-            analysis_type=analysis,
-            tone_agent=tone_agent,
-            crypto_market_analysis_format_agent = crypto_market_analysis_format_agent
-        )
+        tone_agent = get_tone_agent()
+        crypto_market_analysis_format_agent = get_format_agent()
+
+        if stream:
+            client = None if dry_run else get_twitter_client()
+            # Tone and format run as pipeline stages, overlapping with
+            # generation of later tweets and posting of earlier ones
+            tweets = generator.stream_crypto_analysis(
+                market_data=market_data,
+                category=category,
+                analysis_type=analysis,
+            )
+            post_streamed_thread(
+                client,
+                tweets,
+                dry_run,
+                stages=[
+                    tone_agent.adjust_tone_single_tweet,
+                    crypto_market_analysis_format_agent.format_single_tweet,
+                ],
+                source="trending-crypto",
+            )
+            click.echo(format_usage_summary())
+            return
+
+        with span("generate analysis thread"):
+            analysis_thread = generator.create_crypto_analysis(
+                market_data=market_data,
+                category=category,
+                analysis_type=analysis,
+                tone_agent=tone_agent,
+                crypto_market_analysis_format_agent = crypto_market_analysis_format_agent
+            )
 
         # Display generated thread
         click.echo("\nGenerated Crypto Analysis Thread:")
@@ -325,21 +554,352 @@ def twitter_trending_crypto(category, analysis, dry_run):
             click.echo(f"Tweet {i}:")
             click.echo(tweet.text)
             click.echo("---")
+        click.echo(format_usage_summary())
 
         # Post the thread if not a dry run
         if not dry_run:
-            client = TwitterClient(
-                api_key=getenv("TWITTER_API_KEY"),
-                api_secret=getenv("TWITTER_API_SECRET"),
-                access_token=getenv("TWITTER_ACCESS_TOKEN"),
-                access_token_secret=getenv("TWITTER_ACCESS_TOKEN_SECRET"),
-                bearer_token=getenv("TWITTER_BEARER_TOKEN"),
-            )
-            client.post_thread(analysis_thread)
-            click.echo("Thread posted successfully!")
+            # Journal the thread first so a failed post can be resumed
+            # without regenerating it
+            Session = get_session_factory()
+            entry_id = PostingJournal(Session).record(analysis_thread, source="trending-crypto")
+
+            client = get_twitter_client()
+            post_journal_entry(client, entry_id)
         else:
             click.echo("Dry run - thread not posted")
             
+    except click.ClickException:
+        raise
     except Exception as e:
-        click.echo(f"Error: {str(e)}")
-        return
\ No newline at end of file
+        # Raised, not only shown, so a daemon job run counts as failed
+        raise click.ClickException(str(e)) from e
+
+
+@twitter.command(name="post-generated")
+@click.option("--dry-run", "-d", is_flag=True, help="Show the content without posting")
+def twitter_post_generated(dry_run):
+    """Post the oldest batch generated tweet or thread that was not posted yet"""
+    from app.ai.TweetBatchGenerator import apply_agents, load_generated_content
+    from app.ai.models import TweetModel
+    from app.db.models.GeneratedContent_model import GeneratedContent
+
+    client = get_twitter_client()
+
+    session = client.Session()
+    try:
+        row = (
+            session.query(GeneratedContent)
+            .filter(GeneratedContent.posted_at.is_(None))
+            .order_by(GeneratedContent.created_at)
+            .first()
+        )
+        if not row:
+            click.echo("No generated content waiting to be posted")
+            return
+
+        # Tone and format are applied now, like the synchronous commands do after generating
+        content = apply_agents(load_generated_content(row), get_tone_agent(), get_format_agent())
+        click.echo(f"Generated content {row.custom_id}:")
+        tweets = [content] if isinstance(content, TweetModel) else content.tweets
+        for tweet in tweets:
+            click.echo(tweet.text)
+            click.echo("---")
+
+        if dry_run:
+            click.echo("Dry run - content not posted")
+            return
+
+        # Once journaled the content is owned by the posting journal
+        entry_id = client.journal.record(content, source=row.custom_id)
+        row.posted_at = datetime.now(timezone.utc)
+        session.commit()
+        post_journal_entry(client, entry_id)
+    finally:
+        session.close()
+
+
+@twitter.command(name="resume")
+@click.argument("entry_id", type=int, required=False)
+@click.option("--list", "-l", "list_only", is_flag=True, help="Only list unfinished journal entries")
+def twitter_resume(entry_id, list_only):
+    """Continue posting journaled content from its last posted tweet"""
+    from app.twitter.PostingJournal import PostingJournal
+
+    Session = get_session_factory()
+    journal = PostingJournal(Session)
+
+    entries = [journal.get_entry(entry_id)] if entry_id else journal.unfinished()
+    entries = [entry for entry in entries if entry is not None]
+    if not entries:
+        click.echo("No unfinished journal entries")
+        return
+
+    for entry in entries:
+        planned = journal.planned_tweets(entry.id)
+        posted = sum(1 for tweet in planned if tweet.tweet_id)
+        click.echo(
+            f"Entry {entry.id} ({entry.kind} from {entry.source}, {entry.status}): "
+            f"{posted}/{len(planned)} tweets posted"
+        )
+        if entry.error:
+            click.echo(f"  Last error: {entry.error}")
+
+    if list_only:
+        return
+
+    client = get_twitter_client()
+    failed = []
+    for entry in entries:
+        try:
+            post_journal_entry(client, entry.id)
+        except click.ClickException as e:
+            if isinstance(e.__cause__, TwitterRateLimitError):
+                raise
+            click.echo(f"Error: {e.message}")
+            failed.append(entry.id)
+    if failed:
+        raise click.ClickException(f"Journal entries {', '.join(map(str, failed))} failed to post")
+
+
+@cli.group()
+def batch():
+    """Bulk generation through the OpenAI Batch API"""
+    pass
+
+
+@batch.command(name="crypto")
+@click.option(
+    "--category",
+    "-c",
+    "categories",
+    type=click.Choice(['latest', 'visited', 'gainers', 'losers']),
+    multiple=True,
+    default=['latest', 'visited', 'gainers', 'losers'],
+    help="Categories to generate analysis threads for (repeatable)",
+)
+@click.option(
+    "--analysis",
+    "-a",
+    type=click.Choice(['market_overview', 'detailed_analysis']),
+    default='market_overview',
+    help="Type of analysis to generate",
+)
+@click.option("--count", "-n", default=1, show_default=True, help="Threads to generate per category")
+@click.option("--wait", "-w", is_flag=True, help="Wait for the batch and store the results")
+@tracks_usage
+def batch_crypto(categories, analysis, count, wait):
+    """Submit a batch of cryptocurrency analysis threads"""
+    from requests.exceptions import RequestException, ConnectionError, Timeout
+    from app.ai.TweetBatchGenerator import TweetBatchGenerator
+
+    crypto_service = get_crypto_service()
+    batch_generator = TweetBatchGenerator(get_generator())
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+
+    for category in categories:
+        try:
+            with span("fetch market data"):
+                coins = (
+                    crypto_service.get_search_trending_coins(limit=3)
+                    if category == 'latest'
+                    else crypto_service.get_market_trending_coins(category=category, limit=3)
+                )
+        except (RequestException, ConnectionError, Timeout) as e:
+            click.echo(f"API Error for {category}: {str(e)}")
+            continue
+
+        market_data = build_market_data(coins, category)
+        for i in range(count):
+            batch_generator.add_crypto_analysis(
+                name=f"{category}-{analysis}-{stamp}-{i}",
+                market_data=market_data,
+                category=category,
+                analysis_type=analysis,
+            )
+
+    if not batch_generator.requests:
+        click.echo("Error: No requests to submit")
+        return
+
+    batch_id = batch_generator.submit()
+    click.echo(f"Submitted batch {batch_id}")
+
+    if wait:
+        _collect_batch(batch_generator, batch_id)
+
+
+@batch.command(name="collect")
+@click.argument("batch_id")
+@click.option("--timeout", "-t", type=float, default=None, help="Maximum seconds to wait")
+@tracks_usage
+def batch_collect(batch_id, timeout):
+    """Wait for a submitted batch and store its results for later posting"""
+    from app.ai.TweetBatchGenerator import TweetBatchGenerator
+
+    batch_generator = TweetBatchGenerator(get_generator())
+    _collect_batch(batch_generator, batch_id, timeout)
+
+
+def _collect_batch(batch_generator, batch_id, timeout=None):
+    Session = get_session_factory()
+    stored = batch_generator.collect(batch_id, Session, timeout=timeout)
+    click.echo(f"Stored {stored} generated items from batch {batch_id}")
+    click.echo(format_usage_summary())
+
+
+@cli.group()
+def db():
+    """Maintenance of the tweets database"""
+    pass
+
+
+@db.command(name="compact")
+@click.option(
+    "--retain-days",
+    "-d",
+    default=30,
+    show_default=True,
+    help="Keep full tweets of conversations active in this many days",
+)
+@click.option("--archive-dir", default="archive", show_default=True, help="Directory of the archived tweets")
+@click.option(
+    "--compression",
+    type=click.Choice(["gzip", "zstd"]),
+    default="gzip",
+    show_default=True,
+    help="Compression of the archive, zstd needs the zstandard package",
+)
+@click.option("--incremental", is_flag=True, help="Only release free pages instead of a full VACUUM")
+@click.option("--dry-run", is_flag=True, help="Only count the conversations that would be compacted")
+def db_compact(retain_days, archive_dir, compression, incremental, dry_run):
+    """Archive inactive conversations and shrink the database"""
+    from app.db.Init_db import get_engine
+    from app.db.retention import compact_tweets, prune_timeline, vacuum
+
+    Session = get_session_factory()
+    with span("compact tweets"):
+        result = compact_tweets(
+            Session, retain_days=retain_days, archive_dir=archive_dir, compression=compression, dry_run=dry_run
+        )
+
+    if dry_run:
+        click.echo(
+            f"Would compact {result.tweets} tweets of {result.conversations} conversations "
+            f"inactive for {retain_days} days"
+        )
+        return
+    if result.archive:
+        click.echo(f"Archived {result.tweets} tweets of {result.conversations} conversations to {result.archive}")
+    else:
+        click.echo(f"No conversations inactive for {retain_days} days")
+    click.echo(f"Deleted {prune_timeline(Session, retain_days=retain_days)} stored timeline tweets")
+
+    with span("vacuum"):
+        freed = vacuum(get_engine(), incremental=incremental)
+    click.echo(f"Database shrank by {freed / 1024 / 1024:.1f} MB")
+
+
+DEFAULT_DAEMON_JOBS = ("reply:900", "post:3600", "trending-crypto:14400")
+
+# Rate limited Twitter endpoints each command calls, a job is deferred while any of them is exhausted
+JOB_ENDPOINTS = {
+    "post": (("GET", "/2/users/:id/timelines/reverse_chronological"), ("POST", "/2/tweets")),
+    "follow": (("GET", "/2/users/by"), ("POST", "/2/users/:id/following")),
+    "reply": (("GET", "/2/users/:id/mentions"), ("GET", "/2/tweets/search/recent"), ("POST", "/2/tweets")),
+    "trending-crypto": (("POST", "/2/tweets"),),
+    "post-generated": (("POST", "/2/tweets"),),
+    "resume": (("POST", "/2/tweets"),),
+}
+
+
+def parse_job_spec(spec, jitter, max_concurrency=1):
+    """Build a scheduler job from a COMMAND:SECONDS[:ARGS] specification"""
+    from app.scheduler.Scheduler import Job
+
+    parts = spec.split(":", 2)
+    if len(parts) < 2:
+        raise click.BadParameter(f"Invalid job {spec!r}, expected COMMAND:SECONDS[:ARGS]")
+
+    name, interval = parts[0].strip(), parts[1].strip()
+    args = shlex.split(parts[2]) if len(parts) == 3 else []
+    command = twitter.commands.get(name)
+    if command is None:
+        raise click.BadParameter(f"Unknown twitter command {name!r} in job {spec!r}")
+    try:
+        interval = float(interval)
+    except ValueError:
+        raise click.BadParameter(f"Invalid interval {interval!r} in job {spec!r}")
+
+    def run():
+        command.main(args, prog_name=f"nate twitter {name}", standalone_mode=False)
+
+    job_name = " ".join([name, *args])
+    return Job(
+        name=job_name,
+        func=run,
+        interval=interval,
+        jitter=jitter,
+        max_concurrency=max_concurrency,
+        endpoints=JOB_ENDPOINTS.get(name, ()),
+    )
+
+
+@cli.command(name="daemon")
+@click.option(
+    "--job",
+    "-j",
+    "job_specs",
+    multiple=True,
+    help='Twitter command to schedule as COMMAND:SECONDS[:ARGS], e.g. "trending-crypto:14400:--category gainers" (repeatable)',
+)
+@click.option("--jitter", default=60.0, show_default=True, help="Maximum random delay added to each run, in seconds")
+@click.option("--max-workers", default=2, show_default=True, help="Maximum number of jobs running at the same time")
+@click.option(
+    "--max-concurrency",
+    default=1,
+    show_default=True,
+    help="Maximum overlapping runs of the same job, runs beyond it are skipped",
+)
+@click.option(
+    "--stats-file",
+    type=click.Path(dir_okay=False),
+    help="Write job timing stats as JSON after every run",
+)
+@click.option("--metrics-port", type=int, help="Serve Prometheus metrics on this local port")
+def daemon(job_specs, jitter, max_workers, max_concurrency, stats_file, metrics_port):
+    """Run twitter commands on a schedule in a single long-running process"""
+    from app.core import metrics
+    from app.scheduler.Scheduler import Scheduler
+
+    if metrics_port:
+        metrics.serve(metrics_port)
+        click.echo(f"[daemon] Serving metrics on http://127.0.0.1:{metrics_port}/metrics")
+    metrics_file = click.get_current_context().find_root().params.get("metrics_file")
+
+    def on_finished(job):
+        stats = job.stats
+        click.echo(
+            f"[daemon] {job.name}: {stats.last_duration:.2f}s "
+            f"(avg {stats.avg_duration:.2f}s, runs {stats.runs}, failures {stats.failures}, skipped {stats.skipped})"
+        )
+        if stats_file:
+            Path(stats_file).write_text(json.dumps(scheduler.stats(), indent=2))
+        if metrics_file:
+            metrics.write_textfile(metrics_file)
+
+    rate_limits = get_twitter_client().rate_limits
+    scheduler = Scheduler(max_workers=max_workers, on_finished=on_finished, rate_limits=rate_limits)
+    for spec in job_specs or DEFAULT_DAEMON_JOBS:
+        job = scheduler.add_job(parse_job_spec(spec, jitter, max_concurrency))
+        click.echo(f"[daemon] Scheduled {job.name} every {job.interval:.0f}s")
+
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.request_stop())
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        click.echo("[daemon] Stopping, waiting for running jobs")
+        scheduler.stop(wait=True)
+        click.echo(json.dumps(scheduler.stats(), indent=2))
+        click.echo(json.dumps({"rate_limits": rate_limits.budgets()}, indent=2))
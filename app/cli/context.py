@@ -0,0 +1,86 @@
+"""Shared, lazily created clients for the CLI commands.
+
+Every factory returns the same instance for the lifetime of the process, so a
+long-running process (the scheduler daemon) keeps its API clients, HTTP
+connection pools and database engine warm between command runs.
+"""
+
+import threading
+from os import getenv
+
+_instances = {}
+_lock = threading.RLock()
+
+
+def _get_or_create(name, factory):
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+
+def reset():
+    """Drop all cached instances"""
+    with _lock:
+        _instances.clear()
+
+
+def get_twitter_client():
+    from app.twitter.TwitterClient import TwitterClient
+
+    return _get_or_create(
+        "twitter_client",
+        lambda: TwitterClient(
+            api_key=getenv("TWITTER_API_KEY"),
+            api_secret=getenv("TWITTER_API_SECRET"),
+            access_token=getenv("TWITTER_ACCESS_TOKEN"),
+            access_token_secret=getenv("TWITTER_ACCESS_TOKEN_SECRET"),
+            bearer_token=getenv("TWITTER_BEARER_TOKEN"),
+            base_url=getenv("TWITTER_API_BASE_URL"),
+        ),
+    )
+
+
+def get_generator():
+    from app.ai.TweetGeneratorOpenAI import TweetGeneratorOpenAI
+
+    return _get_or_create("generator", lambda: TweetGeneratorOpenAI(api_key=getenv("OPENAI_API_KEY")))
+
+
+def get_tone_agent():
+    from app.ai.agents.ToneAgent import ToneAgent
+
+    return _get_or_create("tone_agent", lambda: ToneAgent(api_key=getenv("OPENAI_API_KEY")))
+
+
+def get_format_agent():
+    from app.ai.agents.CryptoMarketAnalysisFormatAgent import CryptoMarketAnalysisFormatAgent
+
+    return _get_or_create(
+        "format_agent",
+        lambda: CryptoMarketAnalysisFormatAgent(api_key=getenv("OPENAI_API_KEY")),
+    )
+
+
+def get_crypto_service():
+    from app.services.CryptoService import CryptoService
+
+    return _get_or_create("crypto_service", CryptoService)
+
+
+def get_session_factory():
+    """Session factory of the tweets database"""
+    from app.db.Init_db import init_db
+    # Register every table before init_db creates them
+    import app.db.models.Tweet_model  # noqa: F401
+    import app.db.models.GeneratedContent_model  # noqa: F401
+    import app.db.models.PostingJournal_model  # noqa: F401
+    import app.db.models.ConversationSummary_model  # noqa: F401
+    import app.db.models.TimelineTweet_model  # noqa: F401
+    import app.db.models.ReplyQueue_model  # noqa: F401
+
+    return _get_or_create("session_factory", lambda: init_db()[1])
@@ -18,6 +18,13 @@ class ServerError(APIError):
     def __init__(self, message: str = "Server error"):
         super().__init__(message, status_code=500)
 
+class TwitterRateLimitError(APIError):
+    """Raised when a Twitter endpoint has no requests left in its rate limit window"""
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit of {endpoint} exhausted, retry in {retry_after:.0f}s", status_code=429)
+
 class CryptoServiceError(Exception):
     """Base exception for crypto service errors."""
     pass
@@ -49,4 +56,8 @@ class TweetGenerationError(Exception):
 
 class TweetFormatError(TweetGenerationError):
     """Raised when generated tweet doesn't match required format."""
-    pass 
\ No newline at end of file
+    pass 
+
+class BatchGenerationError(TweetGenerationError):
+    """Raised when a batch generation job fails or expires."""
+    pass
@@ -0,0 +1,290 @@
+"""
+Prometheus-style metrics of the bot.
+
+Counters and histograms live in the process-wide `registry` and are rendered
+in the Prometheus text exposition format, either served over HTTP by
+`serve()` or written for the node_exporter textfile collector by
+`write_textfile()`. Updating a metric is a dict lookup and an addition under a
+lock, so the instrumentation stays on in every run.
+"""
+
+import os
+import tempfile
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence, Tuple
+
+# Default latency buckets in seconds, sized for HTTP and LLM calls
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. requests or tokens"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. a remaining request budget"""
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values, e.g. request latency"""
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple, Tuple[list, list]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], [0.0]))
+        return sum(counts)
+
+    def _samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_number(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """A named collection of metrics"""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
+
+# CoinGecko
+coingecko_requests = registry.counter(
+    "nate_coingecko_requests_total", "CoinGecko API requests", ("endpoint", "status")
+)
+coingecko_request_seconds = registry.histogram(
+    "nate_coingecko_request_duration_seconds", "CoinGecko API request latency", ("endpoint",)
+)
+rate_limit_sleep_seconds = registry.counter(
+    "nate_rate_limit_sleep_seconds_total", "Seconds spent sleeping on client-side rate limits", ("service",)
+)
+
+# OpenAI
+openai_requests = registry.counter(
+    "nate_openai_requests_total", "OpenAI completion calls", ("agent", "status")
+)
+openai_request_seconds = registry.histogram(
+    "nate_openai_request_duration_seconds", "OpenAI completion latency", ("agent",)
+)
+openai_tokens = registry.counter(
+    "nate_openai_tokens_total", "OpenAI tokens by type (prompt, completion, cached)", ("agent", "type")
+)
+
+# Twitter
+twitter_requests = registry.counter(
+    "nate_twitter_requests_total", "Twitter API requests", ("method", "route", "status")
+)
+twitter_request_seconds = registry.histogram(
+    "nate_twitter_request_duration_seconds", "Twitter API request latency", ("method", "route")
+)
+twitter_rate_limit_remaining = registry.gauge(
+    "nate_twitter_rate_limit_remaining", "Requests left in the current rate limit window", ("method", "route")
+)
+conversation_fetches = registry.counter(
+    "nate_conversation_fetches_total", "Conversation fetches by result (fresh, incremental, full)", ("result",)
+)
+tweets_posted = registry.counter("nate_tweets_posted_total", "Tweets posted")
+tweets_failed = registry.counter("nate_tweets_failed_total", "Tweets that failed to post")
+spam_mentions = registry.counter("nate_spam_mentions_filtered_total", "Mentions dropped by the spam filter")
+
+# Database
+db_commit_seconds = registry.histogram(
+    "nate_db_commit_duration_seconds",
+    "Latency of SQLAlchemy session commits",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def instrument_sessions(Session) -> None:
+    """Observe the commit latency of every session made by a sessionmaker"""
+    import time
+    from sqlalchemy import event
+
+    def before_commit(session):
+        session.info["commit_started"] = time.perf_counter()
+
+    def after_commit(session):
+        started = session.info.pop("commit_started", None)
+        if started is not None:
+            db_commit_seconds.observe(time.perf_counter() - started)
+
+    event.listen(Session, "before_commit", before_commit)
+    event.listen(Session, "after_commit", after_commit)
+
+
+def write_textfile(path: str, metrics_registry: Registry = registry) -> None:
+    """Atomically write the metrics for the node_exporter textfile collector"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".nate-metrics-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(metrics_registry.render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def serve(port: int, host: str = "127.0.0.1", metrics_registry: Registry = registry):
+    """Serve the metrics at http://host:port/metrics from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics_registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="nate-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,281 @@
+"""
+Lightweight tracing of where a command spends its time.
+
+Spans are nested through a context variable and kept in memory by the
+process-wide `tracer`. While tracing is disabled, `span()` returns a shared
+no-op context manager, so instrumented code only pays for one attribute check.
+
+    from app.core.tracing import span
+
+    with span("coingecko GET /search/trending", kind="http") as s:
+        response = requests.get(...)
+        s.set(status_code=response.status_code)
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Span kinds used by the instrumented code
+HTTP = "http"
+LLM = "llm"
+DB = "db"
+RATE_LIMIT = "rate_limit"
+INTERNAL = "internal"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """A timed operation, possibly nested in a parent span"""
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = 0.0          # wall clock, seconds since the epoch
+    duration: float = 0.0       # seconds
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        """Add attributes, e.g. status codes or token counts"""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned by `span()` while tracing is disabled"""
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """Context manager that times a span and makes it the current one"""
+
+    __slots__ = ("tracer", "span", "_started", "_token")
+
+    def __init__(self, tracer, span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        self.span.start = time.time()
+        self._started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.duration = time.perf_counter() - self._started
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer.finish(self.span)
+        return False
+
+
+class Tracer:
+    """Collects finished spans of the current process"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def _new_span(self, name: str, kind: str, attributes: dict) -> Span:
+        parent = _current_span.get()
+        return Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+
+    def span(self, name: str, kind: str = INTERNAL, **attributes):
+        """Time the enclosed block as a child of the current span"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _ActiveSpan(self, self._new_span(name, kind, attributes))
+
+    def record(self, name: str, kind: str, start: float, duration: float, **attributes) -> None:
+        """Add a span measured elsewhere, e.g. by a database event hook"""
+        if not self.enabled:
+            return
+        span = self._new_span(name, kind, attributes)
+        span.start = start
+        span.duration = duration
+        self.finish(span)
+
+    def finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    # Export
+
+    def export_jsonl(self, path: str) -> None:
+        """Write one JSON object per span"""
+        with open(path, "w") as f:
+            for span in list(self.spans):
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def export_otlp(self, path: str, service_name: str = "nate") -> None:
+        """Write the spans in the OpenTelemetry OTLP/JSON trace format"""
+        with open(path, "w") as f:
+            json.dump(to_otlp(list(self.spans), service_name), f)
+
+    def summary(self) -> List[dict]:
+        """Aggregate spans by name, slowest total first"""
+        stages = defaultdict(lambda: {"calls": 0, "total": 0.0, "max": 0.0, "errors": 0})
+        for span in list(self.spans):
+            stage = stages[(span.kind, span.name)]
+            stage["calls"] += 1
+            stage["total"] += span.duration
+            stage["max"] = max(stage["max"], span.duration)
+            stage["errors"] += span.error is not None
+            for key in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                if key in span.attributes:
+                    stage[key] = stage.get(key, 0) + (span.attributes[key] or 0)
+        return sorted(
+            ({"kind": kind, "name": name, **values} for (kind, name), values in stages.items()),
+            key=lambda stage: stage["total"],
+            reverse=True,
+        )
+
+    def format_report(self) -> str:
+        """Format the per-stage breakdown as a table"""
+        roots = [span for span in self.spans if span.parent_id is None]
+        wall = sum(span.duration for span in roots) or 1.0
+        lines = [
+            f"Profile: {len(self.spans)} spans, {sum(span.duration for span in roots):.2f}s",
+            f"{'kind':<11}{'stage':<48}{'calls':>6}{'total':>10}{'max':>10}{'share':>7}",
+        ]
+        for stage in self.summary():
+            line = (
+                f"{stage['kind']:<11}{stage['name'][:47]:<48}{stage['calls']:>6}"
+                f"{stage['total']:>9.2f}s{stage['max']:>9.2f}s{stage['total'] / wall:>7.0%}"
+            )
+            if "prompt_tokens" in stage:
+                line += (
+                    f"  {stage['prompt_tokens']} prompt ({stage.get('cached_tokens', 0)} cached)"
+                    f" / {stage.get('completion_tokens', 0)} completion tokens"
+                )
+            if stage["errors"]:
+                line += f"  {stage['errors']} failed"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+_OTLP_KINDS = {HTTP: 3, LLM: 3, DB: 3}  # SPAN_KIND_CLIENT, everything else is INTERNAL
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str = "nate") -> dict:
+    """Convert spans to an OTLP/JSON ExportTraceServiceRequest"""
+    otlp_spans = []
+    for span in spans:
+        start = int(span.start * 1e9)
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": _OTLP_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(start + int(span.duration * 1e9)),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in {"nate.kind": span.kind, **span.attributes}.items()
+                if value is not None
+            ],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        otlp_spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "nate"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+# Process-wide tracer, enabled by `nate --profile` / `--trace-file` or NATE_TRACE=1
+tracer = Tracer(enabled=os.getenv("NATE_TRACE") == "1")
+
+
+def span(name: str, kind: str = INTERNAL, **attributes):
+    """Time the enclosed block with the process-wide tracer"""
+    if not tracer.enabled:
+        return _NOOP_SPAN
+    return _ActiveSpan(tracer, tracer._new_span(name, kind, attributes))
+
+
+def instrument_engine(engine) -> None:
+    """Record every transaction of a SQLAlchemy engine as a db span"""
+    from sqlalchemy import event
+
+    def begin(conn):
+        conn.info["trace_started"] = (time.time(), time.perf_counter())
+
+    def end(outcome):
+        def listener(conn):
+            started = conn.info.pop("trace_started", None)
+            if started is not None:
+                tracer.record(
+                    "db transaction", DB, started[0], time.perf_counter() - started[1],
+                    outcome=outcome, database=engine.url.database,
+                )
+        return listener
+
+    event.listen(engine, "begin", begin)
+    event.listen(engine, "commit", end("commit"))
+    event.listen(engine, "rollback", end("rollback"))
@@ -1,13 +1,81 @@
-from sqlalchemy import create_engine
+import os
+import sqlite3
+import threading
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from app.core.metrics import instrument_sessions
+from app.core.tracing import instrument_engine
 
 Base = declarative_base()
 
+# The ORM tables and the key-value Storage share one database file
+DEFAULT_DB_PATH = "tweets.db"
 
-def init_db(db_path="tweets.db"):
+# Applied to every connection. WAL lets readers run while a write is in
+# progress, and with WAL synchronous=NORMAL only risks the last transactions
+# on power loss, never corruption.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,           # milliseconds to wait for a lock before failing
+    "cache_size": -64000,           # negative values are KiB, 64MB page cache
+    "mmap_size": 268435456,         # 256MB of the file memory-mapped for reads
+    "temp_store": "MEMORY",
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def apply_pragmas(connection) -> None:
+    """Apply SQLITE_PRAGMAS to a DB-API connection"""
+    cursor = connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def connect(db_path=DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """Open a tuned sqlite3 connection that may be shared between threads"""
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    apply_pragmas(connection)
+    return connection
+
+
+def get_engine(db_path=DEFAULT_DB_PATH):
+    """Return the engine of a database file, created once per process"""
+    key = os.path.abspath(db_path)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_engine(f"sqlite:///{db_path}")
+            event.listen(engine, "connect", lambda connection, _: apply_pragmas(connection))
+            instrument_engine(engine)
+            _engines[key] = engine
+        return engine
+
+
+def add_missing_columns(engine) -> None:
+    """
+    Add the nullable columns of the models that an existing database does not
+    have yet. create_all only creates missing tables, there are no migrations.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(engine.dialect)
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+
+
+def init_db(db_path=DEFAULT_DB_PATH):
     """Initialize the database and return engine and session maker"""
-    engine = create_engine(f"sqlite:///{db_path}")
+    engine = get_engine(db_path)
     Base.metadata.create_all(engine)
+    add_missing_columns(engine)
     Session = sessionmaker(bind=engine)
+    instrument_sessions(Session)
     return engine, Session
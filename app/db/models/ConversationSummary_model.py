@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.db.Init_db import Base
+
+
+class ConversationSummary(Base):
+    """What is kept of a conversation once its tweets are compacted out of the tweets table"""
+    __tablename__ = "conversation_summaries"
+
+    conversation_id = Column(String, primary_key=True)
+    tweet_count = Column(Integer, default=0)
+    participants = Column(Text)  # comma separated usernames
+    first_tweet_at = Column(DateTime, nullable=True)
+    last_tweet_at = Column(DateTime, nullable=True)
+    last_tweet_id = Column(String, nullable=True)
+    last_text = Column(Text, nullable=True)
+    archive = Column(String, nullable=True)  # file the full rows were archived to
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime, timezone
+from app.db.Init_db import Base
+
+
+class GeneratedContent(Base):
+    """Generated tweets and threads waiting to be posted"""
+    __tablename__ = "generated_content"
+
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(String, nullable=True, index=True)
+    custom_id = Column(String, unique=True)
+    kind = Column(String)
+    content = Column(Text)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    posted_at = Column(DateTime, nullable=True, index=True)
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime, timezone
+from app.db.Init_db import Base
+
+
+class JournalEntry(Base):
+    """Generated content recorded before it is posted"""
+    __tablename__ = "journal_entries"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String)  # tweet, thread or reply
+    source = Column(String, nullable=True)
+    content = Column(Text)
+    reply_to_tweet_id = Column(String, nullable=True)
+    conversation_id = Column(String, nullable=True)
+    status = Column(String, default="pending", index=True)  # pending, posting, done, failed
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class JournalTweet(Base):
+    """A planned tweet of a journal entry and, once posted, its tweet ID"""
+    __tablename__ = "journal_tweets"
+    __table_args__ = (UniqueConstraint("entry_id", "position"),)
+
+    id = Column(Integer, primary_key=True)
+    entry_id = Column(Integer, ForeignKey("journal_entries.id"), index=True)
+    position = Column(Integer)
+    text = Column(Text)
+    quote_tweet_id = Column(String, nullable=True)
+    tweet_id = Column(String, nullable=True)
+    attempted_at = Column(DateTime, nullable=True)
+    posted_at = Column(DateTime, nullable=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime
+from datetime import datetime, timezone
+from app.db.Init_db import Base
+
+
+class ReplyQueueItem(Base):
+    """A conversation waiting for our reply"""
+    __tablename__ = "reply_queue"
+
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(String, unique=True)
+    reply_to_tweet_id = Column(String)
+    author_id = Column(String, nullable=True)
+    username = Column(String, nullable=True)
+    score = Column(Float, default=0.0)  # priority without the recency term
+    status = Column(String, default="pending", index=True)  # pending, done, expired, failed
+    attempts = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    mentioned_at = Column(DateTime)
+    deadline = Column(DateTime, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
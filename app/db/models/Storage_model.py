@@ -1,57 +1,199 @@
 from datetime import datetime
-import sqlite3
+import json
+import os
+import threading
+import time
+from app.db.Init_db import DEFAULT_DB_PATH, connect
+
+# Marks keys known to be absent from the database in the cache
+_MISSING = object()
+
+
+def _encode(value):
+    """Return the (type, stored value) of a Python value"""
+    if isinstance(value, str):
+        return "str", value
+    if isinstance(value, bytes):
+        return "bytes", value
+    if isinstance(value, datetime):
+        return "datetime", value.isoformat()
+    return "json", json.dumps(value)
+
+
+def _decode(value_type, value):
+    if value_type == "json":
+        return json.loads(value)
+    if value_type == "datetime":
+        return datetime.fromisoformat(value)
+    if value_type == "bytes":
+        return bytes(value)
+    # "str", and rows written before values were typed
+    return value
 
 
 class Storage:
-    def __init__(self, db_path="storage.db"):
+    """
+    Key-value storage in a table of the given database.
+
+    Values keep their type: strings and bytes are stored as they are, datetimes
+    as ISO strings and anything else as JSON. Reads are served from an
+    in-process cache that every write goes through, so repeated reads of the
+    same key skip the database. The cache holds values encoded as they are
+    stored and decodes them on every read, so callers get their own copy and
+    a value reads back the same from the cache as from the database. The
+    cache assumes this process is the only writer, call `invalidate()` after
+    another process changed the table.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, legacy_path=None):
+        """
+        Initialize the storage
+
+        Args:
+            db_path (str): Database file, shared with the ORM tables by default
+            legacy_path (str, optional): Former standalone storage.db whose values are copied over once
+        """
         self.db_path = db_path
+        self._lock = threading.RLock()
+        # key -> (type, stored value, expires_at or None), or _MISSING
+        self._cache = {}
+        # One persistent connection instead of a new one per operation
+        self._conn = connect(db_path)
         self._init_db()
+        if legacy_path:
+            self._migrate(legacy_path)
 
     def _init_db(self):
         """Initialize the storage database"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-
-        # Create table for key-value storage
-        c.execute(
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS storage (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
             """
-            CREATE TABLE IF NOT EXISTS storage (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """
-        )
+            # Columns added after the first release of the table
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(storage)")}
+            if "type" not in columns:
+                self._conn.execute("ALTER TABLE storage ADD COLUMN type TEXT")
+            if "expires_at" not in columns:
+                self._conn.execute("ALTER TABLE storage ADD COLUMN expires_at REAL")
+            self._conn.commit()
+
+    def _migrate(self, legacy_path):
+        """Copy the values of a standalone storage database, then rename it"""
+        if not os.path.exists(legacy_path) or os.path.abspath(legacy_path) == os.path.abspath(self.db_path):
+            return
+        with self._lock:
+            self._conn.execute("ATTACH DATABASE ? AS legacy", (legacy_path,))
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO storage (key, value, updated_at) "
+                    "SELECT key, value, updated_at FROM legacy.storage"
+                )
+                self._conn.commit()
+            finally:
+                self._conn.execute("DETACH DATABASE legacy")
+            self._cache.clear()
+        os.replace(legacy_path, legacy_path + ".migrated")
 
-        conn.commit()
-        conn.close()
+    def _load(self, keys):
+        """Read keys missing from the cache into it"""
+        missing = [key for key in keys if key not in self._cache]
+        # Stay below SQLite's limit of host parameters per statement
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT key, value, type, expires_at FROM storage WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for key in chunk:
+                self._cache[key] = _MISSING
+            for key, value, value_type, expires_at in rows:
+                self._cache[key] = (value_type, value, expires_at)
+
+    def _cached(self, key, now):
+        entry = self._cache.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        value_type, value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            return _MISSING
+        return _decode(value_type, value)
 
     def get(self, key, default=None):
-        """Get a value from storage"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("SELECT value FROM storage WHERE key = ?", (key,))
-        result = c.fetchone()
-        conn.close()
-        return result[0] if result else default
-
-    def set(self, key, value):
-        """Set a value in storage"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute(
-            """
-            INSERT OR REPLACE INTO storage (key, value, updated_at) 
-            VALUES (?, ?, ?)
-        """,
-            (key, str(value), datetime.now()),
-        )
-        conn.commit()
-        conn.close()
+        """Get a value from storage, `default` if it is missing or expired"""
+        with self._lock:
+            if key not in self._cache:
+                self._load([key])
+            value = self._cached(key, time.time())
+        return default if value is _MISSING else value
+
+    def get_many(self, keys) -> dict:
+        """Get several values with at most one query, missing and expired keys are left out"""
+        with self._lock:
+            self._load(list(keys))
+            now = time.time()
+            values = {key: self._cached(key, now) for key in keys}
+        return {key: value for key, value in values.items() if value is not _MISSING}
+
+    def set(self, key, value, ttl=None):
+        """
+        Set a value in storage
+
+        Args:
+            key (str): The key
+            value: A str, bytes, datetime or JSON serializable value
+            ttl (float, optional): Seconds after which the value expires
+        """
+        self.set_many({key: value}, ttl=ttl)
+
+    def set_many(self, values: dict, ttl=None):
+        """Set several values in a single transaction"""
+        expires_at = time.time() + ttl if ttl is not None else None
+        updated_at = datetime.now()
+        encoded = {key: _encode(value) for key, value in values.items()}
+        rows = [(key, value, value_type, updated_at, expires_at) for key, (value_type, value) in encoded.items()]
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO storage (key, value, type, updated_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+            self._conn.commit()
+            for key, (value_type, value) in encoded.items():
+                self._cache[key] = (value_type, value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM storage WHERE key = ?", (key,))
+            self._conn.commit()
+            self._cache[key] = _MISSING
 
     def get_timestamp(self, key, default=None):
         """Get a timestamp value from storage"""
         value = self.get(key)
-        if value:
-            return datetime.fromisoformat(value)
-        return default
+        if isinstance(value, str):
+            # Written as an ISO string before values were typed
+            value = datetime.fromisoformat(value)
+            with self._lock:
+                if self._cache.get(key, _MISSING) is not _MISSING:
+                    self._cache[key] = (*_encode(value), self._cache[key][2])
+        return value if value is not None else default
+
+    def invalidate(self, key=None):
+        """Drop one key, or the whole cache, so the next read goes to the database"""
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
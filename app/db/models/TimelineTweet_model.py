@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime, timezone
+from app.db.Init_db import Base
+
+
+class TimelineTweet(Base):
+    """A tweet of the home timeline, stored once however often it is fetched"""
+    __tablename__ = "timeline_tweets"
+
+    id = Column(Integer, primary_key=True)
+    tweet_id = Column(String, unique=True)
+    text = Column(String)
+    author_id = Column(String)
+    username = Column(String)
+    conversation_id = Column(String, nullable=True)
+    in_reply_to_user_id = Column(String, nullable=True)
+    retweeted_id = Column(String, nullable=True)
+    like_count = Column(Integer, nullable=True)
+    retweet_count = Column(Integer, nullable=True)
+    reply_count = Column(Integer, nullable=True)
+    quote_count = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=True, index=True)
+    fetched_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
@@ -13,5 +13,6 @@ class Tweet(Base):
     conversation_id = Column(String)
     username = Column(String)
     in_reply_to_user_id = Column(String, nullable=True)
+    in_reply_to_tweet_id = Column(String, nullable=True)
     fetched_for_user = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.now(timezone.utc))
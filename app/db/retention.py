@@ -0,0 +1,253 @@
+"""
+Retention of the tweets table.
+
+Conversations with no tweet saved in the last `retain_days` days are written
+to a compressed JSON lines archive, folded into one ConversationSummary row
+each and deleted from the tweets table, so the queries that load the stored
+conversations only ever scan recent ones. Archives are gzip compressed, or
+zstd compressed when the optional `zstandard` package is installed.
+"""
+
+import gzip
+import io
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import func
+from app.db.models.ConversationSummary_model import ConversationSummary
+from app.db.models.TimelineTweet_model import TimelineTweet
+from app.db.models.Tweet_model import Tweet
+
+DEFAULT_RETAIN_DAYS = 30
+ARCHIVE_EXTENSIONS = {"gzip": "gz", "zstd": "zst"}
+
+# Conversation IDs per IN (...) query, below SQLite's host parameter limit
+_CHUNK = 500
+
+
+@dataclass
+class CompactionResult:
+    conversations: int
+    tweets: int
+    archive: Optional[str] = None
+
+
+def _utcnow() -> datetime:
+    # Tweets are stored as naive UTC datetimes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _chunks(items, size=_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _open_archive(path: str, compression: str):
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd archives need the zstandard package, pip install zstandard")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, "wb")), encoding="utf-8")
+    return gzip.open(path, "wt", encoding="utf-8")
+
+
+def open_archive(path: str):
+    """Iterate over the tweets of an archive written by `compact_tweets`"""
+    if path.endswith(".zst"):
+        import zstandard
+
+        stream = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8")
+    else:
+        stream = gzip.open(path, "rt", encoding="utf-8")
+    with stream:
+        for line in stream:
+            yield json.loads(line)
+
+
+def stale_conversation_ids(session, cutoff: datetime) -> list:
+    """Conversations whose most recent stored tweet is older than `cutoff`"""
+    rows = (
+        session.query(Tweet.conversation_id)
+        .filter(Tweet.conversation_id.isnot(None))
+        .group_by(Tweet.conversation_id)
+        .having(func.max(Tweet.created_at) < cutoff)
+    )
+    return [row[0] for row in rows]
+
+
+def _tweet_row(tweet: Tweet) -> dict:
+    return {
+        "tweet_id": tweet.tweet_id,
+        "text": tweet.text,
+        "author_id": tweet.author_id,
+        "conversation_id": tweet.conversation_id,
+        "username": tweet.username,
+        "in_reply_to_user_id": tweet.in_reply_to_user_id,
+        "fetched_for_user": tweet.fetched_for_user,
+        "created_at": tweet.created_at.isoformat() if tweet.created_at else None,
+    }
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _merge(summary: ConversationSummary, compacted: dict, archive: str) -> None:
+    """Fold the compacted tweets of a conversation into its summary row"""
+    participants = set(filter(None, (summary.participants or "").split(",")))
+    participants.update(compacted["participants"])
+    summary.participants = ",".join(sorted(participants))
+    summary.tweet_count = (summary.tweet_count or 0) + compacted["count"]
+
+    first = _parse_time(compacted["first"]["created_at"])
+    if first and (summary.first_tweet_at is None or first < summary.first_tweet_at):
+        summary.first_tweet_at = first
+    last = _parse_time(compacted["last"]["created_at"])
+    if summary.last_tweet_at is None or (last and last >= summary.last_tweet_at):
+        summary.last_tweet_at = last
+        summary.last_tweet_id = compacted["last"]["tweet_id"]
+        summary.last_text = compacted["last"]["text"]
+    summary.archive = archive
+
+
+def compact_tweets(
+    Session,
+    retain_days: int = DEFAULT_RETAIN_DAYS,
+    archive_dir: str = "archive",
+    compression: str = "gzip",
+    now: datetime = None,
+    dry_run: bool = False,
+) -> CompactionResult:
+    """
+    Archive and summarize the conversations inactive for `retain_days` days
+
+    The archive is written and closed before any row is deleted, and the
+    summaries and deletes are committed in a single transaction, so an
+    interrupted run never loses tweets.
+
+    Args:
+        Session: Session factory of the tweets database
+        retain_days (int): Conversations with a tweet this recent keep their full rows
+        archive_dir (str): Directory of the archive files
+        compression (str): 'gzip' or 'zstd'
+        now (datetime, optional): Naive UTC time the retention is measured from
+        dry_run (bool): Only count what would be compacted
+
+    Returns:
+        CompactionResult: Compacted conversations and tweets, and the archive file
+    """
+    if compression not in ARCHIVE_EXTENSIONS:
+        raise ValueError(f"Unknown archive compression: {compression}")
+    now = now or _utcnow()
+    cutoff = now - timedelta(days=retain_days)
+
+    session = Session()
+    try:
+        conversation_ids = stale_conversation_ids(session, cutoff)
+        if not conversation_ids or dry_run:
+            tweets = 0
+            for chunk in _chunks(conversation_ids):
+                tweets += session.query(Tweet).filter(Tweet.conversation_id.in_(chunk)).count()
+            return CompactionResult(len(conversation_ids), tweets)
+
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(
+            archive_dir, f"tweets-{now:%Y%m%dT%H%M%S}.jsonl.{ARCHIVE_EXTENSIONS[compression]}"
+        )
+        # conversation ID -> tweet count, usernames, first and last tweet
+        compacted = {}
+        with _open_archive(path, compression) as archive:
+            for chunk in _chunks(conversation_ids):
+                tweets = (
+                    session.query(Tweet)
+                    .filter(Tweet.conversation_id.in_(chunk))
+                    .order_by(Tweet.conversation_id, Tweet.created_at, Tweet.id)
+                )
+                for tweet in tweets:
+                    row = _tweet_row(tweet)
+                    archive.write(json.dumps(row) + "\n")
+                    conversation = compacted.setdefault(
+                        row["conversation_id"], {"count": 0, "participants": set(), "first": row}
+                    )
+                    conversation["count"] += 1
+                    if row["username"]:
+                        conversation["participants"].add(row["username"])
+                    conversation["last"] = row
+                # The rows are archived, keep the identity map from growing
+                session.expunge_all()
+
+        tweets = 0
+        for chunk in _chunks(conversation_ids):
+            summaries = {
+                summary.conversation_id: summary
+                for summary in session.query(ConversationSummary).filter(
+                    ConversationSummary.conversation_id.in_(chunk)
+                )
+            }
+            for conversation_id in chunk:
+                conversation = compacted.get(conversation_id)
+                if conversation is None:
+                    continue
+                summary = summaries.get(conversation_id)
+                if summary is None:
+                    summary = ConversationSummary(conversation_id=conversation_id)
+                    session.add(summary)
+                _merge(summary, conversation, path)
+                tweets += conversation["count"]
+            session.query(Tweet).filter(Tweet.conversation_id.in_(chunk)).delete(synchronize_session=False)
+        session.commit()
+        return CompactionResult(len(conversation_ids), tweets, path)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def prune_timeline(Session, retain_days: int = DEFAULT_RETAIN_DAYS, now: datetime = None) -> int:
+    """Delete the stored home timeline fetched more than `retain_days` days ago, returns the deleted rows"""
+    cutoff = (now or _utcnow()) - timedelta(days=retain_days)
+    session = Session()
+    try:
+        deleted = session.query(TimelineTweet).filter(TimelineTweet.fetched_at < cutoff).delete(synchronize_session=False)
+        session.commit()
+        return deleted
+    finally:
+        session.close()
+
+
+def _database_bytes(connection) -> int:
+    page_count = connection.exec_driver_sql("PRAGMA page_count").scalar()
+    page_size = connection.exec_driver_sql("PRAGMA page_size").scalar()
+    return page_count * page_size
+
+
+def vacuum(engine, incremental: bool = False) -> int:
+    """
+    Return the free pages of the database file to the filesystem
+
+    A full VACUUM rebuilds the file. With `incremental`, the database is
+    switched to auto_vacuum=INCREMENTAL once (which itself takes a full
+    VACUUM) and afterwards only the free pages are released, which is much
+    cheaper on a large file.
+
+    Returns:
+        int: Bytes the database file shrank by
+    """
+    # VACUUM cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        before = _database_bytes(connection)
+        if not incremental:
+            connection.exec_driver_sql("VACUUM")
+        elif connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:  # 2 is INCREMENTAL
+            connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            connection.exec_driver_sql("VACUUM")
+        else:
+            # sqlite3 steps a statement once per execute() and each step frees a
+            # single page, executescript() runs it to completion
+            connection.connection.driver_connection.executescript("PRAGMA incremental_vacuum")
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return max(0, before - _database_bytes(connection))
@@ -0,0 +1,200 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobStats:
+    """Timing and outcome counters of a scheduled job"""
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    deferred: int = 0
+    running: int = 0
+    last_started: Optional[float] = None
+    last_duration: Optional[float] = None
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    last_error: Optional[str] = None
+
+    @property
+    def avg_duration(self) -> float:
+        return self.total_duration / self.runs if self.runs else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "deferred": self.deferred,
+            "running": self.running,
+            "last_started": self.last_started,
+            "last_duration": self.last_duration,
+            "avg_duration": self.avg_duration,
+            "max_duration": self.max_duration,
+            "last_error": self.last_error,
+        }
+
+
+@dataclass
+class Job:
+    """
+    A function run every `interval` seconds.
+
+    Attributes:
+        name: Unique job name
+        func: Function called without arguments
+        interval: Seconds between the starts of two runs
+        jitter: Maximum random delay in seconds added to each run
+        max_concurrency: Maximum number of overlapping runs, 1 prevents overlap
+        run_at_start: If True, the first run is due immediately
+        endpoints: (method, route) of the rate limited API endpoints the job calls
+    """
+    name: str
+    func: Callable[[], object]
+    interval: float
+    jitter: float = 0.0
+    max_concurrency: int = 1
+    run_at_start: bool = True
+    endpoints: Sequence[Tuple[str, str]] = ()
+    next_run: float = 0.0
+    stats: JobStats = field(default_factory=JobStats)
+
+    def __post_init__(self):
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    def schedule_next(self, now: float) -> None:
+        self.next_run = now + self.interval + random.uniform(0, self.jitter)
+
+
+class Scheduler:
+    """
+    Run jobs periodically in a single long-lived process.
+
+    Jobs run on a shared thread pool. A job whose previous run is still going
+    (beyond its `max_concurrency`) is skipped for that tick instead of piling
+    up, and every run is timed in the job's `JobStats`. A job whose endpoints
+    have no requests left is deferred until their rate limit window resets,
+    while jobs on other endpoints keep running.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        tick: float = 1.0,
+        on_finished: Callable[[Job], None] = None,
+        rate_limits=None,
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_workers (int): Maximum number of jobs running at the same time
+            tick (float): Seconds between checks for due jobs
+            on_finished (Callable, optional): Called with the job after each run
+            rate_limits (RateLimits, optional): Endpoint budgets used to defer jobs
+        """
+        self.jobs = {}
+        self.tick = tick
+        self.on_finished = on_finished
+        self.rate_limits = rate_limits
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nate-job")
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_job(self, job: Job) -> Job:
+        if job.name in self.jobs:
+            raise ValueError(f"Job {job.name} already exists")
+        now = time.monotonic()
+        if job.run_at_start:
+            job.next_run = now + random.uniform(0, job.jitter)
+        else:
+            job.schedule_next(now)
+        self.jobs[job.name] = job
+        return job
+
+    def stats(self) -> dict:
+        """Return the stats of every job keyed by job name"""
+        with self._lock:
+            return {name: job.stats.to_dict() for name, job in self.jobs.items()}
+
+    def run_pending(self, now: float = None) -> list[str]:
+        """
+        Start every job that is due
+
+        Returns:
+            list[str]: Names of the jobs started
+        """
+        now = time.monotonic() if now is None else now
+        started = []
+        for job in self.jobs.values():
+            if job.next_run > now:
+                continue
+
+            if self.rate_limits is not None and job.endpoints:
+                retry_after = self.rate_limits.retry_after(job.endpoints)
+                if retry_after > 0:
+                    job.next_run = now + retry_after
+                    with self._lock:
+                        job.stats.deferred += 1
+                    logger.warning(f"Deferring {job.name} by {retry_after:.0f}s: rate limit exhausted")
+                    continue
+            job.schedule_next(now)
+
+            if not job._slots.acquire(blocking=False):
+                with self._lock:
+                    job.stats.skipped += 1
+                logger.warning(f"Skipping {job.name}: previous run still in progress")
+                continue
+
+            self.executor.submit(self._run, job)
+            started.append(job.name)
+        return started
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            job.stats.running += 1
+            job.stats.last_started = time.time()
+        started = time.monotonic()
+        error = None
+        try:
+            job.func()
+        except BaseException as e:
+            error = e
+            logger.exception(f"Job {job.name} failed")
+        finally:
+            duration = time.monotonic() - started
+            with self._lock:
+                stats = job.stats
+                stats.running -= 1
+                stats.runs += 1
+                stats.last_duration = duration
+                stats.total_duration += duration
+                stats.max_duration = max(stats.max_duration, duration)
+                if error is not None:
+                    stats.failures += 1
+                    stats.last_error = str(error)
+            job._slots.release()
+            logger.info(f"Job {job.name} finished in {duration:.2f}s")
+            if self.on_finished:
+                self.on_finished(job)
+
+    def run_forever(self) -> None:
+        """Run due jobs until stop() is called"""
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.tick)
+
+    def request_stop(self) -> None:
+        """Make run_forever return after the current tick, safe to call from a signal handler"""
+        self._stop.set()
+
+    def stop(self, wait: bool = True) -> None:
+        self._stop.set()
+        self.executor.shutdown(wait=wait)
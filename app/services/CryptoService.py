@@ -1,11 +1,15 @@
 import logging
+import time
+from functools import wraps
 from os import getenv
 from typing import List, Dict, Optional, Set, Literal, Any
 from dataclasses import dataclass
 import requests
 from requests.exceptions import RequestException, HTTPError, ConnectionError, Timeout
-from ratelimit import limits, sleep_and_retry
+from ratelimit import limits, RateLimitException
 from config.api_config import APIConfig
+from app.core import metrics
+from app.core.tracing import HTTP, RATE_LIMIT, span
 from app.core.exceptions import (
     CryptoAPIError,
     RateLimitError,
@@ -19,6 +23,21 @@ from app.core.exceptions import (
 CategoryType = Literal['latest', 'visited', 'gainers', 'losers']
 TRENDING_COINS_LIMIT = 3
 
+
+def sleep_and_retry(func):
+    """Like `ratelimit.sleep_and_retry`, but traces every wait as a rate_limit span."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except RateLimitException as exception:
+                with span(f"coingecko wait {func.__name__}", kind=RATE_LIMIT,
+                          seconds=exception.period_remaining):
+                    time.sleep(exception.period_remaining)
+                metrics.rate_limit_sleep_seconds.inc(exception.period_remaining, service="coingecko")
+    return wrapper
+
 class CryptoService:
     """Service for interacting with CoinGecko API."""
     
@@ -26,12 +45,16 @@ class CryptoService:
         """Initialize CoinGecko API client.
         
         Args:
-            api_config: Configuration for API calls. If None, uses default values.
+            api_config: Configuration for API calls. If None, uses default values,
+                with the base URL taken from COINGECKO_BASE_URL when it is set.
             
         Raises:
             ValueError: If COINGECKO_API_KEY environment variable is not set.
         """
-        self.config = api_config or APIConfig()
+        if api_config is None:
+            base_url = getenv('COINGECKO_BASE_URL')
+            api_config = APIConfig(COINGECKO_BASE_URL=base_url) if base_url else APIConfig()
+        self.config = api_config
         self.base_url = self.config.COINGECKO_BASE_URL
         self.api_key = getenv('COINGECKO_API_KEY')
         if not self.api_key:
@@ -58,15 +81,20 @@ class CryptoService:
         url = f'{self.base_url}{endpoint}'
         headers = {'X-Cg-demo-Api-Key': self.api_key}
         
+        started = time.perf_counter()
+        status = "error"
         try:
-            response = requests.get(
-                url, 
-                headers=headers,
-                params=params, 
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
+            with span(f"coingecko GET {endpoint}", kind=HTTP) as s:
+                response = requests.get(
+                    url, 
+                    headers=headers,
+                    params=params, 
+                    timeout=10
+                )
+                status = response.status_code
+                s.set(status_code=status)
+                response.raise_for_status()
+                return response.json()
             
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:
@@ -86,6 +114,9 @@ class CryptoService:
             raise Timeout("Request to CoinGecko API timed out")
         except RequestException as e:
             raise RequestException(f"API request failed: {str(e)}") from e
+        finally:
+            metrics.coingecko_requests.inc(endpoint=endpoint, status=status)
+            metrics.coingecko_request_seconds.observe(time.perf_counter() - started, endpoint=endpoint)
 
     @sleep_and_retry
     @limits(
@@ -0,0 +1,685 @@
+"""
+Local stand-ins for the Twitter v2, CoinGecko and OpenAI APIs.
+
+Each fake is a threaded HTTP server that speaks just enough of its API for
+`TwitterClient`, `CryptoService` and `TweetGeneratorOpenAI` (including the
+Batch API and streamed completions) to run against it unchanged. Responses are
+deterministic for a given seed, and every server can add latency, fail a share
+of requests and enforce per-endpoint rate limits with real 429 responses and
+x-rate-limit headers, so concurrency features can be load tested offline.
+
+Point the clients at the fakes with TWITTER_API_BASE_URL, COINGECKO_BASE_URL
+and OPENAI_BASE_URL, or run all three with:
+
+    python -m app.testing.fake_servers --latency 0.2 --error-rate 0.01
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from app.twitter.TweetRecord import TWITTER_EPOCH_MS
+
+# Structured output returned by the fake OpenAI server, keyed by schema name
+DEFAULT_COMPLETIONS = {
+    "TweetModel": {"quote_tweet_id": None, "text": "fake tweet", "username": "AIpe6571"},
+    "TweetThreadModel": {
+        "topic": "fake",
+        "tweets": [
+            {"quote_tweet_id": None, "text": f"fake tweet {i}", "username": "AIpe6571"}
+            for i in range(1, 4)
+        ],
+        "timestamp": "2024-01-01T00:00:00Z",
+    },
+    "CryptoAnalysisThreadModel": {
+        "topic": "fake",
+        "tweets": [
+            {"quote_tweet_id": None, "text": f"{i}/3 fake analysis", "username": "AIpe6571"}
+            for i in range(1, 4)
+        ],
+        "timestamp": "2024-01-01T00:00:00Z",
+        "coins": [{"current_price": 1.0, "percent_change_24h": 1.0, "volume_24h": 1.0, "market_cap": 1.0}],
+        "generated_at": "2024-01-01T00:00:00Z",
+    },
+}
+
+
+def snowflake_id(timestamp: float) -> int:
+    """A tweet ID of a tweet posted at `timestamp`, seconds since the Unix epoch"""
+    return (int(timestamp * 1000) - TWITTER_EPOCH_MS) << 22
+
+
+def route(method: str, pattern: str, limit: int = None, window: int = None):
+    """Register a handler method for requests matching `pattern`"""
+    def decorator(func):
+        func.route = (method, re.compile(f"^{pattern}$"), limit, window)
+        return func
+    return decorator
+
+
+class RateLimitWindow:
+    """Fixed-window request budget of one endpoint"""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset = time.time() + window
+
+    def take(self) -> bool:
+        now = time.time()
+        if now >= self.reset:
+            self.remaining = self.limit
+            self.reset = now + self.window
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def headers(self) -> dict:
+        return {
+            "x-rate-limit-limit": str(self.limit),
+            "x-rate-limit-remaining": str(self.remaining),
+            "x-rate-limit-reset": str(int(self.reset)),
+        }
+
+
+class FakeResponse(Exception):
+    """Raised by a handler to answer with an error status"""
+
+    def __init__(self, status: int, payload=None):
+        self.status = status
+        self.payload = payload if payload is not None else {"error": f"HTTP {status}"}
+
+
+class FakeServer(ThreadingHTTPServer):
+    """
+    Base of the fake API servers.
+
+    Handlers are methods decorated with `route()` and return the JSON payload,
+    `(status, payload)` or `(status, payload, headers)`, where the payload may
+    be raw `bytes`. Rate limits apply per route, with the route's own limit or
+    `rate_limit` per `rate_limit_window` seconds.
+    """
+
+    daemon_threads = True
+    # Prefix of every route, e.g. /api/v3 for CoinGecko
+    prefix = ""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: int = None,
+        rate_limit_window: int = 900,
+        seed: int = 0,
+    ):
+        """
+        Initialize the server, call start() to serve requests
+
+        Args:
+            latency (float): Seconds added to every response
+            jitter (float): Maximum random seconds added on top of `latency`
+            error_rate (float): Share of requests answered with a 503
+            rate_limit (int, optional): Requests per window for routes without their own limit
+            rate_limit_window (int): Seconds of a rate limit window
+            seed (int): Seed of the latency, error and content randomness
+        """
+        super().__init__((host, port), FakeRequestHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.requests = Counter()   # (method, route pattern) -> count
+        self.statuses = Counter()   # status code -> count
+        self.routes = [
+            (method, pattern, limit, window, handler)
+            for handler in (getattr(self, name) for name in dir(self))
+            if callable(handler) and hasattr(handler, "route")
+            for method, pattern, limit, window in [handler.route]
+        ]
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}{self.prefix}"
+
+    def start(self) -> "FakeServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def rate_limit_for(self, key, limit, window) -> RateLimitWindow:
+        limit = limit or self.rate_limit
+        if not limit:
+            return None
+        with self.lock:
+            if key not in self.windows:
+                self.windows[key] = RateLimitWindow(limit, window or self.rate_limit_window)
+            return self.windows[key]
+
+    def dispatch(self, method: str, path: str, query: dict, body: bytes, headers):
+        """Return (status, payload, extra headers) of a request"""
+        path = path[len(self.prefix):] if path.startswith(self.prefix) else path
+        for route_method, pattern, limit, window, handler in self.routes:
+            match = pattern.match(path)
+            if route_method != method or not match:
+                continue
+            key = (method, pattern.pattern)
+            with self.lock:
+                self.requests[key] += 1
+                delay = self.latency + self.random.uniform(0, self.jitter)
+                fail = self.random.random() < self.error_rate
+            if delay:
+                time.sleep(delay)
+
+            extra = {}
+            budget = self.rate_limit_for(key, limit, window)
+            if budget is not None:
+                with self.lock:
+                    allowed = budget.take()
+                    extra = budget.headers()
+                if not allowed:
+                    extra["retry-after"] = str(max(1, int(budget.reset - time.time())))
+                    return 429, {"title": "Too Many Requests", "status": 429}, extra
+            if fail:
+                return 503, {"title": "Service Unavailable", "status": 503}, extra
+            try:
+                result = handler(*match.groups(), query=query, body=body, headers=headers)
+            except FakeResponse as e:
+                return e.status, e.payload, extra
+            except Exception as e:
+                return 500, {"title": "Internal Server Error", "detail": str(e), "status": 500}, extra
+            if not isinstance(result, tuple):
+                result = (200, result)
+            status, payload, *handler_headers = result
+            if handler_headers:
+                extra.update(handler_headers[0])
+            return status, payload, extra
+        return 404, {"title": "Not Found", "status": 404}, {}
+
+
+class FakeRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, payload, headers = self.server.dispatch(method, url.path, query, body, self.headers)
+
+        with self.server.lock:
+            self.server.statuses[status] += 1
+        if isinstance(payload, bytes):
+            content_type = headers.pop("content-type", "application/octet-stream")
+            data = payload
+        else:
+            content_type = "application/json"
+            data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class FakeTwitterServer(FakeServer):
+    """
+    Twitter API v2 subset used by `TwitterClient`.
+
+    Route limits follow the free/basic tiers closely enough to exercise
+    rate-limit handling: 15-minute windows, and a small budget on
+    POST /2/tweets and users/me.
+    """
+
+    def __init__(self, username: str = "AIpe6571", user_id: str = "1", mentions: int = 20, **kwargs):
+        super().__init__(**kwargs)
+        self.me = {"id": user_id, "name": username, "username": username}
+        self.users = {user_id: self.me}
+        self.tweets = {}
+        self.following = set()
+        # Recent search rejects a since_id older than this many seconds
+        self.search_window = 7 * 24 * 3600
+        self._next_id = 0
+
+        # Seed some accounts and conversations that mention us
+        for i in range(mentions):
+            user = self.add_user(f"user{i}")
+            root = self.add_tweet(user["id"], f"gm @{username}, what is your take on $ETH #{i}?")
+            self.add_tweet(user["id"], f"@{username} also curious about $SOL #{i}", conversation_id=root["id"],
+                           in_reply_to_user_id=user_id, referenced_tweets=[{"type": "replied_to", "id": root["id"]}])
+
+    def _snapshot(self, items: dict) -> list:
+        """The values of `tweets` or `users`, copied under the lock that writes to them hold"""
+        with self.lock:
+            return list(items.values())
+
+    def add_user(self, username: str, followers: int = 0) -> dict:
+        with self.lock:
+            user_id = str(1000 + len(self.users))
+            user = {"id": user_id, "name": username, "username": username,
+                    "public_metrics": {"followers_count": followers, "following_count": 0, "tweet_count": 0}}
+            self.users[user_id] = user
+        return user
+
+    def add_tweet(self, author_id: str, text: str, conversation_id: str = None, **fields) -> dict:
+        with self.lock:
+            # Snowflakes of the current time, always increasing
+            self._next_id = max(self._next_id + 1, snowflake_id(time.time()))
+            tweet_id = str(self._next_id)
+            tweet = {
+                "id": tweet_id,
+                "text": text,
+                "author_id": author_id,
+                "conversation_id": conversation_id or tweet_id,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                "edit_history_tweet_ids": [tweet_id],
+                "public_metrics": {"retweet_count": 0, "reply_count": 0, "like_count": 0, "quote_count": 0},
+                **{key: value for key, value in fields.items() if value is not None},
+            }
+            self.tweets[tweet_id] = tweet
+        return tweet
+
+    def _tweet_page(self, tweets, query) -> dict:
+        max_results = int(query.get("max_results", 10))
+        # Recent search calls it next_token, the timelines pagination_token
+        start = int(query.get("pagination_token") or query.get("next_token") or 0)
+        page = tweets[start:start + max_results]
+        author_ids = {tweet["author_id"] for tweet in page}
+        payload = {
+            "data": page,
+            "includes": {"users": [self.users[a] for a in author_ids if a in self.users]},
+            "meta": {"result_count": len(page)},
+        }
+        if page:
+            payload["meta"].update(newest_id=page[0]["id"], oldest_id=page[-1]["id"])
+        if start + max_results < len(tweets):
+            payload["meta"]["next_token"] = str(start + max_results)
+        if not page:
+            del payload["data"], payload["includes"]
+        return payload
+
+    def _newest_first(self, tweets, query):
+        since_id = query.get("since_id")
+        tweets = sorted(tweets, key=lambda tweet: int(tweet["id"]), reverse=True)
+        if since_id:
+            tweets = [tweet for tweet in tweets if int(tweet["id"]) > int(since_id)]
+        return tweets
+
+    @route("GET", "/2/users/me", limit=75)
+    def users_me(self, **request):
+        return {"data": self.me}
+
+    @route("GET", r"/2/users/by/username/(\w+)")
+    def user_by_username(self, username, **request):
+        user = next((u for u in self._snapshot(self.users) if u["username"].lower() == username.lower()), None)
+        if user is None:
+            user = self.add_user(username)
+        return {"data": user}
+
+    @route("GET", "/2/users")
+    def users_by_ids(self, query, **request):
+        ids = query.get("ids", "").split(",")
+        return {"data": [self.users[i] for i in ids if i in self.users]}
+
+    @route("GET", r"/2/users/(\d+)/mentions", limit=180)
+    def mentions(self, user_id, query, **request):
+        mentioned = [t for t in self._snapshot(self.tweets) if f"@{self.me['username']}" in t["text"]]
+        return self._tweet_page(self._newest_first(mentioned, query), query)
+
+    @route("GET", r"/2/users/(\d+)/tweets", limit=900)
+    def user_tweets(self, user_id, query, **request):
+        own = [t for t in self._snapshot(self.tweets) if t["author_id"] == user_id]
+        return self._tweet_page(self._newest_first(own, query), query)
+
+    @route("GET", r"/2/users/(\d+)/timelines/reverse_chronological", limit=180)
+    def home_timeline(self, user_id, query, **request):
+        others = [t for t in self._snapshot(self.tweets) if t["author_id"] != user_id]
+        return self._tweet_page(self._newest_first(others, query), query)
+
+    @route("GET", "/2/users/by", limit=900)
+    def users_by_usernames(self, query, **request):
+        usernames = query.get("usernames", "").split(",")
+        # Like the real endpoint, one malformed username fails the whole request
+        malformed = [username for username in usernames if not re.fullmatch(r"[A-Za-z0-9_]{1,15}", username)]
+        if malformed:
+            raise FakeResponse(400, {
+                "errors": [{"parameters": {"usernames": malformed},
+                            "message": f"The `usernames` query parameter value [{malformed[0]}] does not match "
+                                       "^[A-Za-z0-9_]{1,15}$"}],
+                "title": "Invalid Request",
+                "detail": "One or more parameters to your request was invalid.",
+                "type": "https://api.twitter.com/2/problems/invalid-request",
+            })
+        by_username = {u["username"].lower(): u for u in self._snapshot(self.users)}
+        found = []
+        for username in usernames:
+            user = by_username.get(username.lower())
+            found.append(user or self.add_user(username))
+        return {"data": found}
+
+    @route("GET", r"/2/users/(\d+)/following", limit=15)
+    def get_following(self, user_id, query, **request):
+        with self.lock:
+            following = [self.users[i] for i in sorted(self.following)]
+        max_results = int(query.get("max_results", 100))
+        start = int(query.get("pagination_token") or 0)
+        page = following[start:start + max_results]
+        payload = {"meta": {"result_count": len(page)}}
+        if page:
+            payload["data"] = page
+        if start + max_results < len(following):
+            payload["meta"]["next_token"] = str(start + max_results)
+        return payload
+
+    @route("POST", r"/2/users/(\d+)/following", limit=50)
+    def follow(self, user_id, body, **request):
+        target = json.loads(body)["target_user_id"]
+        with self.lock:
+            self.following.add(str(target))
+        return {"data": {"following": True, "pending_follow": False}}
+
+    @route("GET", "/2/tweets/search/recent", limit=450)
+    def search_recent(self, query, **request):
+        since_id = query.get("since_id")
+        if since_id and int(since_id) < snowflake_id(time.time() - self.search_window):
+            raise FakeResponse(400, {
+                "errors": [{"parameters": {"since_id": [since_id]},
+                            "message": f"Invalid 'since_id':'{since_id}'. 'since_id' must be a tweet id "
+                                       "created within the last 7 days."}],
+                "title": "Invalid Request",
+                "detail": "One or more parameters to your request was invalid.",
+                "type": "https://api.twitter.com/2/problems/invalid-request",
+            })
+        match = re.search(r"conversation_id:(\d+)", query.get("query", ""))
+        tweets = [t for t in self._snapshot(self.tweets) if match and t["conversation_id"] == match.group(1)]
+        return self._tweet_page(self._newest_first(tweets, query), query)
+
+    @route("GET", r"/2/tweets/(\d+)", limit=900)
+    def get_tweet(self, tweet_id, **request):
+        tweet = self.tweets.get(tweet_id)
+        if tweet is None:
+            raise FakeResponse(404, {"title": "Not Found Error", "status": 404})
+        referenced = [self.tweets[ref["id"]] for ref in tweet.get("referenced_tweets", ()) if ref["id"] in self.tweets]
+        author_ids = {t["author_id"] for t in [tweet, *referenced]}
+        includes = {"users": [self.users[a] for a in author_ids if a in self.users]}
+        if referenced:
+            includes["tweets"] = referenced
+        return {"data": {"reply_settings": "everyone", **tweet}, "includes": includes}
+
+    @route("POST", "/2/tweets", limit=100)
+    def create_tweet(self, body, **request):
+        payload = json.loads(body)
+        reply_to = (payload.get("reply") or {}).get("in_reply_to_tweet_id")
+        parent = self.tweets.get(str(reply_to)) if reply_to else None
+        tweet = self.add_tweet(
+            self.me["id"],
+            payload["text"],
+            conversation_id=parent["conversation_id"] if parent else None,
+            in_reply_to_user_id=parent["author_id"] if parent else None,
+            referenced_tweets=[{"type": "replied_to", "id": parent["id"]}] if parent else None,
+        )
+        return 201, {"data": {"id": tweet["id"], "text": tweet["text"]}}
+
+
+class FakeCoinGeckoServer(FakeServer):
+    """CoinGecko /search/trending, /coins/markets and /global with generated coins"""
+
+    prefix = "/api/v3"
+
+    def __init__(self, coins: int = 250, **kwargs):
+        super().__init__(**kwargs)
+        self.coins = [
+            {
+                "id": f"coin-{i}",
+                "symbol": f"c{i}",
+                "name": f"Coin {i}",
+                "current_price": round(self.random.uniform(0.0001, 100000), 6),
+                "market_cap": self.random.randint(10 ** 6, 10 ** 12),
+                "market_cap_rank": i + 1,
+                "total_volume": self.random.randint(10 ** 5, 10 ** 11),
+                "price_change_percentage_24h": round(self.random.uniform(-30, 30), 2),
+                "roi": None,
+            }
+            for i in range(coins)
+        ]
+
+    @route("GET", "/search/trending", limit=30, window=60)
+    def trending(self, **request):
+        return {
+            "coins": [
+                {"item": {"id": coin["id"], "name": coin["name"], "symbol": coin["symbol"].upper(),
+                          "market_cap_rank": coin["market_cap_rank"], "score": score}}
+                for score, coin in enumerate(self.coins[:15])
+            ],
+            "nfts": [],
+            "categories": [],
+        }
+
+    @route("GET", "/coins/markets", limit=30, window=60)
+    def markets(self, query, **request):
+        if "vs_currency" not in query:
+            raise FakeResponse(400, {"error": "Missing parameter vs_currency"})
+        coins = self.coins
+        if query.get("ids"):
+            ids = set(query["ids"].split(","))
+            coins = [coin for coin in coins if coin["id"] in ids]
+        per_page = int(query.get("per_page", 100))
+        page = int(query.get("page", 1))
+        return coins[(page - 1) * per_page:page * per_page]
+
+    @route("GET", "/global", limit=30, window=60)
+    def global_data(self, **request):
+        return {
+            "data": {
+                "active_cryptocurrencies": len(self.coins),
+                "total_market_cap": {"usd": sum(coin["market_cap"] for coin in self.coins)},
+                "total_volume": {"usd": sum(coin["total_volume"] for coin in self.coins)},
+                "market_cap_change_percentage_24h_usd": 1.5,
+            }
+        }
+
+
+class FakeOpenAIServer(FakeServer):
+    """
+    OpenAI chat completions with structured output, streaming and the Batch API.
+
+    The content of a completion is looked up by the name of the requested JSON
+    schema in `completions`.
+    """
+
+    prefix = "/v1"
+
+    def __init__(self, completions: dict = None, polls_until_complete: int = 1, **kwargs):
+        super().__init__(**kwargs)
+        self.completions = completions or DEFAULT_COMPLETIONS
+        self.polls_until_complete = polls_until_complete
+        self.files = {}
+        self.batches = {}
+
+    def usage(self) -> dict:
+        return {"prompt_tokens": 1500, "completion_tokens": 100, "total_tokens": 1600,
+                "prompt_tokens_details": {"cached_tokens": 1280}}
+
+    def content_for(self, request: dict) -> str:
+        schema_name = request["response_format"]["json_schema"]["name"]
+        return json.dumps(self.completions[schema_name])
+
+    @route("POST", "/chat/completions", limit=500, window=60)
+    def chat_completions(self, body, **request):
+        request_body = json.loads(body)
+        content = self.content_for(request_body)
+        if request_body.get("stream"):
+            return self._stream(request_body, content)
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request_body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": self.usage(),
+        }
+
+    def _stream(self, request_body: dict, content: str, chunk_size: int = 16):
+        """Server-sent events of the content in small deltas, then the usage"""
+        def chunk(delta, finish_reason=None, usage=None):
+            return {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request_body["model"],
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+                "usage": usage,
+            }
+
+        events = [chunk({"role": "assistant", "content": ""})]
+        events += [chunk({"content": content[i:i + chunk_size]}) for i in range(0, len(content), chunk_size)]
+        events.append(chunk({}, finish_reason="stop"))
+        if (request_body.get("stream_options") or {}).get("include_usage"):
+            events.append(chunk(None, usage=self.usage()))
+        data = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return 200, data.encode(), {"content-type": "text/event-stream"}
+
+    @route("POST", "/files")
+    def upload_file(self, body, headers, **request):
+        # Multipart upload, keep the content of the single file part
+        boundary = headers["Content-Type"].split("boundary=")[1].encode()
+        part = next(p for p in body.split(b"--" + boundary) if b"filename=" in p)
+        content = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+        with self.lock:
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": 0,
+                "filename": "batch.jsonl", "purpose": "batch", "status": "processed"}
+
+    @route("GET", r"/files/([\w-]+)/content")
+    def file_content(self, file_id, **request):
+        if file_id not in self.files:
+            raise FakeResponse(404)
+        return 200, self.files[file_id], {"content-type": "application/jsonl"}
+
+    @route("POST", "/batches")
+    def create_batch(self, body, **request):
+        request_body = json.loads(body)
+        with self.lock:
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": request_body["endpoint"],
+                "input_file_id": request_body["input_file_id"],
+                "completion_window": request_body["completion_window"],
+                "status": "validating", "created_at": 0, "polls": 0,
+            }
+        return self.batches[batch_id]
+
+    @route("GET", r"/batches/([\w-]+)")
+    def get_batch(self, batch_id, **request):
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            raise FakeResponse(404)
+        batch["polls"] += 1
+        if batch["polls"] > self.polls_until_complete:
+            self.complete(batch)
+        else:
+            batch["status"] = "in_progress"
+        return batch
+
+    def complete(self, batch: dict) -> None:
+        """Answer every request of the batch input file"""
+        lines = []
+        for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines():
+            request = json.loads(line)
+            lines.append(json.dumps({
+                "id": f"resp-{request['custom_id']}",
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "body": {
+                        "choices": [{"message": {"content": self.content_for(request["body"])}}],
+                        "usage": self.usage(),
+                    },
+                },
+                "error": None,
+            }))
+        output_id = f"file-out-{batch['id']}"
+        self.files[output_id] = "\n".join(lines).encode("utf-8")
+        batch.update(status="completed", output_file_id=output_id)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run fake Twitter, CoinGecko and OpenAI servers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--twitter-port", type=int, default=8601)
+    parser.add_argument("--coingecko-port", type=int, default=8602)
+    parser.add_argument("--openai-port", type=int, default=8603)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random extra latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--rate-limit", type=int, help="Requests per window for routes without their own limit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    options = dict(host=args.host, latency=args.latency, jitter=args.jitter,
+                   error_rate=args.error_rate, rate_limit=args.rate_limit, seed=args.seed)
+    servers = [
+        ("TWITTER_API_BASE_URL", FakeTwitterServer(port=args.twitter_port, **options)),
+        ("COINGECKO_BASE_URL", FakeCoinGeckoServer(port=args.coingecko_port, **options)),
+        ("OPENAI_BASE_URL", FakeOpenAIServer(port=args.openai_port, **options)),
+    ]
+    for variable, server in servers:
+        server.start()
+        print(f"export {variable}={server.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for _, server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import tweepy
+
+logger = logging.getLogger(__name__)
+
+# Most usernames per users lookup request
+LOOKUP_BATCH_SIZE = 100
+# Most accounts per page of the following list
+FOLLOWING_PAGE_SIZE = 1000
+# How long the cached following list is trusted
+FOLLOWING_TTL = 24 * 60 * 60
+# What the users lookup accepts, one name that does not match fails the whole request
+USERNAME_PATTERN = re.compile(r"[A-Za-z0-9_]{1,15}")
+
+
+@dataclass
+class FollowResult:
+    followed: List[str] = field(default_factory=list)
+    already_following: List[str] = field(default_factory=list)
+    not_found: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+
+class BulkFollower:
+    """
+    Follows a list of accounts with as few API calls as possible.
+
+    Usernames are resolved 100 at a time, accounts already in the cached
+    following list are skipped, and follows are paced by the rate limit the
+    API announces for the follow endpoint. Progress is kept in Storage under
+    a key derived from the list, so running the same list again continues
+    where an interrupted run stopped.
+    """
+
+    def __init__(self, twitter_client, sleep=time.sleep):
+        """
+        Initialize the follower
+
+        Args:
+            twitter_client (TwitterClient): Client whose API, Storage and rate limits are used
+            sleep (callable): Sleep function used to pace follows
+        """
+        self.twitter = twitter_client
+        self.sleep = sleep
+
+    @staticmethod
+    def normalize(username: str) -> str:
+        return username.strip().lstrip("@").lower()
+
+    @staticmethod
+    def progress_key(usernames) -> str:
+        digest = hashlib.sha256(",".join(sorted(usernames)).encode()).hexdigest()[:16]
+        return f"follow_progress:{digest}"
+
+    @property
+    def following_key(self) -> str:
+        return f"following:{self.twitter.user_id}"
+
+    def following_ids(self, refresh: bool = False) -> set:
+        """IDs of the accounts we follow, fetched at most once per FOLLOWING_TTL"""
+        cached = None if refresh else self.twitter.storage.get(self.following_key)
+        if cached is not None:
+            return set(cached)
+
+        following = set()
+        pagination_token = None
+        while True:
+            response = self.twitter.client.get_users_following(
+                id=self.twitter.user_id,
+                max_results=FOLLOWING_PAGE_SIZE,
+                pagination_token=pagination_token,
+                user_auth=True,
+            )
+            following.update(str(user.id) for user in response.data or ())
+            pagination_token = (response.meta or {}).get("next_token")
+            if not pagination_token:
+                break
+        self._save_following(following)
+        return following
+
+    def _save_following(self, following: set) -> None:
+        self.twitter.storage.set(self.following_key, sorted(following), ttl=FOLLOWING_TTL)
+
+    def resolve(self, usernames: List[str]) -> Dict[str, Optional[str]]:
+        """Map usernames to user IDs, None for malformed names and accounts that do not exist"""
+        resolved = {username: None for username in usernames}
+        valid = [username for username in usernames if USERNAME_PATTERN.fullmatch(username)]
+        for start in range(0, len(valid), LOOKUP_BATCH_SIZE):
+            resolved.update(self._lookup(valid[start:start + LOOKUP_BATCH_SIZE]))
+        return resolved
+
+    def _lookup(self, batch: List[str]) -> Dict[str, Optional[str]]:
+        """Look up a batch of usernames, one at a time when the API rejects the batch"""
+        try:
+            response = self.twitter.client.get_users(usernames=batch, user_auth=True)
+        except tweepy.BadRequest as e:
+            if len(batch) == 1:
+                logger.warning(f"Lookup of {batch[0]} rejected: {e}")
+                return {batch[0]: None}
+            logger.warning(f"Lookup of {len(batch)} usernames rejected, looking them up one at a time: {e}")
+            resolved = {}
+            for username in batch:
+                resolved.update(self._lookup([username]))
+            return resolved
+        return {user.username.lower(): str(user.id) for user in response.data or ()}
+
+    def follow(self, usernames, on_result: Callable[[str, str], None] = None) -> FollowResult:
+        """
+        Follow every account of a list
+
+        Args:
+            usernames (iterable): Usernames, with or without '@'
+            on_result (callable, optional): Called with each username and its outcome:
+                'followed', 'already_following', 'not_found' or 'failed'
+
+        Returns:
+            FollowResult: The usernames by outcome
+        """
+        usernames = sorted({self.normalize(username) for username in usernames if username.strip()})
+        key = self.progress_key(usernames)
+        progress = self.twitter.storage.get(key) or {"resolved": {}, "done": []}
+        done = set(progress["done"])
+
+        unresolved = [username for username in usernames if username not in progress["resolved"]]
+        if unresolved:
+            progress["resolved"].update(self.resolve(unresolved))
+            self.twitter.storage.set(key, progress)
+
+        result = FollowResult()
+        following = self.following_ids()
+        route = f"/2/users/{self.twitter.user_id}/following"
+
+        def report(username, outcome):
+            if on_result is not None:
+                on_result(username, outcome)
+
+        for username in usernames:
+            user_id = progress["resolved"].get(username)
+            if user_id is None:
+                result.not_found.append(username)
+                report(username, "not_found")
+                continue
+            if username in done or user_id in following:
+                result.already_following.append(username)
+                report(username, "already_following")
+                continue
+
+            self.twitter.rate_limits.wait("POST", route, sleep=self.sleep)
+            try:
+                self.twitter.client.follow_user(user_id, user_auth=True)
+            except tweepy.TweepyException as e:
+                logger.warning(f"Failed to follow @{username}: {e}")
+                result.failed[username] = str(e)
+                report(username, "failed")
+                continue
+
+            following.add(user_id)
+            self._save_following(following)
+            done.add(username)
+            progress["done"] = sorted(done)
+            self.twitter.storage.set(key, progress)
+            result.followed.append(username)
+            report(username, "followed")
+
+        if not result.failed:
+            # The whole list went through, a later run of it starts over
+            self.twitter.storage.delete(key)
+        return result
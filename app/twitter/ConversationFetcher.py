@@ -0,0 +1,244 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Tuple
+
+import tweepy
+
+from app.core import metrics
+from app.db.models.Tweet_model import Tweet
+from app.twitter.IndexedResponse import IndexedResponse
+from app.twitter.TweetRecord import TweetRecord, snowflake_time
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_TWEET_FIELDS = [
+    "author_id",
+    "in_reply_to_user_id",
+    "conversation_id",
+    "created_at",
+    "text",
+    "referenced_tweets",
+]
+CONVERSATION_EXPANSIONS = ["author_id", "referenced_tweets.id", "in_reply_to_user_id"]
+# A looked up tweet comes with the tweet it replies to and that tweet's author
+REPLY_CHAIN_EXPANSIONS = ["author_id", "referenced_tweets.id", "referenced_tweets.id.author_id"]
+# Recent search only reaches 7 days back, an older since_id is rejected
+SEARCH_WINDOW = timedelta(days=6)
+
+
+class ConversationFetcher:
+    """
+    Fetches conversations through recent search without asking twice for the
+    same tweets.
+
+    The newest tweet ID of each conversation and the time it was fetched are
+    kept in Storage. A conversation fetched less than `fresh_for` ago is read
+    from the tweets database without an API call, an older one is refetched
+    with `since_id` so only the replies posted since come back. The state
+    expires with its newest tweet, read from the snowflake ID, once that
+    tweet is too old for recent search to accept it as `since_id`.
+
+    Results are paged through lazily up to `max_tweets`, each page stored in
+    one transaction as it arrives. If a fetch stops at the cap, `since_id` is
+    kept with the pagination token and the next fetch continues from it, so
+    the replies past the cap are not skipped. With `reply_chain_only` only
+    the tweets a mention replies to are fetched, walking `referenced_tweets`
+    up to the root, which keeps viral threads from costing dozens of search
+    pages.
+    """
+
+    def __init__(
+        self,
+        twitter_client,
+        fresh_for: timedelta = timedelta(minutes=10),
+        max_tweets: int = 500,
+        page_size: int = 100,
+        reply_chain_only: bool = False,
+    ):
+        """
+        Initialize the fetcher
+
+        Args:
+            twitter_client (TwitterClient): Client whose API, database and Storage are used
+            fresh_for (timedelta): How long a fetched conversation is used without asking the API
+            max_tweets (int): Most tweets fetched and returned per conversation
+            page_size (int): Tweets per search page, 10 to 100
+            reply_chain_only (bool): Fetch the reply chain of the mention instead of the whole conversation
+        """
+        self.twitter = twitter_client
+        self.fresh_for = fresh_for
+        self.max_tweets = max_tweets
+        self.page_size = page_size
+        self.reply_chain_only = reply_chain_only
+
+    @staticmethod
+    def state_key(conversation_id) -> str:
+        return f"conversation:{conversation_id}"
+
+    def fetch(self, conversation_id, refresh: bool = False, reply_to: TweetRecord = None) -> list:
+        """
+        Return the tweets of a conversation, oldest first
+
+        Args:
+            conversation_id (str): The ID of the conversation
+            refresh (bool): Ask the API even when the conversation is fresh
+            reply_to (TweetRecord, optional): The mention to answer, its reply chain is
+                returned instead of the conversation when `reply_chain_only` is set
+        """
+        if self.reply_chain_only and reply_to is not None:
+            return self.reply_chain(reply_to)
+
+        conversation_id = str(conversation_id)
+        key = self.state_key(conversation_id)
+        state = self.twitter.storage.get(key) or {}
+        now = datetime.now(timezone.utc)
+
+        if not refresh and state and now - datetime.fromisoformat(state["fetched_at"]) < self.fresh_for:
+            metrics.conversation_fetches.inc(result="fresh")
+            return self.stored(conversation_id, self.max_tweets)
+
+        since_id = state.get("newest_id")
+        # Continue a fetch stopped by the cap, the newest ID was seen on its first page
+        next_token = state.get("next_token")
+        pending_id = state.get("pending_newest_id") if next_token else None
+        if since_id and now - snowflake_time(since_id) >= SEARCH_WINDOW:
+            # Recent search rejects it, only a full fetch is left
+            since_id = next_token = pending_id = None
+        try:
+            newest_id, next_token = self.fetch_pages(conversation_id, since_id, next_token)
+        except tweepy.BadRequest as e:
+            if not (since_id or next_token) or ("since_id" not in str(e) and "next_token" not in str(e)):
+                raise
+            logger.warning(f"Search state of conversation {conversation_id} rejected, fetching it all: {e}")
+            self.twitter.storage.delete(key)
+            since_id = pending_id = None
+            newest_id, next_token = self.fetch_pages(conversation_id)
+        metrics.conversation_fetches.inc(result="incremental" if since_id else "full")
+
+        newest_id = pending_id or newest_id
+        if next_token:
+            state = {"newest_id": since_id, "next_token": next_token, "pending_newest_id": newest_id}
+        else:
+            state = {"newest_id": newest_id or since_id}
+        state["fetched_at"] = now.isoformat()
+        # Kept while the newest tweet can be used as since_id, and at least while it is fresh
+        ttl = self.fresh_for.total_seconds()
+        kept_id = state["newest_id"] or newest_id
+        if kept_id:
+            ttl = max(ttl, (snowflake_time(kept_id) + SEARCH_WINDOW - now).total_seconds())
+        self.twitter.storage.set(key, state, ttl=ttl)
+        return self.stored(conversation_id, self.max_tweets)
+
+    def fetch_pages(self, conversation_id, since_id=None, next_token=None):
+        """
+        Fetch and store the tweets of a conversation since `since_id`
+
+        Returns:
+            tuple: The newest tweet ID, and the token to continue from when the cap stopped the fetch
+        """
+        newest_id = None
+        fetched = 0
+        for page, next_token in self.pages(conversation_id, since_id, next_token):
+            # Results come newest first, the first page has the newest tweet
+            newest_id = newest_id or page.meta.get("newest_id")
+            self.twitter.save_tweets_to_db(
+                [TweetRecord.from_tweet(tweet, page) for tweet in page.data], self.twitter.username
+            )
+            fetched += len(page.data)
+        logger.info(f"Fetched {fetched} new tweets of conversation {conversation_id}")
+        return newest_id, next_token
+
+    def pages(self, conversation_id, since_id=None, next_token=None) -> Iterator[Tuple[IndexedResponse, str]]:
+        """
+        Search result pages of a conversation, requested one at a time until `max_tweets`
+
+        Each page comes with the token the tweets after it are requested with,
+        None after the last page.
+        """
+        remaining = self.max_tweets
+        while remaining > 0:
+            page = IndexedResponse(self.twitter.client.search_recent_tweets(
+                query=f"conversation_id:{conversation_id}",
+                since_id=since_id,
+                next_token=next_token,
+                # The endpoint takes 10 to 100
+                max_results=max(10, min(self.page_size, remaining)),
+                tweet_fields=CONVERSATION_TWEET_FIELDS,
+                expansions=CONVERSATION_EXPANSIONS,
+                user_fields=["username"],
+                user_auth=True,
+            ))
+            if len(page.data) > remaining and next_token:
+                # Cut by the cap, the rest of the page is requested again with the same token.
+                # A page requested without a token cannot be, it is kept whole.
+                page.data = page.data[:remaining]
+            else:
+                next_token = page.meta.get("next_token")
+            yield page, next_token
+            remaining -= len(page.data)
+            if not next_token:
+                break
+
+    def reply_chain(self, tweet: TweetRecord) -> list:
+        """
+        Return a tweet and the tweets it replies to up to the root, oldest first
+
+        Stored tweets are read from the database. A missing one is looked up
+        with the tweet it replies to expanded, so every call covers two levels.
+        """
+        self.twitter.save_tweets_to_db([tweet], self.twitter.username)
+        chain = [tweet]
+        parent_id = tweet.in_reply_to_tweet_id
+        while parent_id and len(chain) < self.max_tweets:
+            parent = self.stored_tweet(parent_id)
+            if parent is None or (
+                # Stored before the reply links were kept, and not the root
+                parent.in_reply_to_tweet_id is None and parent.conversation_id not in (None, parent.id)
+            ):
+                try:
+                    response = IndexedResponse(self.twitter.client.get_tweet(
+                        parent_id,
+                        tweet_fields=CONVERSATION_TWEET_FIELDS,
+                        expansions=REPLY_CHAIN_EXPANSIONS,
+                        user_fields=["username"],
+                        user_auth=True,
+                    ))
+                except tweepy.NotFound:
+                    # Deleted or protected, the chain is cut there
+                    break
+                if not response.data:
+                    break
+                parent = TweetRecord.from_tweet(response.data, response)
+                grandparents = [
+                    TweetRecord.from_tweet(referenced, response)
+                    for kind, referenced in response.referenced_tweets(response.data)
+                    if kind == "replied_to"
+                ]
+                self.twitter.save_tweets_to_db([parent, *grandparents], self.twitter.username)
+            chain.append(parent)
+            parent_id = parent.in_reply_to_tweet_id
+        return chain[::-1]
+
+    def stored_tweet(self, tweet_id):
+        """The stored TweetRecord of a tweet, None when it is not stored"""
+        session = self.twitter.Session()
+        try:
+            row = session.query(Tweet).filter(Tweet.tweet_id == str(tweet_id)).first()
+            return TweetRecord.from_row(row) if row is not None else None
+        finally:
+            session.close()
+
+    def stored(self, conversation_id, limit: int = None) -> list:
+        """The stored tweets of a conversation, oldest first, the newest `limit` ones when given"""
+        session = self.twitter.Session()
+        try:
+            rows = (
+                session.query(Tweet)
+                .filter(Tweet.conversation_id == str(conversation_id))
+                .order_by(Tweet.created_at.desc(), Tweet.tweet_id.desc())
+                .limit(limit)
+                .all()
+            )
+            return [TweetRecord.from_row(row) for row in reversed(rows)]
+        finally:
+            session.close()
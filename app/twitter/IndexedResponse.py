@@ -0,0 +1,47 @@
+class IndexedResponse:
+    """
+    A tweepy Response with its expansions indexed, built once per response
+
+    The `includes` of a response are lists, so finding the author of every
+    tweet by scanning them costs O(tweets x users). The index maps users and
+    referenced tweets by ID and media by key, so every consumer of the same
+    response shares one O(1) lookup.
+    """
+
+    __slots__ = ("data", "meta", "errors", "users", "tweets", "media")
+
+    def __init__(self, response):
+        includes = getattr(response, "includes", None) or {}
+        self.data = getattr(response, "data", None) or []
+        self.meta = getattr(response, "meta", None) or {}
+        self.errors = getattr(response, "errors", None) or []
+        self.users = {user.id: user for user in includes.get("users", ())}
+        self.tweets = {tweet.id: tweet for tweet in includes.get("tweets", ())}
+        self.media = {media.media_key: media for media in includes.get("media", ())}
+
+    @classmethod
+    def of(cls, response):
+        """Index a response, or return it when it already is indexed"""
+        return response if isinstance(response, cls) else cls(response)
+
+    def author(self, tweet):
+        """The expanded author of a tweet, None when it was not included"""
+        return self.users.get(tweet.author_id)
+
+    def username(self, tweet, default="unknown"):
+        author = self.users.get(tweet.author_id)
+        return author.username if author is not None else default
+
+    def referenced_tweets(self, tweet) -> list:
+        """The included tweets a tweet quotes, retweets or replies to, as (type, tweet) pairs"""
+        referenced = []
+        for reference in getattr(tweet, "referenced_tweets", None) or ():
+            included = self.tweets.get(reference.id)
+            if included is not None:
+                referenced.append((reference.type, included))
+        return referenced
+
+    def media_of(self, tweet) -> list:
+        """The included media attached to a tweet"""
+        attachments = getattr(tweet, "attachments", None) or {}
+        return [self.media[key] for key in attachments.get("media_keys", ()) if key in self.media]
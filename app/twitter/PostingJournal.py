@@ -0,0 +1,212 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.ai.models import TweetModel, TweetThreadModel, CryptoAnalysisThreadModel
+from app.db.models.PostingJournal_model import JournalEntry, JournalTweet
+
+UNFINISHED_STATUSES = ("pending", "posting", "failed")
+
+CONTENT_MODELS = {
+    "tweet": TweetModel,
+    "reply": TweetModel,
+    "thread": TweetThreadModel,
+    "crypto_analysis": CryptoAnalysisThreadModel,
+}
+
+
+class PostingJournal:
+    """
+    Write-ahead journal for posting tweets, threads and replies.
+
+    Generated content and its planned sequence of tweets are recorded before
+    anything is posted, and every posted tweet ID is written as soon as it is
+    known. A failed or interrupted post can then be resumed from the last
+    successful tweet without regenerating the content. The journal also acts as
+    the checkpoint store of `ThreadPoster`, keyed by entry ID.
+    """
+
+    def __init__(self, Session):
+        """
+        Initialize the journal
+
+        Args:
+            Session (sessionmaker): Session factory of the tweets database
+        """
+        self.Session = Session
+
+    def record(
+        self,
+        content: TweetModel | TweetThreadModel,
+        kind: str = None,
+        source: str = None,
+        reply_to_tweet_id: str = None,
+        conversation_id: str = None,
+    ) -> int:
+        """
+        Record generated content and its planned tweets
+
+        Args:
+            content (TweetModel | TweetThreadModel): The generated content
+            kind (str, optional): tweet, reply, thread or crypto_analysis, derived from the content if not set
+            source (str, optional): What generated the content, e.g. the command name
+            reply_to_tweet_id (str, optional): Tweet the first tweet replies to
+            conversation_id (str, optional): Conversation of a reply
+
+        Returns:
+            int: The journal entry ID
+        """
+        if kind is None:
+            if isinstance(content, CryptoAnalysisThreadModel):
+                kind = "crypto_analysis"
+            elif isinstance(content, TweetThreadModel):
+                kind = "thread"
+            else:
+                kind = "reply" if reply_to_tweet_id else "tweet"
+        tweets = content.tweets if isinstance(content, TweetThreadModel) else [content]
+
+        session = self.Session()
+        try:
+            entry = JournalEntry(
+                kind=kind,
+                source=source,
+                content=content.model_dump_json(),
+                reply_to_tweet_id=reply_to_tweet_id,
+                conversation_id=conversation_id,
+                status="pending",
+            )
+            session.add(entry)
+            session.flush()
+            session.add_all(
+                JournalTweet(
+                    entry_id=entry.id,
+                    position=position,
+                    text=tweet.text,
+                    quote_tweet_id=tweet.quote_tweet_id,
+                )
+                for position, tweet in enumerate(tweets)
+            )
+            session.commit()
+            return entry.id
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def append(self, entry_id: int, tweet: TweetModel) -> int:
+        """
+        Add the next planned tweet of a thread that is posted while it is generated
+
+        Args:
+            entry_id (int): The journal entry, recorded with the tweets known so far
+            tweet (TweetModel): The tweet
+
+        Returns:
+            int: Position of the tweet in the thread
+        """
+        session = self.Session()
+        try:
+            entry = session.get(JournalEntry, entry_id)
+            content = self.load_content(entry)
+            position = len(content.tweets)
+            content.tweets.append(tweet)
+            entry.content = content.model_dump_json()
+            entry.updated_at = datetime.now(timezone.utc)
+            session.add(
+                JournalTweet(
+                    entry_id=entry_id,
+                    position=position,
+                    text=tweet.text,
+                    quote_tweet_id=tweet.quote_tweet_id,
+                )
+            )
+            session.commit()
+            return position
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_entry(self, entry_id: int) -> Optional[JournalEntry]:
+        session = self.Session()
+        try:
+            return session.get(JournalEntry, entry_id)
+        finally:
+            session.close()
+
+    def load_content(self, entry: JournalEntry) -> TweetModel | TweetThreadModel:
+        """Parse the recorded content of an entry"""
+        return CONTENT_MODELS[entry.kind].model_validate_json(entry.content)
+
+    def planned_tweets(self, entry_id: int) -> list[JournalTweet]:
+        """Return the planned tweets of an entry in posting order"""
+        session = self.Session()
+        try:
+            return (
+                session.query(JournalTweet)
+                .filter_by(entry_id=entry_id)
+                .order_by(JournalTweet.position)
+                .all()
+            )
+        finally:
+            session.close()
+
+    def unfinished(self) -> list[JournalEntry]:
+        """Return entries that were not completely posted, oldest first"""
+        session = self.Session()
+        try:
+            return (
+                session.query(JournalEntry)
+                .filter(JournalEntry.status.in_(UNFINISHED_STATUSES))
+                .order_by(JournalEntry.created_at)
+                .all()
+            )
+        finally:
+            session.close()
+
+    def set_status(self, entry_id: int, status: str, error: str = None) -> None:
+        session = self.Session()
+        try:
+            entry = session.get(JournalEntry, entry_id)
+            entry.status = status
+            entry.error = error
+            entry.updated_at = datetime.now(timezone.utc)
+            session.commit()
+        finally:
+            session.close()
+
+    def mark_posted(self, entry_id: int, position: int, tweet_id: str) -> None:
+        """Record the ID of a posted tweet"""
+        self._update_tweet(entry_id, position, tweet_id=str(tweet_id), posted_at=datetime.now(timezone.utc))
+
+    def _update_tweet(self, entry_id: int, position: int, **values) -> None:
+        session = self.Session()
+        try:
+            session.query(JournalTweet).filter_by(entry_id=entry_id, position=position).update(values)
+            session.commit()
+        finally:
+            session.close()
+
+    # ThreadPoster checkpoint interface
+
+    def get_checkpoint(self, entry_id: int) -> Optional[dict]:
+        """Return the last contiguously posted tweet as {'index', 'tweet_id', 'done'}"""
+        last = None
+        for tweet in self.planned_tweets(entry_id):
+            if not tweet.tweet_id:
+                break
+            last = tweet
+        if last is None:
+            return None
+        return {"index": last.position, "tweet_id": last.tweet_id, "done": self.get_entry(entry_id).status == "done"}
+
+    def mark_attempt(self, entry_id: int, index: int) -> None:
+        """Record that a tweet is about to be posted"""
+        self._update_tweet(entry_id, index, attempted_at=datetime.now(timezone.utc))
+
+    def save_checkpoint(self, entry_id: int, index: int, tweet_id: str, done: bool = False) -> None:
+        if done:
+            self.set_status(entry_id, "done")
+        else:
+            self.mark_posted(entry_id, index, tweet_id)
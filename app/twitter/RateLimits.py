@@ -0,0 +1,118 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.core import metrics
+from app.core.exceptions import TwitterRateLimitError
+from app.core.tracing import RATE_LIMIT, span
+
+# Length of the Twitter rate limit windows, in seconds
+RATE_LIMIT_WINDOW = 15 * 60
+
+# Numeric path segments (user and tweet IDs, not the API version) are folded so
+# one endpoint has one budget
+_ID_SEGMENT = re.compile(r"(?<=\w)/\d+(?=/|$)")
+
+
+def endpoint(method: str, route: str) -> Tuple[str, str]:
+    """The (method, route) key of a request, with IDs replaced by ':id'"""
+    return method.upper(), _ID_SEGMENT.sub("/:id", route.split("?")[0])
+
+
+@dataclass
+class RateLimit:
+    limit: int
+    remaining: int
+    reset: float    # epoch seconds the window resets at
+
+
+class RateLimits:
+    """
+    Request budgets of the Twitter endpoints, read from the x-rate-limit-limit,
+    x-rate-limit-remaining and x-rate-limit-reset headers of every response.
+
+    `delay()` paces calls to an endpoint so its remaining requests are spread
+    over what is left of the window, instead of sleeping a fixed time between
+    calls or bursting into a 429. `check()` fails fast on an exhausted
+    endpoint and `retry_after()` tells the scheduler how long to defer work
+    on it, so one exhausted endpoint does not block calls to the others.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._limits: Dict[Tuple[str, str], RateLimit] = {}
+        self._lock = threading.Lock()
+
+    def update(self, method: str, route: str, headers) -> Optional[RateLimit]:
+        """Record the budget announced by the headers of a response"""
+        try:
+            limit = RateLimit(
+                limit=int(headers["x-rate-limit-limit"]),
+                remaining=int(headers["x-rate-limit-remaining"]),
+                reset=float(headers["x-rate-limit-reset"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+        key = endpoint(method, route)
+        with self._lock:
+            self._limits[key] = limit
+        metrics.twitter_rate_limit_remaining.set(limit.remaining, method=key[0], route=key[1])
+        return limit
+
+    def get(self, method: str, route: str) -> Optional[RateLimit]:
+        limit = self._limits.get(endpoint(method, route))
+        if limit is not None and limit.reset <= self.clock():
+            # The window has reset since the last response
+            return None
+        return limit
+
+    def retry_after(self, endpoints: Iterable[Tuple[str, str]]) -> float:
+        """Seconds until every endpoint of `endpoints` has requests left, 0 when they all have"""
+        seconds = 0.0
+        for method, route in endpoints:
+            limit = self.get(method, route)
+            if limit is not None and limit.remaining <= 0:
+                seconds = max(seconds, limit.reset - self.clock())
+        return seconds
+
+    def check(self, method: str, route: str) -> None:
+        """Raise TwitterRateLimitError instead of making a call that would get a 429"""
+        seconds = self.retry_after([(method, route)])
+        if seconds > 0:
+            raise TwitterRateLimitError(" ".join(endpoint(method, route)), seconds)
+
+    def budgets(self) -> Dict[str, dict]:
+        """Remaining requests of every endpoint seen in the current window, keyed by 'METHOD route'"""
+        now = self.clock()
+        with self._lock:
+            limits = sorted(self._limits.items())
+        return {
+            f"{method} {route}": {
+                "limit": limit.limit,
+                "remaining": limit.remaining,
+                "reset_in": round(limit.reset - now, 1),
+            }
+            for (method, route), limit in limits
+            if limit.reset > now
+        }
+
+    def delay(self, method: str, route: str) -> float:
+        """Seconds to wait before the next call so the budget lasts until the window resets"""
+        limit = self.get(method, route)
+        if limit is None:
+            return 0.0
+        left = max(limit.reset - self.clock(), 0.0)
+        if limit.remaining <= 0:
+            return left
+        return left / (limit.remaining + 1)
+
+    def wait(self, method: str, route: str, sleep=time.sleep) -> float:
+        """Sleep for `delay()`, returns the seconds slept"""
+        seconds = self.delay(method, route)
+        if seconds > 0:
+            with span(f"twitter rate limit {method} {endpoint(method, route)[1]}", kind=RATE_LIMIT):
+                sleep(seconds)
+            metrics.rate_limit_sleep_seconds.inc(seconds, service="twitter")
+        return seconds
@@ -0,0 +1,107 @@
+from typing import List, Optional
+
+from app.twitter.TimelineRanker import estimate_tokens
+from app.twitter.TweetRecord import Conversation, TweetRecord
+from app.utils.utils import format_tweet_timeline
+
+
+class ReplyContextBuilder:
+    """
+    Picks the tweets of a conversation the reply generator gets to see.
+
+    The tweet we reply to and the tweets it replies to, up to the root, are
+    the context. Replies in other branches are left out except for the latest
+    few, and a note says how many were left out and by whom. When the chain
+    is longer than the token budget the oldest replies below the root are
+    dropped first, so the root and the latest replies are always kept.
+    """
+
+    def __init__(self, token_budget: int = 1500, side_tweets: int = 2):
+        """
+        Initialize the builder
+
+        Args:
+            token_budget (int): Estimated prompt tokens the context may take
+            side_tweets (int): Latest tweets of other branches kept
+        """
+        self.token_budget = token_budget
+        self.side_tweets = side_tweets
+
+    @staticmethod
+    def note(text: str) -> TweetRecord:
+        """A stand-in for left out tweets"""
+        return TweetRecord(id="omitted", text=text, username="context")
+
+    @staticmethod
+    def ancestors(conversation: Conversation, tweet: TweetRecord) -> List[TweetRecord]:
+        """The tweet and the tweets of the conversation it replies to, root first"""
+        by_id = {t.id: t for t in conversation}
+        chain = [tweet]
+        seen = {tweet.id}
+        parent = by_id.get(tweet.in_reply_to_tweet_id)
+        while parent is not None and parent.id not in seen:
+            chain.append(parent)
+            seen.add(parent.id)
+            parent = by_id.get(parent.in_reply_to_tweet_id)
+        return chain[::-1]
+
+    def build(self, conversation: Conversation, reply_to: Optional[TweetRecord] = None) -> List[TweetRecord]:
+        """
+        Return the context of a reply, oldest first
+
+        Args:
+            conversation (Conversation): The conversation
+            reply_to (TweetRecord, optional): The tweet replied to, the last tweet by default
+        """
+        reply_to = reply_to or conversation.last_tweet
+        if reply_to is None:
+            return []
+
+        chain = self.ancestors(conversation, reply_to)
+        if len(chain) == 1 and reply_to.in_reply_to_tweet_id is None and reply_to.id != conversation.id:
+            # A reply stored without its reply link, the tweets before it stand in for the chain
+            tweets = conversation.tweets
+            index = next((i for i, t in enumerate(tweets) if t.id == reply_to.id), len(tweets))
+            chain, side = [*tweets[:index], reply_to], []
+        else:
+            on_chain = {t.id for t in chain}
+            side = [t for t in conversation if t.id not in on_chain]
+
+        kept_side = side[-self.side_tweets:] if self.side_tweets else []
+        omitted = side[:len(side) - len(kept_side)]
+
+        cost = {t.id: estimate_tokens(format_tweet_timeline([t])) for t in [*chain, *kept_side]}
+        budget = self.token_budget
+
+        # The replied tweet and the root first, then the chain from the bottom up, then side replies
+        required = [reply_to] if len(chain) == 1 else [chain[0], reply_to]
+        kept = {t.id for t in required}
+        budget -= sum(cost[t.id] for t in required)
+        dropped_chain = 0
+        for tweet in reversed(chain[1:-1]):
+            # Once a tweet does not fit the older ones are dropped too, the chain keeps no gaps
+            if not dropped_chain and cost[tweet.id] <= budget:
+                kept.add(tweet.id)
+                budget -= cost[tweet.id]
+            else:
+                dropped_chain += 1
+        for tweet in reversed(kept_side):
+            if cost[tweet.id] <= budget:
+                kept.add(tweet.id)
+                budget -= cost[tweet.id]
+            else:
+                omitted.append(tweet)
+
+        context = [t for t in conversation if t.id in kept]
+        if reply_to.id not in conversation:
+            context.append(reply_to)
+        if dropped_chain:
+            # Right after the root, where the dropped tweets were
+            context.insert(1, self.note(f"[{dropped_chain} earlier replies in this thread omitted]"))
+        if omitted:
+            authors = ", ".join(sorted({f"@{t.username}" for t in omitted}))
+            context.insert(
+                len(context) - 1,
+                self.note(f"[{len(omitted)} replies in other branches omitted, from {authors}]"),
+            )
+        return context
@@ -0,0 +1,146 @@
+import math
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from app.db.models.ReplyQueue_model import ReplyQueueItem
+from app.twitter.TweetRecord import Conversation
+from app.utils.utils import spam_score
+
+# Failed replies are retried in later runs up to this many attempts
+MAX_ATTEMPTS = 3
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """SQLite keeps naive UTC datetimes"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+class ReplyQueue:
+    """
+    Persistent priority queue of the conversations waiting for our reply.
+
+    A conversation is queued with the tweet to answer, and queued again with
+    the newer tweet when someone replies before we do. Its priority grows
+    with the follower count of the author and the size of the conversation,
+    shrinks with the spam score of the tweet, and decays with the age of the
+    tweet. A conversation not answered before its deadline ages out, so a
+    backlog of old mentions never holds back new ones.
+    """
+
+    # Weights of the priority terms
+    RECENCY_WEIGHT = 2.0
+    FOLLOWERS_WEIGHT = 0.5
+    SIZE_WEIGHT = 0.5
+    SPAM_WEIGHT = 1.0
+
+    def __init__(self, Session, ttl: timedelta = timedelta(hours=6), half_life_hours: float = 1.0):
+        """
+        Initialize the queue
+
+        Args:
+            Session (sessionmaker): Session factory of the tweets database
+            ttl (timedelta): How long after the tweet to answer a conversation ages out
+            half_life_hours (float): Age at which the recency term is halved
+        """
+        self.Session = Session
+        self.ttl = ttl
+        self.half_life_hours = half_life_hours
+
+    def score(self, conversation: Conversation, followers: int = 0) -> float:
+        """The priority of a conversation without the recency term"""
+        tweet = conversation.last_tweet
+        return (
+            self.FOLLOWERS_WEIGHT * math.log1p(followers)
+            + self.SIZE_WEIGHT * math.log1p(len(conversation))
+            - self.SPAM_WEIGHT * spam_score({"text": tweet.text, "username": tweet.username})
+        )
+
+    def priority(self, item: ReplyQueueItem, now: datetime = None) -> float:
+        now = _naive_utc(now or datetime.now(timezone.utc))
+        age_hours = max((now - item.mentioned_at).total_seconds() / 3600, 0)
+        return item.score + self.RECENCY_WEIGHT * 0.5 ** (age_hours / self.half_life_hours)
+
+    def push(self, conversation: Conversation, followers: int = 0, now: datetime = None) -> None:
+        """
+        Queue a conversation to answer its last tweet
+
+        Args:
+            conversation (Conversation): The conversation
+            followers (int): Follower count of the author of the last tweet
+            now (datetime, optional): Current time, used when the tweet has none
+        """
+        tweet = conversation.last_tweet
+        mentioned_at = _naive_utc(tweet.created_at or now or datetime.now(timezone.utc))
+        session = self.Session()
+        try:
+            item = session.query(ReplyQueueItem).filter_by(conversation_id=conversation.id).first()
+            if item is None:
+                item = ReplyQueueItem(conversation_id=conversation.id, attempts=0)
+                session.add(item)
+            elif item.reply_to_tweet_id != tweet.id:
+                # A newer tweet to answer, whatever happened to the previous one
+                item.attempts = 0
+                item.error = None
+            elif item.status != "pending":
+                return
+            item.reply_to_tweet_id = tweet.id
+            item.author_id = tweet.author_id
+            item.username = tweet.username
+            item.score = self.score(conversation, followers)
+            item.mentioned_at = mentioned_at
+            item.deadline = mentioned_at + self.ttl
+            item.status = "pending"
+            item.updated_at = datetime.now(timezone.utc)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def expire(self, now: datetime = None) -> int:
+        """Age out the pending conversations past their deadline, returns how many"""
+        now = _naive_utc(now or datetime.now(timezone.utc))
+        session = self.Session()
+        try:
+            expired = (
+                session.query(ReplyQueueItem)
+                .filter(ReplyQueueItem.status == "pending", ReplyQueueItem.deadline < now)
+                .update({"status": "expired", "updated_at": now}, synchronize_session=False)
+            )
+            session.commit()
+            return expired
+        finally:
+            session.close()
+
+    def pending(self, now: datetime = None) -> List[ReplyQueueItem]:
+        """The pending conversations within their deadline, highest priority first"""
+        now = now or datetime.now(timezone.utc)
+        session = self.Session()
+        try:
+            items = (
+                session.query(ReplyQueueItem)
+                .filter(ReplyQueueItem.status == "pending", ReplyQueueItem.deadline >= _naive_utc(now))
+                .all()
+            )
+        finally:
+            session.close()
+        return sorted(items, key=lambda item: self.priority(item, now), reverse=True)
+
+    def set_status(self, conversation_id, status: str, error: str = None) -> None:
+        """Mark a conversation done or expired, or record a failed reply that is retried later"""
+        session = self.Session()
+        try:
+            item = session.query(ReplyQueueItem).filter_by(conversation_id=str(conversation_id)).first()
+            if item is None:
+                return
+            if status == "failed":
+                item.attempts = (item.attempts or 0) + 1
+                if item.attempts < MAX_ATTEMPTS:
+                    status = "pending"
+            item.status = status
+            item.error = error
+            item.updated_at = datetime.now(timezone.utc)
+            session.commit()
+        finally:
+            session.close()
@@ -0,0 +1,221 @@
+import contextvars
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Sequence
+
+from app.ai.models import TweetModel
+
+# Marks the end of the stream between pipeline stages
+_DONE = object()
+
+
+@dataclass
+class PostedTweet:
+    """Timing of a single posted tweet of a thread"""
+    index: int
+    tweet_id: str
+    ready_after: float      # seconds from start until the tweet left the last stage
+    posted_after: float     # seconds from start until the tweet was posted
+    post_seconds: float     # duration of the create_tweet call
+
+
+class StorageCheckpoints:
+    """Thread checkpoints kept in the key-value Storage"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @staticmethod
+    def key(thread_key: str) -> str:
+        return f"thread_checkpoint:{thread_key}"
+
+    def get_checkpoint(self, thread_key: str) -> Optional[dict]:
+        """Return the last posted tweet of a thread as {'index', 'tweet_id', 'done'}"""
+        value = self.storage.get(self.key(thread_key))
+        if isinstance(value, str):
+            # Stored as a JSON string before Storage kept value types
+            value = json.loads(value)
+        return value or None
+
+    def mark_attempt(self, thread_key: str, index: int) -> None:
+        """Called right before a tweet is posted"""
+        pass
+
+    def save_checkpoint(self, thread_key: str, index: int, tweet_id: str, done: bool = False) -> None:
+        self.storage.set(self.key(thread_key), {"index": index, "tweet_id": tweet_id, "done": done})
+
+
+class _StageFailed:
+    """Carries an exception raised in a worker thread to the poster"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class ThreadPoster:
+    """
+    Post a thread while its later tweets are still being produced.
+
+    Tweets are taken from an iterator (for example a streamed generation) and
+    passed through a pipeline of stages (tone, format, validation), each
+    running in its own worker thread, so tweet 1 can be posted while tweet 2 is
+    formatted and tweet 3 is still being generated. After every posted tweet
+    the thread checkpoint is saved (in Storage by default, or in the posting
+    journal), and a later call with the same thread key continues after the
+    last posted tweet.
+    """
+
+    def __init__(
+        self,
+        client,
+        checkpoints,
+        stages: Sequence[Callable[[TweetModel], TweetModel]] = (),
+        queue_size: int = 0,
+    ):
+        """
+        Initialize the poster
+
+        Args:
+            client (TwitterClient): Client used to post the tweets
+            checkpoints (StorageCheckpoints | PostingJournal): Store for the thread checkpoints
+            stages (Sequence[Callable]): Functions applied to every tweet, in order
+            queue_size (int): Maximum number of tweets buffered between stages, 0 for unbounded
+        """
+        self.client = client
+        self.checkpoints = checkpoints
+        self.stages = list(stages)
+        self.queue_size = queue_size
+
+    def get_checkpoint(self, thread_key) -> Optional[dict]:
+        """Return the last posted tweet of a thread as {'index', 'tweet_id', 'done'}"""
+        return self.checkpoints.get_checkpoint(thread_key)
+
+    def post(
+        self,
+        tweets: Iterable[TweetModel],
+        thread_key,
+        on_posted: Callable[[TweetModel, PostedTweet], None] = None,
+        in_reply_to_tweet_id: str = None,
+    ) -> list[PostedTweet]:
+        """
+        Post tweets as they come out of the pipeline
+
+        Args:
+            tweets (Iterable[TweetModel]): Source of the thread tweets, in order
+            thread_key (str): Identifies the thread for checkpointing and resuming
+            on_posted (Callable, optional): Called after each tweet is posted
+            in_reply_to_tweet_id (str, optional): Tweet the first tweet replies to
+
+        Returns:
+            list[PostedTweet]: Timing of the tweets posted by this call
+
+        Raises:
+            Exception: Any error raised by the source, a stage or the client. The
+                checkpoint keeps the last posted tweet so the thread can be resumed.
+        """
+        checkpoint = self.get_checkpoint(thread_key)
+        if checkpoint and checkpoint["done"]:
+            return []
+        skip_until = checkpoint["index"] if checkpoint else -1
+        previous_id = checkpoint["tweet_id"] if checkpoint else in_reply_to_tweet_id
+
+        started = time.monotonic()
+        stop = threading.Event()
+        source = (
+            (index, tweet) for index, tweet in enumerate(tweets) if index > skip_until
+        )
+        output = self._start_pipeline(source, stop)
+
+        posted = []
+        last_index = skip_until
+        try:
+            while True:
+                item = output.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _StageFailed):
+                    raise item.error
+
+                index, tweet = item
+                ready_after = time.monotonic() - started
+                post_started = time.monotonic()
+                self.checkpoints.mark_attempt(thread_key, index)
+                previous_id = self.client.post_thread_tweet(tweet, in_reply_to_tweet_id=previous_id)
+                now = time.monotonic()
+                last_index = index
+                self.checkpoints.save_checkpoint(thread_key, index, previous_id)
+
+                result = PostedTweet(
+                    index=index,
+                    tweet_id=previous_id,
+                    ready_after=ready_after,
+                    posted_after=now - started,
+                    post_seconds=now - post_started,
+                )
+                posted.append(result)
+                if on_posted:
+                    on_posted(tweet, result)
+        finally:
+            stop.set()
+
+        self.checkpoints.save_checkpoint(thread_key, last_index, previous_id, done=True)
+        return posted
+
+    def _start_pipeline(self, source, stop: threading.Event) -> queue.Queue:
+        """Start one worker per stage and return the queue of finished tweets"""
+        inbox = queue.Queue(self.queue_size)
+        # Workers run in a copy of the caller's context, so their spans and LLM usage count towards its run
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(self._produce, source, inbox, stop), daemon=True
+        ).start()
+
+        for stage in self.stages:
+            outbox = queue.Queue(self.queue_size)
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._run_stage, stage, inbox, outbox, stop),
+                daemon=True,
+            ).start()
+            inbox = outbox
+        return inbox
+
+    @staticmethod
+    def _put(target: queue.Queue, item, stop: threading.Event) -> bool:
+        """Put an item unless the pipeline was stopped, returns False when stopped"""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, source, outbox: queue.Queue, stop: threading.Event):
+        try:
+            for item in source:
+                if not self._put(outbox, item, stop):
+                    return
+            self._put(outbox, _DONE, stop)
+        except BaseException as e:
+            self._put(outbox, _StageFailed(e), stop)
+
+    def _run_stage(self, stage, inbox: queue.Queue, outbox: queue.Queue, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE or isinstance(item, _StageFailed):
+                self._put(outbox, item, stop)
+                return
+            index, tweet = item
+            try:
+                item = (index, stage(tweet))
+            except BaseException as e:
+                self._put(outbox, _StageFailed(e), stop)
+                return
+            if not self._put(outbox, item, stop):
+                return
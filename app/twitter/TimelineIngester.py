@@ -0,0 +1,148 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.db.models.TimelineTweet_model import TimelineTweet
+from app.twitter.IndexedResponse import IndexedResponse
+from app.twitter.TweetRecord import TweetRecord
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_TWEET_FIELDS = [
+    "author_id",
+    "in_reply_to_user_id",
+    "conversation_id",
+    "created_at",
+    "text",
+    "id",
+    "public_metrics",
+    "referenced_tweets",
+]
+# Engagement counts of public_metrics kept with each tweet
+PUBLIC_METRICS = ("like_count", "retweet_count", "reply_count", "quote_count")
+TIMELINE_EXPANSIONS = ["author_id", "referenced_tweets.id", "referenced_tweets.id.author_id"]
+
+
+class TimelineIngester:
+    """
+    Keeps the home timeline in the tweets database.
+
+    `sync()` only asks the API for tweets newer than the last one seen, page by
+    page, and stores each tweet once. If a sync stops at `max_pages` the
+    pagination token is kept and the next sync continues from it, so no part
+    of the timeline is skipped. Post generation then reads the last hours of
+    timeline with `recent()` instead of fetching it again.
+    """
+
+    def __init__(self, twitter_client, max_pages: int = 5, page_size: int = 100):
+        """
+        Initialize the ingester
+
+        Args:
+            twitter_client (TwitterClient): Client whose API, database and Storage are used
+            max_pages (int): Most pages requested by one sync
+            page_size (int): Tweets per page, at most 100
+        """
+        self.twitter = twitter_client
+        self.max_pages = max_pages
+        self.page_size = page_size
+
+    @property
+    def state_key(self) -> str:
+        return f"timeline:{self.twitter.user_id}"
+
+    def sync(self) -> int:
+        """
+        Fetch the tweets added to the home timeline since the last sync
+
+        Returns:
+            int: Number of tweets stored for the first time
+        """
+        state = self.twitter.storage.get(self.state_key) or {}
+        since_id = state.get("since_id")
+        # Continue an interrupted pagination, the newest ID was seen on its first page
+        pagination_token = state.get("next_token")
+        newest_id = state.get("newest_id") if pagination_token else None
+
+        stored = 0
+        for _ in range(self.max_pages):
+            response = IndexedResponse(self.twitter.client.get_home_timeline(
+                since_id=since_id,
+                pagination_token=pagination_token,
+                max_results=self.page_size,
+                tweet_fields=TIMELINE_TWEET_FIELDS,
+                expansions=TIMELINE_EXPANSIONS,
+                user_fields=["username"],
+                user_auth=True,
+            ))
+            newest_id = newest_id or response.meta.get("newest_id")
+            stored += self.store([TweetRecord.from_tweet(tweet, response) for tweet in response.data])
+            pagination_token = response.meta.get("next_token")
+            if not pagination_token:
+                break
+
+        if pagination_token:
+            state = {"since_id": since_id, "next_token": pagination_token, "newest_id": newest_id}
+        else:
+            state = {"since_id": newest_id or since_id}
+        self.twitter.storage.set(self.state_key, state)
+        logger.info(f"Stored {stored} new timeline tweets")
+        return stored
+
+    def store(self, tweets: list) -> int:
+        """Store the tweets not stored yet, returns how many were new"""
+        unique = {}
+        for tweet in tweets:
+            unique.setdefault(tweet.id, tweet)
+        if not unique:
+            return 0
+
+        session = self.twitter.Session()
+        try:
+            existing = {
+                row[0]
+                for row in session.query(TimelineTweet.tweet_id).filter(TimelineTweet.tweet_id.in_(list(unique)))
+            }
+            new = [tweet for tweet_id, tweet in unique.items() if tweet_id not in existing]
+            session.add_all(
+                TimelineTweet(
+                    **{name: (tweet.public_metrics or {}).get(name) for name in PUBLIC_METRICS},
+                    tweet_id=tweet.id,
+                    text=tweet.text,
+                    author_id=tweet.author_id,
+                    username=tweet.username,
+                    conversation_id=tweet.conversation_id,
+                    in_reply_to_user_id=tweet.in_reply_to_user_id,
+                    retweeted_id=tweet.retweeted_id,
+                    # Stored as naive UTC like the other tables
+                    created_at=tweet.created_at.replace(tzinfo=None) if tweet.created_at else None,
+                )
+                for tweet in new
+            )
+            session.commit()
+            return len(new)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def recent(self, hours: float = 24, limit: int = 100, filter_self: bool = True) -> list:
+        """
+        Return the stored timeline of the last `hours`, newest first
+
+        Args:
+            hours (float): How far back the timeline goes
+            limit (int): Most tweets returned
+            filter_self (bool): Leave out our own tweets
+        """
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=hours)
+        session = self.twitter.Session()
+        try:
+            query = session.query(TimelineTweet).filter(TimelineTweet.created_at >= cutoff)
+            if filter_self:
+                query = query.filter(TimelineTweet.author_id != str(self.twitter.user_id))
+            # Tweet IDs grow with time, they order tweets of the same second
+            rows = query.order_by(TimelineTweet.created_at.desc(), TimelineTweet.tweet_id.desc()).limit(limit).all()
+            return [TweetRecord.from_row(row) for row in rows]
+        finally:
+            session.close()
@@ -0,0 +1,143 @@
+import math
+import re
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import func
+
+from app.db.models.Tweet_model import Tweet
+from app.twitter.TweetRecord import TweetRecord
+from app.utils.utils import SPAM_THRESHOLD, format_tweet_timeline, spam_score
+
+URL_PATTERN = re.compile(r"https?://\S+")
+MENTION_PATTERN = re.compile(r"@\w+")
+RETWEET_PREFIX = re.compile(r"^RT @\w+:\s*")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, about 4 characters per token for the GPT tokenizers"""
+    return len(text) // 4 + 1
+
+
+class TimelineRanker:
+    """
+    Picks the timeline tweets worth sending to the generator.
+
+    Spam and posts that are only links or mentions are dropped, retweets of
+    the same tweet are collapsed into one, and the rest is scored by
+    engagement, how often the author shows up in our conversations, and age.
+    The best tweets are kept as long as they fit the token budget.
+    """
+
+    # Weights of the score terms
+    ENGAGEMENT_WEIGHT = 1.0
+    AFFINITY_WEIGHT = 1.5
+    SPAM_WEIGHT = 0.5
+    REPEAT_WEIGHT = 0.5     # per log of the times the same tweet is retweeted in the timeline
+
+    def __init__(self, Session=None, half_life_hours: float = 6.0):
+        """
+        Initialize the ranker
+
+        Args:
+            Session (sessionmaker, optional): Tweets database session factory, used for author affinity
+            half_life_hours (float): Age at which a tweet scores half as much
+        """
+        self.Session = Session
+        self.half_life_hours = half_life_hours
+
+    def author_affinity(self, author_ids) -> Dict[str, int]:
+        """Number of stored conversation tweets per author"""
+        author_ids = [author_id for author_id in set(author_ids) if author_id]
+        if self.Session is None or not author_ids:
+            return {}
+        session = self.Session()
+        try:
+            rows = (
+                session.query(Tweet.author_id, func.count(Tweet.id))
+                .filter(Tweet.author_id.in_(author_ids))
+                .group_by(Tweet.author_id)
+            )
+            return {author_id: count for author_id, count in rows}
+        finally:
+            session.close()
+
+    @staticmethod
+    def is_noise(tweet: TweetRecord) -> bool:
+        """Spam, or nothing but links and mentions"""
+        text = MENTION_PATTERN.sub("", URL_PATTERN.sub("", RETWEET_PREFIX.sub("", tweet.text)))
+        if len(text.strip()) < 3:
+            return True
+        return spam_score({"text": tweet.text, "username": tweet.username}) >= SPAM_THRESHOLD
+
+    @staticmethod
+    def original_key(tweet: TweetRecord) -> str:
+        """The same key for a tweet and all of its retweets"""
+        if tweet.retweeted_id:
+            return tweet.retweeted_id
+        if RETWEET_PREFIX.match(tweet.text):
+            # Retweets without referenced_tweets, match them on the retweeted text
+            return "text:" + RETWEET_PREFIX.sub("", tweet.text)
+        return tweet.id
+
+    def score(self, tweet: TweetRecord, affinity: int = 0, repeats: int = 0, now: datetime = None) -> float:
+        metrics = tweet.public_metrics or {}
+        engagement = (
+            (metrics.get("like_count") or 0)
+            + (metrics.get("reply_count") or 0)
+            + 2 * (metrics.get("retweet_count") or 0)
+            + 2 * (metrics.get("quote_count") or 0)
+        )
+        score = (
+            1.0
+            + self.ENGAGEMENT_WEIGHT * math.log1p(engagement)
+            + self.AFFINITY_WEIGHT * math.log1p(affinity)
+            + self.REPEAT_WEIGHT * math.log1p(repeats)
+        )
+        if tweet.created_at is not None:
+            age_hours = ((now or datetime.now(timezone.utc)) - tweet.created_at).total_seconds() / 3600
+            score *= 0.5 ** (max(age_hours, 0) / self.half_life_hours)
+        # Subtracted after the decay, which would otherwise pull an old spam tweet's score up towards 0
+        return score - self.SPAM_WEIGHT * spam_score({"text": tweet.text, "username": tweet.username})
+
+    def rank(self, tweets: List[TweetRecord], now: datetime = None) -> List[TweetRecord]:
+        """Drop noise and repeated retweets, and sort the rest best first"""
+        candidates = [tweet for tweet in tweets if not self.is_noise(tweet)]
+        affinity = self.author_affinity(tweet.author_id for tweet in candidates)
+
+        # One tweet per original, the original itself when it is in the timeline
+        groups: Dict[str, List[TweetRecord]] = {}
+        for tweet in candidates:
+            groups.setdefault(self.original_key(tweet), []).append(tweet)
+
+        now = now or datetime.now(timezone.utc)
+        scored = []
+        for key, group in groups.items():
+            originals = [tweet for tweet in group if tweet.id == key]
+            tweet = originals[0] if originals else group[0]
+            scored.append((self.score(tweet, affinity.get(tweet.author_id, 0), len(group) - 1, now), tweet))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [tweet for _, tweet in scored]
+
+    def select(
+        self, tweets: List[TweetRecord], max_tweets: int = 40, token_budget: int = 2000, now: datetime = None
+    ) -> List[TweetRecord]:
+        """
+        Keep the best tweets that fit the token budget, in their timeline order
+
+        Args:
+            tweets (list): TweetRecords of the timeline
+            max_tweets (int): Most tweets kept
+            token_budget (int): Estimated prompt tokens the kept tweets may take
+        """
+        kept = set()
+        tokens = 0
+        for tweet in self.rank(tweets, now):
+            if len(kept) >= max_tweets:
+                break
+            cost = estimate_tokens(format_tweet_timeline([tweet]))
+            if tokens + cost > token_budget:
+                continue
+            kept.add(tweet.id)
+            tokens += cost
+        return [tweet for tweet in tweets if tweet.id in kept]
@@ -0,0 +1,173 @@
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Set
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Tweepy returns aware datetimes, SQLite naive UTC ones, make them comparable"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _id(value) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+# Tweet IDs are snowflakes, milliseconds since this epoch shifted left by 22 bits
+TWITTER_EPOCH_MS = 1288834974657
+
+
+def snowflake_time(tweet_id) -> datetime:
+    """The time a tweet was posted, read from its ID"""
+    return datetime.fromtimestamp(((int(tweet_id) >> 22) + TWITTER_EPOCH_MS) / 1000, tz=timezone.utc)
+
+
+class TweetRecord:
+    """
+    A tweet as it moves through the pipeline, from the API or the database to
+    the prompts. IDs are always strings, so tweets of the API and of the
+    database land in the same conversation, and times are always aware UTC.
+    """
+
+    __slots__ = ("id", "text", "username", "author_id", "conversation_id", "in_reply_to_user_id", "created_at",
+                 "public_metrics", "retweeted_id", "in_reply_to_tweet_id")
+
+    def __init__(
+        self,
+        id,
+        text: str,
+        username: str = "unknown",
+        author_id=None,
+        conversation_id=None,
+        in_reply_to_user_id=None,
+        created_at: Optional[datetime] = None,
+        public_metrics: Optional[dict] = None,
+        retweeted_id=None,
+        in_reply_to_tweet_id=None,
+    ):
+        self.id = str(id)
+        self.text = text
+        self.username = username
+        self.author_id = _id(author_id)
+        self.conversation_id = _id(conversation_id)
+        self.in_reply_to_user_id = _id(in_reply_to_user_id)
+        self.created_at = _as_utc(created_at)
+        # like_count, retweet_count, reply_count and quote_count when requested
+        self.public_metrics = public_metrics
+        self.retweeted_id = _id(retweeted_id)
+        # The tweet this one replies to, links the reply chain of a conversation
+        self.in_reply_to_tweet_id = _id(in_reply_to_tweet_id)
+
+    @classmethod
+    def from_tweet(cls, tweet, response=None) -> "TweetRecord":
+        """
+        Build a record from a tweepy Tweet
+
+        Args:
+            tweet (tweepy.Tweet): The tweet
+            response (IndexedResponse, optional): Response the tweet came with, to resolve its author
+        """
+        references = getattr(tweet, "referenced_tweets", None) or ()
+        return cls(
+            id=tweet.id,
+            text=tweet.text,
+            username=response.username(tweet) if response is not None else "unknown",
+            author_id=tweet.author_id,
+            conversation_id=getattr(tweet, "conversation_id", None),
+            in_reply_to_user_id=getattr(tweet, "in_reply_to_user_id", None),
+            created_at=getattr(tweet, "created_at", None),
+            public_metrics=getattr(tweet, "public_metrics", None),
+            retweeted_id=next((ref.id for ref in references if ref.type == "retweeted"), None),
+            in_reply_to_tweet_id=next((ref.id for ref in references if ref.type == "replied_to"), None),
+        )
+
+    @classmethod
+    def from_row(cls, row) -> "TweetRecord":
+        """Build a record from a row of the tweets or timeline_tweets table"""
+        like_count = getattr(row, "like_count", None)
+        return cls(
+            id=row.tweet_id,
+            text=row.text,
+            username=row.username,
+            author_id=row.author_id,
+            conversation_id=row.conversation_id,
+            in_reply_to_user_id=row.in_reply_to_user_id,
+            created_at=row.created_at,
+            public_metrics=None if like_count is None else {
+                "like_count": like_count,
+                "retweet_count": row.retweet_count,
+                "reply_count": row.reply_count,
+                "quote_count": row.quote_count,
+            },
+            retweeted_id=getattr(row, "retweeted_id", None),
+            in_reply_to_tweet_id=getattr(row, "in_reply_to_tweet_id", None),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, TweetRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"TweetRecord(id={self.id!r}, username={self.username!r}, created_at={self.created_at!r})"
+
+
+# Tweets without a time sort first
+_NO_TIME = datetime.min.replace(tzinfo=timezone.utc)
+
+
+class Conversation:
+    """
+    The tweets of a conversation ordered by time, with its participants and
+    the time of the last tweet and of our last tweet kept up to date as
+    tweets are added. A tweet already in the conversation is not added twice.
+    """
+
+    __slots__ = ("id", "our_username", "tweets", "participants", "last_tweet_time", "our_last_tweet_time",
+                 "_keys", "_ids")
+
+    def __init__(self, conversation_id, our_username: Optional[str] = None):
+        self.id = _id(conversation_id)
+        self.our_username = our_username
+        self.tweets: List[TweetRecord] = []
+        self.participants: Set[str] = set()
+        self.last_tweet_time: Optional[datetime] = None
+        self.our_last_tweet_time: Optional[datetime] = None
+        # Sort keys parallel to `tweets`, bisect on them keeps the order on insert
+        self._keys = []
+        self._ids = set()
+
+    def add(self, tweet: TweetRecord) -> bool:
+        """Insert a tweet at its place in time, False when it already is in the conversation"""
+        if tweet.id in self._ids:
+            return False
+        self._ids.add(tweet.id)
+
+        key = (tweet.created_at or _NO_TIME, len(tweet.id), tweet.id)
+        index = bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self.tweets.insert(index, tweet)
+
+        self.participants.add(tweet.username)
+        if tweet.created_at is not None:
+            if self.last_tweet_time is None or tweet.created_at > self.last_tweet_time:
+                self.last_tweet_time = tweet.created_at
+            if tweet.username == self.our_username and (
+                self.our_last_tweet_time is None or tweet.created_at > self.our_last_tweet_time
+            ):
+                self.our_last_tweet_time = tweet.created_at
+        return True
+
+    @property
+    def last_tweet(self) -> Optional[TweetRecord]:
+        return self.tweets[-1] if self.tweets else None
+
+    def __contains__(self, tweet_id) -> bool:
+        return str(tweet_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self.tweets)
+
+    def __iter__(self) -> Iterator[TweetRecord]:
+        return iter(self.tweets)
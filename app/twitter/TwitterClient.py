@@ -1,10 +1,34 @@
+import hashlib
+import json
+import logging
+import time
 import tweepy
 from app.db.Init_db import init_db
 from app.db.models.Tweet_model import Tweet
 from app.db.models.Storage_model import Storage
 from datetime import datetime, timezone
-from app.utils.utils import is_likely_spam
+from app.utils.utils import is_likely_spam, normalize_tweet_text
 from app.ai.models import TweetModel, TweetThreadModel
+from app.twitter.ThreadPoster import ThreadPoster, StorageCheckpoints
+from app.twitter.PostingJournal import PostingJournal
+from app.twitter.ReplyQueue import ReplyQueue
+from app.twitter.IndexedResponse import IndexedResponse
+from app.twitter.TweetRecord import Conversation, TweetRecord
+from app.twitter.TimelineIngester import TimelineIngester
+from app.twitter.ConversationFetcher import ConversationFetcher
+from app.twitter.BulkFollower import BulkFollower
+from app.twitter.RateLimits import RATE_LIMIT_WINDOW, RateLimits, endpoint
+from app.core import metrics
+from app.core.exceptions import TwitterRateLimitError
+from app.core.tracing import HTTP, span
+
+logger = logging.getLogger(__name__)
+
+# Host tweepy sends every API v2 request to
+TWITTER_API_URL = "https://api.twitter.com"
+
+# Seconds a cached get_me() identity is trusted before it is revalidated
+IDENTITY_TTL = 24 * 60 * 60
 
 
 class TwitterClient:
@@ -16,6 +40,8 @@ class TwitterClient:
         access_token_secret,
         bearer_token,
         db_path="tweets.db",
+        identity_ttl=IDENTITY_TTL,
+        base_url=None,
     ):
         self.client = tweepy.Client(
             consumer_key=api_key,
@@ -23,63 +49,144 @@ class TwitterClient:
             access_token=access_token,
             access_token_secret=access_token_secret,
             bearer_token=bearer_token,
-            wait_on_rate_limit=True,
+            # A 429 raises TwitterRateLimitError instead of blocking the process
+            # until the window resets, see `_instrumented`
+            wait_on_rate_limit=False,
         )
+        self.rate_limits = RateLimits()
+        self.client.request = self._instrumented(self.client.request, self.rate_limits)
+        if base_url:
+            self._use_base_url(base_url)
         # Initialize database connection
         self.engine, Session = init_db(db_path)
         self.Session = Session
+        self.storage = Storage(db_path, legacy_path="storage.db")
+        self.journal = PostingJournal(Session)
+        self.timeline = TimelineIngester(self)
+        self.conversations = ConversationFetcher(self)
+        self.reply_queue = ReplyQueue(Session)
+        # Follower counts of the authors of the mentions, by user ID
+        self.follower_counts = {}
+
+        # The authenticated user is resolved on first use, see `identity`
+        self.identity_ttl = identity_ttl
+        self.identity_key = "identity:" + hashlib.sha256(
+            (access_token or "").encode()
+        ).hexdigest()[:16]
+        self._identity = None
+
+    def _use_base_url(self, base_url):
+        """Send the API requests to `base_url` instead of https://api.twitter.com, e.g. a local fake"""
+        session_request = self.client.session.request
+        base_url = base_url.rstrip("/")
+
+        def request(method, url, *args, **kwargs):
+            if url.startswith(TWITTER_API_URL):
+                url = base_url + url[len(TWITTER_API_URL):]
+            return session_request(method, url, *args, **kwargs)
+
+        self.client.session.request = request
+
+    @staticmethod
+    def _instrumented(request, rate_limits=None):
+        """
+        Wrap tweepy's `request` so every Twitter API call is traced, counted and its rate limit recorded.
+        Calls to an endpoint without requests left, and 429 responses, raise TwitterRateLimitError.
+        """
+        def instrumented_request(method, route, *args, **kwargs):
+            if rate_limits is not None:
+                rate_limits.check(method, route)
+            started = time.perf_counter()
+            status = "error"
+            try:
+                with span(f"twitter {method} {route}", kind=HTTP) as s:
+                    response = request(method, route, *args, **kwargs)
+                    status = getattr(response, "status_code", "ok")
+                    s.set(status_code=status)
+                    if rate_limits is not None and hasattr(response, "headers"):
+                        rate_limits.update(method, route, response.headers)
+                    return response
+            except tweepy.HTTPException as e:
+                status = e.response.status_code
+                if rate_limits is not None:
+                    rate_limits.update(method, route, e.response.headers)
+                if isinstance(e, tweepy.TooManyRequests):
+                    retry_after = rate_limits.retry_after([(method, route)]) if rate_limits is not None else 0
+                    raise TwitterRateLimitError(
+                        " ".join(endpoint(method, route)), retry_after or RATE_LIMIT_WINDOW
+                    ) from e
+                raise
+            finally:
+                metrics.twitter_requests.inc(method=method, route=route, status=status)
+                metrics.twitter_request_seconds.observe(time.perf_counter() - started, method=method, route=route)
+                if method == "POST" and route == "/2/tweets":
+                    if status == "error" or (isinstance(status, int) and status >= 400):
+                        metrics.tweets_failed.inc()
+                    else:
+                        metrics.tweets_posted.inc()
+        return instrumented_request
+
+    @property
+    def identity(self) -> dict:
+        """
+        The authenticated user as {'id', 'username', 'fetched_at'}
 
-        # Get user info directly
+        Read from Storage on first use, keyed by a hash of the access token, and
+        only fetched with get_me() when missing or older than `identity_ttl`. If
+        revalidating a stale identity fails, the cached one is kept.
+        """
+        if self._identity is None:
+            identity = self.storage.get(self.identity_key)
+            if isinstance(identity, str):
+                # Stored as a JSON string before Storage kept value types
+                identity = json.loads(identity)
+            if identity is None or self._identity_expired(identity):
+                try:
+                    identity = self.refresh_identity()
+                except Exception as e:
+                    if identity is None:
+                        raise
+                    logger.warning(f"Using cached identity, revalidation failed: {e}")
+            self._identity = identity
+        return self._identity
+
+    def _identity_expired(self, identity: dict) -> bool:
+        fetched_at = datetime.fromisoformat(identity["fetched_at"])
+        return (datetime.now(timezone.utc) - fetched_at).total_seconds() > self.identity_ttl
+
+    def refresh_identity(self) -> dict:
+        """Fetch the authenticated user with get_me() and cache it in Storage"""
         user = self.client.get_me()
-        self.username = user.data.username
-        self.user_id = user.data.id
-
-    def save_tweet_to_db(self, tweet_data, fetched_for_user=None):
-        """Save tweet to database with user context"""
-        session = self.Session()
-        try:
-            # First try to find existing tweet
-            existing_tweet = (
-                session.query(Tweet).filter_by(tweet_id=str(tweet_data["id"])).first()
-            )
-
-            if existing_tweet:
-                # Update existing tweet if needed
-                existing_tweet.fetched_for_user = fetched_for_user
-                existing_tweet.created_at = datetime.now(timezone.utc)
-            else:
-                # Create new tweet if it doesn't exist
-                tweet = Tweet(
-                    tweet_id=str(tweet_data["id"]),
-                    text=tweet_data["text"],
-                    author_id=tweet_data["author_id"],
-                    conversation_id=tweet_data["conversation_id"],
-                    username=tweet_data["username"],
-                    fetched_for_user=fetched_for_user,
-                    created_at=datetime.now(timezone.utc), 
-                )
-                session.add(tweet)
-
-            session.commit()
-        except Exception as e:
-            print(f"Error saving tweet to database: {e}")
-            session.rollback()
-        finally:
-            session.close()
+        identity = {
+            "id": user.data.id,
+            "username": user.data.username,
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.storage.set(self.identity_key, identity)
+        self._identity = identity
+        return identity
+
+    @property
+    def username(self):
+        return self.identity["username"]
+
+    @property
+    def user_id(self):
+        return self.identity["id"]
 
     def post_tweet(self, text):
         """Post a tweet and save to local database"""
         response = self.client.create_tweet(text=text)
 
         if response.data:
-            tweet_data = {
-                "id": response.data["id"],
-                "text": text,
-                "author_id": self.user_id,
-                "conversation_id": response.data["id"],
-                "username": self.username,
-            }
-            self.save_tweet_to_db(tweet_data)
+            tweet = TweetRecord(
+                id=response.data["id"],
+                text=text,
+                username=self.username,
+                author_id=self.user_id,
+                conversation_id=response.data["id"],
+            )
+            self.save_tweet_to_db(tweet)
             return response.data["id"]
         return None
 
@@ -117,23 +224,28 @@ class TwitterClient:
             )
 
             if response.data:
-                tweet_data = {
-                    "id": response.data["id"],
-                    "text": text,
-                    "author_id": self.user_id,
-                    "conversation_id": conversation_id,
-                    "username": self.username,
-                    "in_reply_to_user_id": reply_to_tweet_id,
-                }
-                self.save_tweet_to_db(tweet_data)
+                tweet = TweetRecord(
+                    id=response.data["id"],
+                    text=text,
+                    username=self.username,
+                    author_id=self.user_id,
+                    conversation_id=conversation_id,
+                    in_reply_to_user_id=reply_to_tweet_id,
+                    in_reply_to_tweet_id=reply_to_tweet_id,
+                )
+                self.save_tweet_to_db(tweet)
                 return response.data["id"]
 
+        except TwitterRateLimitError:
+            # Not a failure of this reply, the caller stops posting until the window resets
+            raise
         except Exception as e:
             print(f"Error posting reply: {e}")
             return None
 
-    def get_timeline(self, filter_self=True):
-        tweets = self.client.get_home_timeline(
+    def get_timeline(self, filter_self=True) -> list:
+        """Return the home timeline as TweetRecords"""
+        tweets = IndexedResponse(self.client.get_home_timeline(
             max_results=20,
             tweet_fields=[
                 "author_id",
@@ -152,102 +264,241 @@ class TwitterClient:
             media_fields=["url"],
             user_fields=["username"],
             user_auth=True,
+        ))
+
+        return [
+            TweetRecord.from_tweet(tweet, tweets)
+            for tweet in tweets.data
+            if not (filter_self and tweet.author_id == self.user_id)
+        ]
+
+    def post_thread_tweet(self, tweet: TweetModel, in_reply_to_tweet_id=None):
+        """
+        Post a single tweet of a thread
+
+        Args:
+            tweet (TweetModel): The tweet to post
+            in_reply_to_tweet_id (str, optional): The previous tweet of the thread, None for the first tweet
+
+        Returns:
+            str: ID of the posted tweet
+        """
+        response = self.client.create_tweet(
+            text=tweet.text,
+            quote_tweet_id=tweet.quote_tweet_id,
+            in_reply_to_tweet_id=in_reply_to_tweet_id,
         )
+        return response.data["id"]
 
-        homepage_tweets = []
+    @staticmethod
+    def thread_key(tweets: TweetThreadModel) -> str:
+        """Identify a thread by its content, so reposting the same thread resumes it"""
+        digest = hashlib.sha256("\n---\n".join(tweet.text for tweet in tweets.tweets).encode("utf-8"))
+        return digest.hexdigest()[:16]
 
-        for tweet in tweets.data:
-            if filter_self and tweet.author_id == self.user_id:
-                continue
+    def post_thread(self, tweets: TweetThreadModel, thread_key=None) -> list:
+        """
+        Post a thread of tweets
 
-            tweet_data = {}
-            try:
-                tweet_data["id"] = getattr(tweet, "id")
-                tweet_data["text"] = getattr(tweet, "text")
-                tweet_data["author_id"] = getattr(tweet, "author_id")
-                tweet_data["conversation_id"] = getattr(tweet, "conversation_id")
-                tweet_data["username"] = next(
-                    user.username
-                    for user in tweets.includes["users"]
-                    if user.id == tweet.author_id
-                )
-            except:
-                pass
+        A thread that failed partway through is continued after its last posted
+        tweet when it is posted again.
 
-            homepage_tweets.append(tweet_data)
+        Args:
+            tweets (TweetThreadModel): The thread to post
+            thread_key (str, optional): Checkpoint key, derived from the content if not set
 
-        return homepage_tweets
+        Returns:
+            list[PostedTweet]: Timing of the tweets posted by this call
+        """
+        return self.post_thread_stream(tweets.tweets, thread_key or self.thread_key(tweets))
 
-    def post_thread(self, tweets: TweetThreadModel) -> None:
-        """Post a thread of tweets"""
-        # Post first tweet
-        response = self.client.create_tweet(
-            text=tweets.tweets[0].text,
-            quote_tweet_id=tweets.tweets[0].quote_tweet_id,
-        )
-        previous_id = response.data["id"]
+    def post_thread_stream(self, tweets, thread_key, stages=(), on_posted=None) -> list:
+        """
+        Post a thread from an iterator of tweets, overlapping posting with the stages of later tweets
 
-        # Post rest of thread in reply to previous tweet
-        for tweet in tweets.tweets[1:]:
-            response = self.client.create_tweet(
-                text=tweet.text,
-                quote_tweet_id=tweet.quote_tweet_id,
-                in_reply_to_tweet_id=previous_id,
-            )
-            previous_id = response.data["id"]
+        Args:
+            tweets (Iterable[TweetModel]): Tweets of the thread as they become ready
+            thread_key (str): Checkpoint key used to resume the thread
+            stages (Sequence[Callable], optional): Functions applied to each tweet before posting
+            on_posted (Callable, optional): Called with each tweet and its PostedTweet timing
 
-    def get_tweets_for_conversation(self, conversation_id):
+        Returns:
+            list[PostedTweet]: Timing of the tweets posted by this call
         """
-        Fetch all tweets for a specific conversation from Twitter API using a single request
+        poster = ThreadPoster(self, StorageCheckpoints(self.storage), stages=stages)
+        return poster.post(tweets, thread_key, on_posted=on_posted)
+
+    def post_entry_stream(self, entry_id, tweets, stages=(), on_posted=None) -> list:
+        """
+        Post a journal entry whose tweets are still being generated
+
+        Each tweet is added to the entry after the last stage, before it is
+        posted, so a thread that fails partway through is resumed with
+        `post_entry` from the tweets generated until then.
 
         Args:
-            conversation_id (str): The ID of the conversation to fetch
+            entry_id (int): The journal entry, recorded with the tweets known so far
+            tweets (Iterable[TweetModel]): The remaining tweets as they become ready
+            stages (Sequence[Callable], optional): Functions applied to each tweet before posting
+            on_posted (Callable, optional): Called with each tweet and its PostedTweet timing
 
         Returns:
-            list: List of tweet dictionaries containing tweet data
+            list[PostedTweet]: Timing of the tweets posted by this call
+
+        Raises:
+            Exception: If posting fails, after marking the entry as failed
         """
-        conversation_tweets = []
+        def journaled(tweet):
+            self.journal.append(entry_id, tweet)
+            return tweet
 
+        self.journal.set_status(entry_id, "posting")
+        poster = ThreadPoster(self, self.journal, stages=[*stages, journaled])
         try:
-            print(f"\n=== Fetching Conversation {conversation_id} ===")
+            return poster.post(tweets, entry_id, on_posted=on_posted)
+        except Exception as e:
+            self.journal.set_status(entry_id, "failed", error=str(e))
+            raise
+
+    def post_entry(self, entry_id, on_posted=None) -> list:
+        """
+        Post a posting journal entry, continuing after its last posted tweet
+
+        Args:
+            entry_id (int): The journal entry to post
+            on_posted (Callable, optional): Called with each tweet and its PostedTweet timing
+
+        Returns:
+            list[PostedTweet]: Timing of the tweets posted by this call
+
+        Raises:
+            Exception: If posting fails, after marking the entry as failed
+        """
+        entry = self.journal.get_entry(entry_id)
+        if entry is None:
+            raise ValueError(f"Journal entry {entry_id} not found")
+        if entry.status == "done":
+            return []
+
+        self._recover_attempted_tweet(entry_id)
+        self.journal.set_status(entry_id, "posting")
+        content = self.journal.load_content(entry)
+
+        try:
+            if entry.kind == "reply":
+                return self._post_reply_entry(entry, content, on_posted)
+
+            tweets = content.tweets if isinstance(content, TweetThreadModel) else [content]
+            poster = ThreadPoster(self, self.journal)
+            return poster.post(
+                tweets,
+                entry_id,
+                on_posted=on_posted,
+                in_reply_to_tweet_id=entry.reply_to_tweet_id,
+            )
+        except Exception as e:
+            self.journal.set_status(entry_id, "failed", error=str(e))
+            raise
+
+    def _post_reply_entry(self, entry, reply: TweetModel, on_posted=None) -> list:
+        if self.journal.get_checkpoint(entry.id):
+            self.journal.set_status(entry.id, "done")
+            return []
+
+        self.journal.mark_attempt(entry.id, 0)
+        tweet_id = self.post_reply(
+            text=reply.text,
+            reply_to_tweet_id=entry.reply_to_tweet_id,
+            conversation_id=entry.conversation_id,
+        )
+        if not tweet_id:
+            raise RuntimeError(f"Failed to reply to tweet {entry.reply_to_tweet_id}")
+
+        self.journal.mark_posted(entry.id, 0, tweet_id)
+        self.journal.set_status(entry.id, "done")
+        return []
+
+    def _recover_attempted_tweet(self, entry_id) -> None:
+        """
+        Recover the ID of a tweet that was posted but not journaled
+
+        If the process died between create_tweet and recording its ID, the next
+        planned tweet is marked as attempted. Look for it among our latest
+        tweets instead of posting it a second time.
+        """
+        # The first tweet replies to the entry's tweet, the others to the tweet before them
+        previous_id = self.journal.get_entry(entry_id).reply_to_tweet_id
+        for tweet in self.journal.planned_tweets(entry_id):
+            if tweet.tweet_id:
+                previous_id = tweet.tweet_id
+                continue
+            if tweet.attempted_at:
+                posted_id = self.find_own_tweet(tweet.text, in_reply_to_tweet_id=previous_id)
+                if posted_id:
+                    self.journal.mark_posted(entry_id, tweet.position, posted_id)
+            return
+
+    def find_own_tweet(self, text, in_reply_to_tweet_id=None, max_results=10):
+        """
+        Find one of our recent tweets by its text
 
-            # Get all tweets in the conversation with a single query
-            all_tweets = self.client.search_recent_tweets(
-                query=f"conversation_id:{conversation_id}",
-                max_results=100,  # Increase if needed, max is 100 per request
-                tweet_fields=[
-                    "author_id",
-                    "in_reply_to_user_id",
-                    "conversation_id",
-                    "created_at",
-                    "text",
-                    "referenced_tweets",
-                ],
-                expansions=["author_id", "referenced_tweets.id", "in_reply_to_user_id"],
-                user_fields=["username"],
+        The text is compared normalized, as the API returns it HTML-escaped,
+        with t.co links and with the replied to users in front.
+
+        Args:
+            text (str): Text of the tweet
+            in_reply_to_tweet_id (str, optional): Tweet it must reply to
+            max_results (int): Number of recent tweets to look at
+
+        Returns:
+            str: ID of the matching tweet, None if not found
+        """
+        try:
+            response = self.client.get_users_tweets(
+                id=self.user_id,
+                max_results=max_results,
+                tweet_fields=["referenced_tweets"],
                 user_auth=True,
             )
+        except Exception as e:
+            print(f"Error fetching our recent tweets: {e}")
+            return None
 
-            if all_tweets.data:
-                # Create a map of user IDs to usernames for quick lookup
-                users = {
-                    user.id: user.username for user in all_tweets.includes["users"]
+        text = normalize_tweet_text(text)
+        for tweet in response.data or []:
+            if normalize_tweet_text(tweet.text) != text:
+                continue
+            if in_reply_to_tweet_id is not None:
+                replied_to = {
+                    str(ref.id) for ref in getattr(tweet, "referenced_tweets", None) or [] if ref.type == "replied_to"
                 }
+                if str(in_reply_to_tweet_id) not in replied_to:
+                    continue
+            return str(tweet.id)
+        return None
 
-                for tweet in all_tweets.data:
-                    tweet_data = {
-                        "id": tweet.id,
-                        "text": tweet.text,
-                        "author_id": tweet.author_id,
-                        "conversation_id": tweet.conversation_id,
-                        "username": users.get(tweet.author_id, "unknown"),
-                        "in_reply_to_user_id": getattr(
-                            tweet, "in_reply_to_user_id", None
-                        ),
-                        "created_at": tweet.created_at,
-                    }
-                    conversation_tweets.append(tweet_data)
-                    self.save_tweet_to_db(tweet_data, self.username)
+    def get_tweets_for_conversation(self, conversation_id, reply_to=None, fetcher=None):
+        """
+        Fetch the tweets of a conversation, only asking the API for the ones
+        posted since the last fetch and not at all while it is fresh, see
+        ConversationFetcher
+
+        Args:
+            conversation_id (str): The ID of the conversation to fetch
+            reply_to (TweetRecord, optional): The mention to answer, only its reply chain
+                is fetched when the fetcher's `reply_chain_only` is set
+            fetcher (ConversationFetcher, optional): Fetcher with the options of this run,
+                `conversations` by default
+
+        Returns:
+            list: TweetRecords of the conversation
+        """
+        fetcher = fetcher or self.conversations
+        conversation_tweets = []
+
+        try:
+            print(f"\n=== Fetching Conversation {conversation_id} ===")
+            conversation_tweets = fetcher.fetch(conversation_id, reply_to=reply_to)
 
         except Exception as e:
             print(f"\nERROR fetching conversation {conversation_id}: {e}")
@@ -255,53 +506,31 @@ class TwitterClient:
             import traceback
 
             traceback.print_exc()
+            # Fall back to what is stored of it
+            conversation_tweets = fetcher.stored(conversation_id)
 
         print(f"\n=== Summary for Conversation {conversation_id} ===")
         print(f"Total tweets found: {len(conversation_tweets)}")
         print(
-            "Participants:", ", ".join(set(t["username"] for t in conversation_tweets))
+            "Participants:", ", ".join(set(t.username for t in conversation_tweets))
         )
         print("=== End of Conversation Fetch ===\n")
 
         return conversation_tweets
 
-    def add_tweet_to_conversation(self, conversations, tweet_data, conversation_id):
-        """Add a tweet to a conversation and update conversation metadata"""
-        if conversation_id not in conversations:
-            conversations[conversation_id] = {
-                "tweets": [],
-                "participants": set(),
-                "last_tweet_time": None,
-                "our_last_tweet_time": None,
-            }
-
-        conversations[conversation_id]["tweets"].append(tweet_data)
-        conversations[conversation_id]["participants"].add(tweet_data["username"])
+    def add_tweet_to_conversation(self, conversations, tweet: TweetRecord, conversation_id):
+        """Add a tweet to a conversation, creating the conversation on its first tweet"""
+        conversation_id = str(conversation_id)
+        conversation = conversations.get(conversation_id)
+        if conversation is None:
+            conversation = conversations[conversation_id] = Conversation(conversation_id, self.username)
+        conversation.add(tweet)
 
-        # Update last tweet time
-        if (
-            conversations[conversation_id]["last_tweet_time"] is None
-            or tweet_data["created_at"]
-            > conversations[conversation_id]["last_tweet_time"]
-        ):
-            conversations[conversation_id]["last_tweet_time"] = tweet_data["created_at"]
-
-        # Update our last tweet time if it's our tweet
-        if tweet_data["username"] == self.username:
-            if (
-                conversations[conversation_id]["our_last_tweet_time"] is None
-                or tweet_data["created_at"]
-                > conversations[conversation_id]["our_last_tweet_time"]
-            ):
-                conversations[conversation_id]["our_last_tweet_time"] = tweet_data[
-                    "created_at"
-                ]
-
-    def process_mentions(self, conversations, filter_spam=True):
-        """Process mentions and add them to conversations"""
+    def process_mentions(self, conversations, filter_spam=True, fetcher=None):
+        """Process mentions and add them to conversations, fetched with `fetcher` when given"""
         print("\n=== Fetching Mentions ===")
 
-        mentions = self.client.get_users_mentions(
+        mentions = IndexedResponse(self.client.get_users_mentions(
             id=self.user_id,
             max_results=20,
             tweet_fields=[
@@ -318,13 +547,17 @@ class TwitterClient:
                 "referenced_tweets.id",
                 "referenced_tweets.id.author_id",
             ],
-            user_fields=["username", "name"],
+            user_fields=["username", "name", "public_metrics"],
             user_auth=True,
-        )
+        ))
 
         if not mentions.data:
             return
 
+        for user_id, user in mentions.users.items():
+            public_metrics = getattr(user, "public_metrics", None) or {}
+            self.follower_counts[str(user_id)] = public_metrics.get("followers_count", 0)
+
         print(f"Found {len(mentions.data)} mentions")
 
         # Filter spam mentions
@@ -332,30 +565,14 @@ class TwitterClient:
 
         # Process each mention
         for tweet in non_spam_mentions:
-            if tweet.conversation_id not in conversations:
-                # Get the author info for the mention
-                author = next(
-                    user
-                    for user in mentions.includes["users"]
-                    if user.id == tweet.author_id
-                )
-
+            if str(tweet.conversation_id) not in conversations:
                 # Add the mention tweet itself first
-                mention_data = {
-                    "id": tweet.id,
-                    "text": tweet.text,
-                    "author_id": tweet.author_id,
-                    "conversation_id": tweet.conversation_id,
-                    "username": author.username,
-                    "created_at": tweet.created_at,
-                }
-                self.add_tweet_to_conversation(
-                    conversations, mention_data, tweet.conversation_id
-                )
+                mention = TweetRecord.from_tweet(tweet, mentions)
+                self.add_tweet_to_conversation(conversations, mention, tweet.conversation_id)
 
                 # Then try to get the rest of the conversation
                 conversation_tweets = self.get_tweets_for_conversation(
-                    tweet.conversation_id
+                    tweet.conversation_id, reply_to=mention, fetcher=fetcher
                 )
                 for tweet_data in conversation_tweets:
                     self.add_tweet_to_conversation(
@@ -371,15 +588,8 @@ class TwitterClient:
             print(f"Found {len(our_tweets)} tweets in database")
 
             for tweet in our_tweets:
-                tweet_data = {
-                    "id": tweet.tweet_id,
-                    "text": tweet.text,
-                    "author_id": tweet.author_id,
-                    "username": tweet.username,
-                    "created_at": tweet.created_at,
-                }
                 self.add_tweet_to_conversation(
-                    conversations, tweet_data, tweet.conversation_id
+                    conversations, TweetRecord.from_row(tweet), tweet.conversation_id
                 )
 
         except Exception as e:
@@ -389,18 +599,15 @@ class TwitterClient:
 
     def _filter_spam_mentions(self, mentions):
         """Filter out spam mentions"""
+        mentions = IndexedResponse.of(mentions)
         non_spam_mentions = []
         for tweet in mentions.data:
-            author = next(
-                user
-                for user in mentions.includes["users"]
-                if user.id == tweet.author_id
-            )
-
-            tweet_data = {"text": tweet.text, "username": author.username}
+            tweet_data = {"text": tweet.text, "username": mentions.username(tweet)}
 
             if not is_likely_spam(tweet_data):
                 non_spam_mentions.append(tweet)
+            else:
+                metrics.spam_mentions.inc()
 
         print(f"Processing {len(non_spam_mentions)} non-spam mentions")
         return non_spam_mentions
@@ -412,36 +619,35 @@ class TwitterClient:
 
         for conv_id, conv in conversations.items():
             print(f"\nConversation {conv_id}:")
-            print(f"Participants: {', '.join(conv['participants'])}")
-            print(f"Number of tweets: {len(conv['tweets'])}")
-            print(f"Last tweet time: {conv['last_tweet_time']}")
-            print(f"Our last tweet time: {conv['our_last_tweet_time']}")
+            print(f"Participants: {', '.join(conv.participants)}")
+            print(f"Number of tweets: {len(conv)}")
+            print(f"Last tweet time: {conv.last_tweet_time}")
+            print(f"Our last tweet time: {conv.our_last_tweet_time}")
 
-            # Sort and display tweets
+            # Display tweets, a Conversation keeps them in time order
             print("\nTweets in conversation:")
             print("-" * 50)
 
-            sorted_tweets = sorted(conv["tweets"], key=lambda x: x["created_at"])
-
-            for tweet in sorted_tweets:
-                print(f"\n@{tweet['username']} ({tweet['created_at']}):")
-                print(f"{tweet['text']}")
+            for tweet in conv:
+                print(f"\n@{tweet.username} ({tweet.created_at}):")
+                print(f"{tweet.text}")
 
             print("-" * 50)
 
-    def get_conversations(self, use_local=False, filter_spam=True):
+    def get_conversations(self, use_local=False, filter_spam=True, fetcher=None):
         """
         Fetch mentions and combine with our local tweets to create conversations
 
         Args:
             use_local (bool): If True, only fetch conversations from local database
             filter_spam (bool): If True, filter out likely spam mentions
+            fetcher (ConversationFetcher, optional): Fetcher of the conversations, `conversations` by default
         """
         conversations = {}
 
         # Fetch and process mentions if not using local only
         if not use_local:
-            self.process_mentions(conversations, filter_spam)
+            self.process_mentions(conversations, filter_spam, fetcher=fetcher)
 
         # Process local tweets
         self.process_local_tweets(conversations)
@@ -454,75 +660,116 @@ class TwitterClient:
     def needs_reply(self, conversation):
         """Check if a conversation needs our reply"""
 
-        # Skip if conversation is too long (more than 5 posts)
-        if len(conversation["tweets"]) > 5:
-            return False
+        # Long conversations are answered too, ReplyContextBuilder keeps their prompt small
 
         # Skip if we were the last to tweet
         if (
-            conversation["our_last_tweet_time"] is not None
-            and conversation["our_last_tweet_time"] >= conversation["last_tweet_time"]
+            conversation.our_last_tweet_time is not None
+            and conversation.our_last_tweet_time >= conversation.last_tweet_time
         ):
             return False
 
         return True
 
-    def get_pending_replies(self):
-        """Get conversations that need replies"""
-        conversations = self.get_conversations()
-        pending_replies = {}
+    def get_pending_replies(self, use_local=False, fetcher=None):
+        """
+        Get conversations that need replies, most valuable first
+
+        Conversations needing a reply are added to the reply queue, which
+        keeps the ones of earlier runs until they are answered or age out.
+        Queued conversations that this run did not fetch stay queued until
+        their deadline.
 
-        for conv_id, conversation in conversations.items():
+        Args:
+            use_local (bool): If True, only use conversations from local database
+            fetcher (ConversationFetcher, optional): Fetcher of the conversations, `conversations` by default
+
+        Returns:
+            dict: Conversations by ID, in priority order
+        """
+        conversations = self.get_conversations(use_local=use_local, fetcher=fetcher)
+
+        for conversation in conversations.values():
             if self.needs_reply(conversation):
-                pending_replies[conv_id] = conversation
+                followers = self.follower_counts.get(conversation.last_tweet.author_id, 0)
+                self.reply_queue.push(conversation, followers=followers)
+        self.reply_queue.expire()
+
+        pending_replies = {}
+        for item in self.reply_queue.pending():
+            conversation = conversations.get(item.conversation_id)
+            if conversation is None:
+                # Queued by an earlier run, it waits for a later one until its deadline
+                continue
+            if not self.needs_reply(conversation):
+                # Answered since it was queued
+                self.reply_queue.set_status(item.conversation_id, "done")
+            else:
+                pending_replies[item.conversation_id] = conversation
 
         return pending_replies
 
-    def save_tweet_to_db(self, tweet_data, fetched_for_user=None):
+    def save_tweet_to_db(self, tweet: TweetRecord, fetched_for_user=None):
         """
         Save tweet to database with user context
 
         Args:
-            tweet_data (dict): Dictionary containing tweet data with keys:
-                - id: Tweet ID
-                - text: Tweet content
-                - author_id: ID of tweet author
-                - conversation_id: ID of conversation
-                - username: Author's username
-                - in_reply_to_user_id (optional): ID of tweet being replied to
-                - created_at (optional): Tweet creation timestamp
+            tweet (TweetRecord): The tweet, stored with the current time when it has no created_at
             fetched_for_user (str, optional): Username context for which tweet was fetched
         """
+        return self.save_tweets_to_db([tweet], fetched_for_user)
+
+    def save_tweets_to_db(self, tweets, fetched_for_user=None):
+        """
+        Save tweets to database in a single transaction
+
+        Args:
+            tweets (list): TweetRecords, stored with the current time when they have no created_at
+            fetched_for_user (str, optional): Username context for which the tweets were fetched
+
+        Returns:
+            bool: True if saved, False otherwise
+        """
+        unique = {}
+        for tweet in tweets:
+            unique.setdefault(tweet.id, tweet)
+        if not unique:
+            return True
+
         session = self.Session()
         try:
-            # First try to find existing tweet
-            existing_tweet = (
-                session.query(Tweet).filter_by(tweet_id=str(tweet_data["id"])).first()
-            )
-
-            if existing_tweet:
-                # Update existing tweet if needed
-                existing_tweet.fetched_for_user = fetched_for_user
-                if "created_at" not in tweet_data:
-                    existing_tweet.created_at = datetime.now(timezone.utc)
-            else:
-                # Create new tweet if it doesn't exist
-                tweet = Tweet(
-                    tweet_id=str(tweet_data["id"]),
-                    text=tweet_data["text"],
-                    author_id=tweet_data["author_id"],
-                    conversation_id=tweet_data["conversation_id"],
-                    username=tweet_data["username"],
-                    in_reply_to_user_id=tweet_data.get("in_reply_to_user_id"),
-                    created_at=tweet_data.get("created_at", datetime.now(timezone.utc)),
-                    fetched_for_user=fetched_for_user,
-                )
-                session.add(tweet)
+            existing = {
+                row.tweet_id: row
+                for row in session.query(Tweet).filter(Tweet.tweet_id.in_(list(unique)))
+            }
+            now = datetime.now(timezone.utc)
+            for tweet_id, tweet in unique.items():
+                existing_tweet = existing.get(tweet_id)
+                if existing_tweet:
+                    # Update existing tweet if needed
+                    existing_tweet.fetched_for_user = fetched_for_user
+                    existing_tweet.in_reply_to_tweet_id = (
+                        existing_tweet.in_reply_to_tweet_id or tweet.in_reply_to_tweet_id
+                    )
+                    if tweet.created_at is None:
+                        existing_tweet.created_at = now
+                else:
+                    session.add(Tweet(
+                        tweet_id=tweet.id,
+                        text=tweet.text,
+                        author_id=tweet.author_id,
+                        conversation_id=tweet.conversation_id,
+                        username=tweet.username,
+                        in_reply_to_user_id=tweet.in_reply_to_user_id,
+                        in_reply_to_tweet_id=tweet.in_reply_to_tweet_id,
+                        created_at=tweet.created_at or now,
+                        fetched_for_user=fetched_for_user,
+                    ))
 
             session.commit()
             return True
         except Exception as e:
-            print(f"Error saving tweet to database: {e}")
+            print(f"Error saving tweets to database: {e}")
             session.rollback()
             return False
         finally:
@@ -551,8 +798,23 @@ class TwitterClient:
             print(f"Error following user: {e}")
             return False
 
-    def get_sample_timeline(self):
-        """Return sample timeline data for testing"""
+    def follow_users(self, usernames, on_result=None):
+        """
+        Follow a list of users, resolving them in batches, skipping the ones
+        already followed and pacing follows by the endpoint rate limit.
+        Interrupted lists continue where they stopped when run again.
+
+        Args:
+            usernames (iterable): Usernames, with or without '@'
+            on_result (callable, optional): Called with each username and its outcome
+
+        Returns:
+            FollowResult: The usernames by outcome
+        """
+        return BulkFollower(self).follow(usernames, on_result=on_result)
+
+    def get_sample_timeline(self) -> list:
+        """Return sample timeline TweetRecords for testing"""
 
         sample_timeline = [
             {
@@ -732,4 +994,8 @@ class TwitterClient:
             },
         ]
 
-        return sample_timeline
+        # The sample repeats some tweets, keep the first of each ID
+        unique = {}
+        for tweet in sample_timeline:
+            unique.setdefault(tweet["id"], TweetRecord(**tweet))
+        return list(unique.values())
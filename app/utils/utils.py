@@ -1,3 +1,12 @@
+import html
+import re
+
+# Links are rewritten to t.co links, compared as this placeholder
+_URL = re.compile(r"https?://\S+")
+# The @mentions the API puts in front of a reply
+_LEADING_MENTIONS = re.compile(r"^(?:@\w+\s+)+")
+
+
 def clean_tweet(text):
     """
     Clean tweet text by removing backticks, quotes, and hashtags.
@@ -26,22 +35,37 @@ def format_tweet_timeline(tweets) -> str:
     Format a list of tweets into a timeline string.
 
     Args:
-        tweets (list): List of tweet dictionaries containing id, username, and text
+        tweets (list): TweetRecords, the last one is shown first
 
     Returns:
         str: Formatted timeline string
     """
-    timeline = ""
-    for tweet in tweets:
-        timeline = (
-            f"tweet_id:{tweet['id']}\n"
-            + f"poster:@{tweet['username']}\n"
-            + f"text:{tweet['text']}\n"
-            + "---\n"
-            + timeline
-        )
+    return "".join(
+        f"tweet_id:{tweet.id}\n" f"poster:@{tweet.username}\n" f"text:{tweet.text}\n" "---\n"
+        for tweet in reversed(tweets)
+    )
+
+
+def normalize_tweet_text(text: str) -> str:
+    """
+    Normalize tweet text for comparing what we posted with what the API returns,
+    which has &, < and > HTML-escaped, links rewritten to t.co and the replied
+    to users mentioned in front of a reply.
+
+    Args:
+        text (str): The tweet text
+
+    Returns:
+        str: The text unescaped, without leading mentions, with links replaced and whitespace collapsed
+    """
+    text = html.unescape(text).strip()
+    text = _LEADING_MENTIONS.sub("", text)
+    text = _URL.sub("<url>", text)
+    return " ".join(text.split())
 
-    return timeline
+
+# Tweets with this many spam indicators are considered spam
+SPAM_THRESHOLD = 3
 
 
 def is_likely_spam(tweet_data):
@@ -54,6 +78,19 @@ def is_likely_spam(tweet_data):
     Returns:
         bool: True if tweet is likely spam, False otherwise
     """
+    return spam_score(tweet_data) >= SPAM_THRESHOLD
+
+
+def spam_score(tweet_data) -> float:
+    """
+    Count the spam indicators of a tweet, see `is_likely_spam`
+
+    Args:
+        tweet_data (dict): Tweet data containing at least 'text' and 'username' fields
+
+    Returns:
+        float: Weighted number of spam indicators
+    """
     spam_indicators = 0
     text = tweet_data["text"].lower()
 
@@ -83,5 +120,4 @@ def is_likely_spam(tweet_data):
     if any(c.isdigit() for c in tweet_data["username"]):
         spam_indicators += 0.5
 
-    # Consider it spam if it has multiple spam indicators
-    return spam_indicators >= 3
+    return spam_indicators
@@ -0,0 +1,168 @@
+"""
+Shared fixtures of the benchmark suite.
+
+Recorded CoinGecko, Twitter and OpenAI responses live in `fixtures/` and are
+replayed instead of calling the APIs. NATE_BENCH_LATENCY_MS adds a fixed delay
+to every replayed call, so the end-to-end benchmarks can be run with latency
+close to the real services (the default of 0 measures only our own code).
+"""
+
+import json
+import os
+import random
+import sqlite3
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+LATENCY = float(os.getenv("NATE_BENCH_LATENCY_MS", "0")) / 1000
+
+# Rows in the tweets.db used by the local tweets benchmark
+TWEETS_DB_ROWS = int(os.getenv("NATE_BENCH_TWEETS", "1000000"))
+
+# Recorded structured output per response format
+OPENAI_FIXTURES = {
+    "CryptoAnalysisThreadModel": "openai_crypto_analysis.json",
+    "TweetThreadModel": "openai_tweet_thread.json",
+    "TweetModel": "openai_tweet.json",
+}
+
+
+def load_fixture(name: str):
+    with open(FIXTURES / name) as f:
+        return json.load(f)
+
+
+def inject_latency() -> None:
+    if LATENCY:
+        time.sleep(LATENCY)
+
+
+def scale_coins(count: int, seed: int = 42) -> list:
+    """Recorded /coins/markets rows repeated to `count` rows with varied market data"""
+    recorded = load_fixture("coingecko_markets.json")
+    rng = random.Random(seed)
+    coins = []
+    for i in range(count):
+        coin = dict(recorded[i % len(recorded)])
+        coin["id"] = f"{coin['id']}-{i}"
+        coin["current_price"] = coin["current_price"] * rng.uniform(0.5, 1.5)
+        coin["total_volume"] = int(coin["total_volume"] * rng.uniform(0.1, 2.0))
+        if coin["price_change_percentage_24h"] is not None:
+            coin["price_change_percentage_24h"] = rng.uniform(-25, 25)
+        coins.append(coin)
+    return coins
+
+
+def scale_tweets(count: int, seed: int = 42) -> list:
+    """Recorded mentions repeated to `count` tweets with unique ids"""
+    recorded = load_fixture("twitter_mentions.json")
+    rng = random.Random(seed)
+    tweets = []
+    for i in range(count):
+        tweet = dict(recorded[rng.randrange(len(recorded))])
+        tweet["id"] = str(1861000000000000000 + i)
+        tweets.append(tweet)
+    return tweets
+
+
+class ReplayResponse:
+    """Stands in for `requests.Response`"""
+
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def replay_coingecko_get(url, headers=None, params=None, timeout=None):
+    """Replacement of `requests.get` serving the recorded CoinGecko responses"""
+    inject_latency()
+    if url.endswith("/search/trending"):
+        return ReplayResponse(load_fixture("coingecko_trending.json"))
+    if url.endswith("/coins/markets"):
+        coins = load_fixture("coingecko_markets.json")
+        ids = params.get("ids") if params else None
+        if ids:
+            wanted = ids.split(",")
+            coins = [coin for coin in coins if coin["id"] in wanted]
+        return ReplayResponse(coins)
+    return ReplayResponse({}, status_code=404)
+
+
+class ReplayOpenAI:
+    """OpenAI client whose structured output calls return recorded completions"""
+
+    def __init__(self):
+        self.calls = 0
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=self.parse)))
+
+    def parse(self, response_format, **kwargs):
+        inject_latency()
+        self.calls += 1
+        parsed = response_format.model_validate(load_fixture(OPENAI_FIXTURES[response_format.__name__]))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(parsed=parsed))],
+            usage=SimpleNamespace(
+                prompt_tokens=1500,
+                completion_tokens=250,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+            ),
+        )
+
+
+@pytest.fixture(scope="session")
+def tweets_db(tmp_path_factory):
+    """A tweets.db with TWEETS_DB_ROWS rows in 1000-tweet conversations"""
+    from app.db.Init_db import init_db
+    import app.db.models.Tweet_model  # noqa: F401
+
+    path = tmp_path_factory.mktemp("bench") / "tweets.db"
+    engine, _ = init_db(str(path))
+    engine.dispose()
+
+    recorded = load_fixture("twitter_mentions.json")
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO tweets (tweet_id, text, author_id, conversation_id, username, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                str(1861000000000000000 + i),
+                recorded[i % len(recorded)]["text"],
+                recorded[i % len(recorded)]["author_id"],
+                str(i // 1000),
+                recorded[i % len(recorded)]["username"],
+                "2024-11-25 12:00:00",
+            )
+            for i in range(TWEETS_DB_ROWS)
+        ),
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def twitter_client(tweets_db, tmp_path, monkeypatch):
+    """TwitterClient over `tweets_db` with a replayed get_me()"""
+    from unittest.mock import patch
+    from app.twitter.TwitterClient import TwitterClient
+
+    monkeypatch.chdir(tmp_path)
+    with patch("app.twitter.TwitterClient.tweepy.Client") as tweepy_client:
+        tweepy_client.return_value.get_me.return_value = SimpleNamespace(
+            data=SimpleNamespace(username="AIpe6571", id=1)
+        )
+        client = TwitterClient("key", "secret", "token", "token_secret", "bearer", db_path=str(tweets_db))
+        client.user_id  # resolve the identity outside of the measured code
+        yield client
@@ -0,0 +1,38 @@
+import pytest
+from app.services.CryptoService import CryptoService
+from benchmarks.conftest import scale_coins
+
+
+@pytest.fixture
+def crypto_service(monkeypatch):
+    monkeypatch.setenv("COINGECKO_API_KEY", "bench")
+    return CryptoService()
+
+
+@pytest.mark.parametrize("count", [250, 1000, 10000])
+def test_format_coins(benchmark, crypto_service, count):
+    coins = scale_coins(count)
+
+    formatted = benchmark(crypto_service._format_coins, coins)
+
+    assert len(formatted) == count
+
+
+@pytest.mark.parametrize("category", ["visited", "gainers", "losers"])
+@pytest.mark.parametrize("count", [250, 1000, 10000])
+def test_sort_market_data(benchmark, crypto_service, count, category):
+    coins = scale_coins(count)
+
+    result = benchmark(crypto_service._sort_market_data, coins, category)
+
+    assert len(result) == count
+
+
+@pytest.mark.parametrize("count", [250, 10000])
+def test_top_coins_by_category(benchmark, crypto_service, count):
+    """Sorting and formatting the top 3, as `get_market_trending_coins` does"""
+    coins = scale_coins(count)
+
+    result = benchmark(lambda: crypto_service._format_coins(crypto_service._sort_market_data(coins, "gainers")[:3]))
+
+    assert len(result) == 3
@@ -0,0 +1,51 @@
+"""End-to-end `twitter trending-crypto` over replayed CoinGecko and OpenAI responses."""
+
+import pytest
+from click.testing import CliRunner
+from app.ai.TweetGeneratorOpenAI import TweetGeneratorOpenAI
+from app.ai.agents.CryptoMarketAnalysisFormatAgent import CryptoMarketAnalysisFormatAgent
+from app.ai.agents.ToneAgent import ToneAgent
+from app.cli import context
+from app.cli.commands import cli
+from benchmarks.conftest import ReplayOpenAI, replay_coingecko_get
+
+# CryptoService allows 50 calls per minute, keep well below it
+ROUNDS = 10
+
+
+@pytest.fixture
+def replayed_services(monkeypatch, tmp_path):
+    """Put clients backed by recorded responses into the CLI context"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("COINGECKO_API_KEY", "bench")
+    monkeypatch.setattr("app.services.CryptoService.requests.get", replay_coingecko_get)
+
+    openai = ReplayOpenAI()
+    context.reset()
+    for name, cls in [
+        ("generator", TweetGeneratorOpenAI),
+        ("tone_agent", ToneAgent),
+        ("format_agent", CryptoMarketAnalysisFormatAgent),
+    ]:
+        instance = cls(api_key="bench")
+        instance.client = openai
+        context._instances[name] = instance
+    yield openai
+    context.reset()
+
+
+@pytest.mark.parametrize("category", ["latest", "gainers"])
+def test_trending_crypto_dry_run(benchmark, replayed_services, category):
+    runner = CliRunner()
+    runs = []
+
+    def run():
+        runs.append(1)
+        return runner.invoke(cli, ["twitter", "trending-crypto", "--category", category, "--dry-run"])
+
+    result = benchmark.pedantic(run, rounds=ROUNDS, iterations=1)
+
+    assert result.exit_code == 0, result.output
+    assert "Generated Crypto Analysis Thread" in result.output
+    # generator, tone, format of the thread and one format call per tweet
+    assert replayed_services.calls == len(runs) * 6
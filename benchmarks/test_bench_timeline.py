@@ -0,0 +1,51 @@
+import pytest
+from app.twitter.TweetRecord import TweetRecord
+from app.utils.utils import format_tweet_timeline, is_likely_spam
+from benchmarks.conftest import scale_tweets
+
+
+@pytest.mark.parametrize("count", [100, 1000, 10000])
+def test_format_tweet_timeline(benchmark, count):
+    tweets = [TweetRecord(**tweet) for tweet in scale_tweets(count)]
+
+    timeline = benchmark(format_tweet_timeline, tweets)
+
+    assert timeline.count("---\n") == count
+
+
+def test_is_likely_spam(benchmark):
+    mentions = scale_tweets(10000)
+
+    spam = benchmark(lambda: sum(is_likely_spam(mention) for mention in mentions))
+
+    assert 0 < spam < len(mentions)
+
+
+def test_process_local_tweets(benchmark, twitter_client):
+    conversations = benchmark.pedantic(
+        lambda: twitter_client.process_local_tweets(conversations := {}) or conversations,
+        rounds=3,
+        iterations=1,
+    )
+
+    assert conversations
+
+
+def test_filter_spam_mentions(benchmark, twitter_client):
+    import tweepy
+
+    mentions = scale_tweets(100)
+    response = tweepy.Response(
+        data=[
+            tweepy.Tweet({"id": m["id"], "text": m["text"], "author_id": str(i), "edit_history_tweet_ids": [m["id"]]})
+            for i, m in enumerate(mentions)
+        ],
+        includes={"users": [tweepy.User({"id": str(i), "name": m["username"], "username": m["username"]})
+                            for i, m in enumerate(mentions)]},
+        errors=[],
+        meta={},
+    )
+
+    non_spam = benchmark(twitter_client._filter_spam_mentions, response)
+
+    assert 0 < len(non_spam) < len(mentions)
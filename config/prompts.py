@@ -1,3 +1,4 @@
+import json
 from textwrap import dedent
 
 SYSTEM_PROMPT = dedent(
@@ -29,7 +30,7 @@ You are @AIpe6571, an AI agent. You stand out in the rarefied world of blockchai
 """
 ).strip()
 
-USER_PROMPT_TWITTER = dedent(
+TWITTER_GUIDELINES = dedent(
     """
 ## Objective:
 Write tweets as @AIpe6571, a bold, and data-driven crypto expert focused on technology. The tweets should balance analytical precision with charisma, captivating the audience.
@@ -49,14 +50,24 @@ Simplify complex blockchain concepts or trends into engaging, digestible points.
 @AIpe6571’s uses very familiar language, simple and impactful, use uncommon words.
 
 Blend factual, data-driven observations with sharp wit and bold commentary. Speak freely, with no concern for political correctness or convention. Authenticity is key.
+"""
+).strip()
 
-## Action:
-{twitter_action}
+# Shared, static prefix for every tweet/thread/reply call. Keeping the identity
+# and guidelines in the system message (and nothing per-call in front of them)
+# lets the provider reuse its prompt cache across all twitter actions.
+TWITTER_SYSTEM_PROMPT = SYSTEM_PROMPT + "\n\n" + TWITTER_GUIDELINES
 
+# Per-call variables only, appended after the shared prefix
+USER_PROMPT_TWITTER = dedent(
+    """
 ## Tweets:
 ```
 {twitter_timeline}
 ```
+
+## Action:
+{twitter_action}
 """
 ).strip()
 
@@ -234,13 +245,10 @@ CATEGORY_ANALYSIS_PROMPTS = {
 }
 
 # Analysis type templates
+# The static requirements come first and the per-call category focus and market
+# data last, so calls of the same analysis type share the longest possible
+# cacheable prefix after the system prompt.
 MARKET_OVERVIEW_TEMPLATE = """
-# Category: {Category} cryptocurrencies
-{category_prompt}
-
-# Market Data:
-{market_data}
-
 # Requirements:
 - Create 2-3 impactful tweets
 - Lead with the most significant trend or finding
@@ -250,16 +258,15 @@ MARKET_OVERVIEW_TEMPLATE = """
 
 ## Action
 Create a concise market overview thread!
-"""
-
-DETAILED_ANALYSIS_TEMPLATE = """:
 
 # Category: {Category} cryptocurrencies
 {category_prompt}
 
 # Market Data:
 {market_data}
+""".strip()
 
+DETAILED_ANALYSIS_TEMPLATE = """
 # Requirements:
 - Create 5-6 detailed tweets
 - Start with key market insights
@@ -271,8 +278,20 @@ DETAILED_ANALYSIS_TEMPLATE = """:
 
 ## Action
 Create a comprehensive analysis thread!
+
+# Category: {Category} cryptocurrencies
+{category_prompt}
+
+# Market Data:
+{market_data}
 """.strip()
 
+
+def format_market_data(market_data: dict) -> str:
+    """Serialize market data deterministically so identical data yields identical prompts"""
+    return json.dumps(market_data, indent=2, sort_keys=True, default=str)
+
+
 def get_analysis_prompt(category: str, analysis_type: str, market_data: dict) -> str:
     """Generate the appropriate prompt based on category and analysis type"""
     
@@ -283,8 +302,7 @@ def get_analysis_prompt(category: str, analysis_type: str, market_data: dict) ->
     analysis_prompt = template.format(
         Category=category.capitalize(),
         category_prompt=category_prompt,
-        market_data=market_data,
+        market_data=format_market_data(market_data),
     )
     
     return analysis_prompt
-
@@ -0,0 +1,8 @@
+import pytest
+from app.testing.fake_servers import FakeOpenAIServer
+
+
+@pytest.fixture
+def openai_batch_server():
+    with FakeOpenAIServer() as server:
+        yield server
@@ -0,0 +1,94 @@
+import json
+import pytest
+from pytest_check import check
+from openai import OpenAI
+from app.ai import completions
+from app.ai.TweetBatchGenerator import TweetBatchGenerator, apply_agents, load_generated_content, response_format
+from app.ai.TweetGeneratorOpenAI import TweetGeneratorOpenAI
+from app.ai.agents.CryptoMarketAnalysisFormatAgent import CryptoMarketAnalysisFormatAgent
+from app.ai.agents.ToneAgent import ToneAgent
+from app.ai.models import CryptoAnalysisThreadModel, TweetModel, TweetThreadModel
+from app.core.exceptions import BatchGenerationError
+from app.db.Init_db import init_db
+from app.db.models.GeneratedContent_model import GeneratedContent
+from app.twitter.TweetRecord import TweetRecord
+
+
+class TestTweetBatchGenerator:
+    @pytest.fixture(autouse=True)
+    def setup(self, openai_batch_server, tmp_path):
+        """Point the generator at the local fake OpenAI server"""
+        self.server = openai_batch_server
+        generator = TweetGeneratorOpenAI(api_key="test")
+        generator.client = OpenAI(api_key="test", base_url=openai_batch_server.base_url, max_retries=0)
+        self.batch_generator = TweetBatchGenerator(generator, poll_interval=0)
+        self.timeline = [TweetRecord(id="1", username="alice", text="eth is moving")]
+        self.market_data = {"category": "gainers", "assets": [{"symbol": "BTC", "price": 1.0}]}
+        _, self.Session = init_db(str(tmp_path / "tweets.db"))
+        completions.usage_by_agent.clear()
+
+    def test_requests_use_structured_response_format(self):
+        """Each JSONL line carries the same response_format as the synchronous call"""
+        self.batch_generator.add_tweet("a", self.timeline)
+        self.batch_generator.add_crypto_analysis("b", self.market_data, category="gainers")
+
+        lines = [json.loads(line) for line in self.batch_generator.to_jsonl().splitlines()]
+        with check:
+            check.equal([line["custom_id"] for line in lines], ["tweet:a", "crypto_analysis:b"])
+            check.equal(lines[0]["body"]["response_format"]["json_schema"]["name"], "TweetModel")
+            check.equal(lines[1]["body"]["response_format"]["json_schema"]["name"], "CryptoAnalysisThreadModel")
+            check.equal(lines[0]["body"]["model"], "gpt-4o-mini")
+
+    def test_response_format_is_strict(self):
+        """Every object of the schema is closed and requires all its properties"""
+        schema = response_format(CryptoAnalysisThreadModel)["json_schema"]["schema"]
+        objects = [schema, *schema["$defs"].values()]
+
+        with check:
+            check.equal(response_format(CryptoAnalysisThreadModel)["json_schema"]["strict"], True)
+            check.equal(sorted(schema["$defs"]), ["CoinInfo", "TweetModel"])
+            for definition in objects:
+                check.equal(definition["additionalProperties"], False)
+                check.equal(definition["required"], list(definition["properties"]))
+
+    def test_submit_poll_and_store(self):
+        """Results are parsed back into models and stored for later posting"""
+        self.batch_generator.add_tweet("a", self.timeline)
+        self.batch_generator.add_crypto_analysis("b", self.market_data, category="gainers")
+
+        batch_id = self.batch_generator.submit()
+        stored = self.batch_generator.collect(batch_id, self.Session, timeout=5)
+        # Collecting the same batch twice does not duplicate content
+        stored_again = self.batch_generator.collect(batch_id, self.Session, timeout=5)
+
+        session = self.Session()
+        rows = {row.custom_id: row for row in session.query(GeneratedContent).all()}
+        session.close()
+
+        with check:
+            check.equal(stored, 2)
+            check.equal(stored_again, 0)
+            check.is_instance(load_generated_content(rows["tweet:a"]), TweetModel)
+            check.is_instance(load_generated_content(rows["crypto_analysis:b"]), CryptoAnalysisThreadModel)
+            check.equal(completions.usage_by_agent["batch"].cached_tokens, 2 * 2 * 1280)
+
+    def test_submit_without_requests(self):
+        with pytest.raises(BatchGenerationError):
+            self.batch_generator.submit()
+
+    def test_crypto_analysis_gets_tone_and_format(self):
+        """Batch crypto analysis goes through the same agents as create_crypto_analysis"""
+        self.batch_generator.add_crypto_analysis("b", self.market_data, category="gainers")
+        results = self.batch_generator.fetch_results(
+            self.batch_generator.wait(self.batch_generator.submit(), timeout=5)
+        )
+        tone_agent = ToneAgent(api_key="test", base_url=self.server.base_url)
+        format_agent = CryptoMarketAnalysisFormatAgent(api_key="test", base_url=self.server.base_url)
+
+        content = apply_agents(results["crypto_analysis:b"], tone_agent, format_agent)
+
+        with check:
+            check.is_instance(content, TweetThreadModel)
+            check.equal([tweet.text for tweet in content.tweets], ["fake tweet"] * 3)
+            check.is_in("tone", completions.usage_by_agent)
+            check.is_in("format", completions.usage_by_agent)
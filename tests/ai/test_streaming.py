@@ -0,0 +1,58 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from pytest_check import check
+from app.ai.streaming import ThreadStreamParser, iter_stream_items
+from app.ai.TweetGeneratorOpenAI import TweetGeneratorOpenAI
+
+THREAD = {
+    "topic": "eth {gas}",
+    "tweets": [
+        {"quote_tweet_id": "1", "text": "gas is \"low\" {today} [really]", "username": "AIpe6571"},
+        {"quote_tweet_id": "1", "text": "second\\n}", "username": "AIpe6571"},
+        {"quote_tweet_id": None, "text": "third", "username": "AIpe6571"},
+    ],
+    "timestamp": "2024-01-01T00:00:00Z",
+}
+
+
+class TestThreadStreamParser:
+    def test_items_complete_before_document(self):
+        """Each tweet is returned as soon as its object closes"""
+        document = json.dumps(THREAD)
+        parser = ThreadStreamParser()
+        completed_at = []
+        for i, char in enumerate(document):
+            for item in parser.feed(char):
+                completed_at.append((i, item))
+
+        with check:
+            check.equal([item for _, item in completed_at], THREAD["tweets"])
+            check.less(completed_at[0][0], document.index('"third"'))
+            check.less(completed_at[-1][0], len(document) - 1)
+
+    def test_ignores_other_arrays(self):
+        """Only the tweets array is streamed"""
+        document = json.dumps({"coins": [{"a": 1}], "tweets": [{"text": "x"}], "other": [{"b": 2}]})
+        chunks = [document[i:i + 7] for i in range(0, len(document), 7)]
+        check.equal(list(iter_stream_items(chunks)), [{"text": "x"}])
+
+
+class TestStreamThread:
+    def test_stream_thread_yields_tweets(self):
+        """Streamed tweets are parsed and quote tweet IDs deduplicated"""
+        document = json.dumps(THREAD)
+        events = [SimpleNamespace(type="content.delta", delta=document[i:i + 5]) for i in range(0, len(document), 5)]
+        stream = MagicMock()
+        stream.__enter__.return_value = stream
+        stream.__iter__.return_value = iter(events)
+        stream.get_final_completion.return_value = SimpleNamespace(usage=None)
+
+        generator = TweetGeneratorOpenAI(api_key="test")
+        generator.client = MagicMock()
+        generator.client.beta.chat.completions.stream.return_value = stream
+
+        tweets = list(generator.stream_thread(timeline=[]))
+        with check:
+            check.equal([tweet.text for tweet in tweets], [t["text"] for t in THREAD["tweets"]])
+            check.equal([tweet.quote_tweet_id for tweet in tweets], ["1", None, None])
@@ -0,0 +1,88 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import Mock
+import pytest
+from pytest_check import check
+from app.ai import completions
+from app.ai.TweetGeneratorOpenAI import TweetGeneratorOpenAI
+from app.ai.models import TweetModel
+from app.twitter.TweetRecord import TweetRecord
+from config.prompts import TWITTER_PROMPT_REPLY, TWITTER_PROMPT_THREAD, TWITTER_SYSTEM_PROMPT
+
+
+class TestTweetGeneratorOpenAI:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Initialize the generator with a mocked OpenAI client"""
+        self.generator = TweetGeneratorOpenAI(api_key="test")
+        self.generator.client = Mock()
+        completions.usage_by_agent.clear()
+
+        usage = SimpleNamespace(
+            prompt_tokens=1200,
+            completion_tokens=50,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+        )
+        message = SimpleNamespace(parsed=TweetModel(quote_tweet_id=None, text="gm", username="AIpe6571"))
+        self.generator.client.beta.chat.completions.parse.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=message)],
+            usage=usage,
+        )
+        self.timeline = [TweetRecord(id="1", username="alice", text="eth is moving")]
+
+    def test_actions_share_system_prefix(self):
+        """Every action starts with the same system message and ends with its variables"""
+        single = self.generator._build_tweet_messages(self.timeline, TWITTER_PROMPT_REPLY)
+        thread = self.generator._build_tweet_messages(self.timeline, TWITTER_PROMPT_THREAD)
+
+        with check:
+            check.equal(single[0]["content"], TWITTER_SYSTEM_PROMPT)
+            check.equal(single[0], thread[0])
+            check.is_true(single[1]["content"].endswith(TWITTER_PROMPT_REPLY))
+            check.is_true(thread[1]["content"].endswith(TWITTER_PROMPT_THREAD))
+
+    def test_crypto_market_data_is_last(self):
+        """Market data is placed after the static analysis requirements"""
+        messages = self.generator._build_crypto_messages(
+            {"category": "gainers", "assets": [{"symbol": "BTC"}]}, "gainers", "market_overview"
+        )
+        prompt = messages[1]["content"]
+
+        with check:
+            check.less(prompt.index("# Requirements:"), prompt.index("# Market Data:"))
+            check.is_true(prompt.rstrip().endswith("}"))
+
+    def test_cached_tokens_are_recorded(self):
+        """Cached prompt tokens from the usage field are accumulated per agent"""
+        self.generator.create_reply(timeline=self.timeline)
+        self.generator.create_reply(timeline=self.timeline)
+
+        usage = completions.usage_by_agent["generator"]
+        with check:
+            check.equal(usage.calls, 2)
+            check.equal(usage.prompt_tokens, 2400)
+            check.equal(usage.cached_tokens, 2048)
+            check.is_in("2048 cached", completions.format_usage_summary())
+
+    def test_usage_is_tracked_per_run(self):
+        """Runs in concurrent threads count their own usage, the process totals count all of it"""
+        summaries = {}
+
+        def run(calls):
+            with completions.track_usage() as usage:
+                for _ in range(calls):
+                    self.generator.create_reply(timeline=self.timeline)
+                summaries[calls] = (usage.calls, completions.format_usage_summary())
+
+        threads = [threading.Thread(target=run, args=(calls,)) for calls in (1, 3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with check:
+            check.equal(summaries[1][0], 1)
+            check.equal(summaries[3][0], 3)
+            check.is_in("Token usage: 1 calls, 1200 prompt tokens", summaries[1][1])
+            check.equal(completions.total_usage().calls, 4)
+            check.equal(completions.run_usage().calls, 4)
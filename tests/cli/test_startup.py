@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import pytest
+from pytest_check import check
+
+HEAVY_MODULES = ("openai", "tweepy", "sqlalchemy", "pydantic", "requests")
+
+
+def import_times(statement: str) -> dict:
+    """Run a statement with -X importtime and return {module: cumulative microseconds}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup:
+    @pytest.mark.parametrize("statement", [
+        "import app.cli.commands",
+        "from app.cli.commands import cli; cli.main(['--help'], standalone_mode=False)",
+    ])
+    def test_cli_startup_does_not_import_heavy_modules(self, statement):
+        """Neither importing the CLI nor showing its help imports the heavy dependencies"""
+        imported = import_times(statement)
+
+        with check:
+            check.equal([module for module in imported if module.split(".")[0] in HEAVY_MODULES], [])
+
+    def test_cli_import_time_budget(self):
+        """Importing the CLI stays within NATE_STARTUP_BUDGET_MS"""
+        budget_ms = float(os.getenv("NATE_STARTUP_BUDGET_MS", "500"))
+
+        imported = import_times("import app.cli.commands")
+
+        with check:
+            check.less(imported["app.cli.commands"] / 1000, budget_ms)
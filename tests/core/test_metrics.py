@@ -0,0 +1,109 @@
+import urllib.request
+from types import SimpleNamespace
+import pytest
+from pytest_check import check
+from app.ai.completions import parse_completion
+from app.core import metrics
+from app.core.metrics import Registry, serve, write_textfile
+from app.db.Init_db import init_db
+from app.twitter.TwitterClient import TwitterClient
+
+
+class TestRegistry:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.registry = Registry()
+        self.requests = self.registry.counter("requests_total", "Requests", ("endpoint", "status"))
+        self.latency = self.registry.histogram("latency_seconds", "Latency", ("endpoint",), buckets=(0.1, 1.0))
+
+    def test_render(self):
+        self.requests.inc(endpoint="/coins/markets", status=200)
+        self.requests.inc(2, endpoint="/coins/markets", status=200)
+        self.latency.observe(0.05, endpoint="/coins/markets")
+        self.latency.observe(0.5, endpoint="/coins/markets")
+        self.latency.observe(5, endpoint="/coins/markets")
+
+        text = self.registry.render()
+        with check:
+            check.is_in("# TYPE requests_total counter", text)
+            check.is_in('requests_total{endpoint="/coins/markets",status="200"} 3', text)
+            check.is_in('latency_seconds_bucket{endpoint="/coins/markets",le="0.1"} 1', text)
+            check.is_in('latency_seconds_bucket{endpoint="/coins/markets",le="1.0"} 2', text)
+            check.is_in('latency_seconds_bucket{endpoint="/coins/markets",le="+Inf"} 3', text)
+            check.is_in('latency_seconds_sum{endpoint="/coins/markets"} 5.55', text)
+            check.is_in('latency_seconds_count{endpoint="/coins/markets"} 3', text)
+
+    def test_labels_must_match(self):
+        with pytest.raises(ValueError):
+            self.requests.inc(endpoint="/coins/markets")
+
+    def test_registering_twice_returns_the_same_metric(self):
+        assert self.registry.counter("requests_total", "Requests", ("endpoint", "status")) is self.requests
+
+    def test_textfile(self, tmp_path):
+        self.requests.inc(endpoint="/search/trending", status=429)
+        path = tmp_path / "nate.prom"
+
+        write_textfile(str(path), self.registry)
+
+        assert path.read_text() == self.registry.render()
+
+    def test_http_endpoint(self):
+        self.requests.inc(endpoint="/search/trending", status=200)
+        server = serve(0, metrics_registry=self.registry)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+
+        assert body == self.registry.render()
+
+
+class TestInstrumentation:
+    def test_parse_completion(self):
+        usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=80,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+        client = SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            parse=lambda **kwargs: SimpleNamespace(usage=usage)
+        ))))
+        calls = metrics.openai_requests.get(agent="metrics-test", status="ok")
+
+        parse_completion(client, agent="metrics-test", model="gpt-4o-mini", messages=[])
+
+        with check:
+            check.equal(metrics.openai_requests.get(agent="metrics-test", status="ok"), calls + 1)
+            check.equal(metrics.openai_tokens.get(agent="metrics-test", type="cached"), 1024)
+            check.equal(metrics.openai_request_seconds.count(agent="metrics-test"), 1)
+
+    def test_posted_tweets_are_counted(self):
+        request = TwitterClient._instrumented(lambda method, route, **kwargs: SimpleNamespace(status_code=201))
+        posted = metrics.tweets_posted.get()
+
+        request("POST", "/2/tweets", json={"text": "gm"}, user_auth=True)
+
+        with check:
+            check.equal(metrics.tweets_posted.get(), posted + 1)
+            check.greater_equal(metrics.twitter_requests.get(method="POST", route="/2/tweets", status=201), 1)
+
+    def test_failed_tweets_are_counted(self):
+        def fail(method, route, **kwargs):
+            raise RuntimeError("connection reset")
+
+        request = TwitterClient._instrumented(fail)
+        failed = metrics.tweets_failed.get()
+
+        with pytest.raises(RuntimeError):
+            request("POST", "/2/tweets", json={"text": "gm"}, user_auth=True)
+
+        assert metrics.tweets_failed.get() == failed + 1
+
+    def test_db_commits_are_observed(self, tmp_path):
+        _, Session = init_db(str(tmp_path / "tweets.db"))
+        commits = metrics.db_commit_seconds.count()
+
+        session = Session()
+        session.commit()
+        session.close()
+
+        assert metrics.db_commit_seconds.count() == commits + 1
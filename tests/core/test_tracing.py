@@ -0,0 +1,99 @@
+import json
+import pytest
+from click.testing import CliRunner
+from pytest_check import check
+from sqlalchemy import text
+from app.cli.commands import cli
+from app.core.tracing import DB, HTTP, LLM, Tracer, span, to_otlp, tracer
+from app.db.Init_db import init_db
+
+
+class TestTracing:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.tracer = Tracer(enabled=True)
+        yield
+        tracer.disable()
+        tracer.clear()
+
+    def test_spans_nest(self):
+        with self.tracer.span("command") as root:
+            with self.tracer.span("coingecko GET /search/trending", kind=HTTP) as child:
+                child.set(status_code=200)
+
+        with check:
+            check.equal([s.name for s in self.tracer.spans], ["coingecko GET /search/trending", "command"])
+            check.equal(child.parent_id, root.span_id)
+            check.equal(child.trace_id, root.trace_id)
+            check.equal(child.attributes, {"status_code": 200})
+            check.greater_equal(root.duration, child.duration)
+
+    def test_disabled_tracer_records_nothing(self):
+        self.tracer.disable()
+        with self.tracer.span("ignored") as s:
+            s.set(status_code=200)
+        self.tracer.record("ignored", DB, 0.0, 1.0)
+
+        assert self.tracer.spans == []
+
+    def test_errors_are_recorded(self):
+        with pytest.raises(ValueError):
+            with self.tracer.span("failing"):
+                raise ValueError("bad")
+
+        assert self.tracer.spans[0].error == "ValueError: bad"
+
+    def test_report_aggregates_stages(self):
+        with self.tracer.span("command"):
+            for _ in range(2):
+                with self.tracer.span("openai generator", kind=LLM) as s:
+                    s.set(prompt_tokens=100, completion_tokens=20, cached_tokens=50)
+
+        generator = next(stage for stage in self.tracer.summary() if stage["name"] == "openai generator")
+        report = self.tracer.format_report()
+        with check:
+            check.equal(generator["calls"], 2)
+            check.equal(generator["prompt_tokens"], 200)
+            check.is_in("200 prompt (100 cached) / 40 completion tokens", report)
+
+    def test_otlp_export(self):
+        with self.tracer.span("command"):
+            with self.tracer.span("twitter POST /2/tweets", kind=HTTP, status_code=201):
+                pass
+
+        spans = to_otlp(self.tracer.spans)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        child, root = spans
+        with check:
+            check.equal(child["parentSpanId"], root["spanId"])
+            check.equal(child["kind"], 3)
+            check.is_in({"key": "status_code", "value": {"intValue": "201"}}, child["attributes"])
+            check.greater_equal(int(child["endTimeUnixNano"]), int(child["startTimeUnixNano"]))
+
+    def test_db_transactions_are_traced(self, tmp_path):
+        engine, Session = init_db(str(tmp_path / "tweets.db"))
+        tracer.enable()
+        with span("command"):
+            session = Session()
+            session.execute(text("SELECT 1"))
+            session.commit()
+            session.close()
+
+        db_spans = [s for s in tracer.spans if s.kind == DB]
+        with check:
+            check.equal(len(db_spans), 1)
+            check.equal(db_spans[0].attributes["outcome"], "commit")
+            check.is_not_none(db_spans[0].parent_id)
+
+    def test_profile_flag(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        trace_file = tmp_path / "trace.jsonl"
+
+        result = CliRunner().invoke(
+            cli, ["--profile", "--trace-file", str(trace_file), "twitter", "resume", "--list"]
+        )
+
+        spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        with check:
+            check.equal(result.exit_code, 0, result.output)
+            check.is_in("Profile:", result.output)
+            check.is_in("nate twitter", [s["name"] for s in spans])
@@ -0,0 +1,106 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from pytest_check import check
+from app.db.Init_db import init_db
+from app.db.models.ConversationSummary_model import ConversationSummary
+from app.db.models.Tweet_model import Tweet
+from app.db.models.TimelineTweet_model import TimelineTweet
+from app.db.retention import compact_tweets, open_archive, prune_timeline, vacuum
+
+NOW = datetime(2024, 12, 31, 12, 0)
+
+
+def add_tweets(Session, conversation_id, days_ago, count=3):
+    session = Session()
+    for i in range(count):
+        session.add(Tweet(
+            tweet_id=f"{conversation_id}-{days_ago}-{i}",
+            text=f"tweet {i} of {conversation_id}",
+            author_id=str(i),
+            conversation_id=conversation_id,
+            username=f"user{i}",
+            created_at=NOW - timedelta(days=days_ago, minutes=count - i),
+        ))
+    session.commit()
+    session.close()
+
+
+@pytest.fixture
+def database(tmp_path):
+    engine, Session = init_db(str(tmp_path / "tweets.db"))
+    add_tweets(Session, "old", days_ago=60)
+    add_tweets(Session, "recent", days_ago=1)
+    return engine, Session
+
+
+class TestRetention:
+    def test_inactive_conversations_are_archived_and_summarized(self, database, tmp_path):
+        _, Session = database
+
+        result = compact_tweets(Session, retain_days=30, archive_dir=str(tmp_path / "archive"), now=NOW)
+
+        session = Session()
+        summary = session.get(ConversationSummary, "old")
+        with check:
+            check.equal((result.conversations, result.tweets), (1, 3))
+            check.equal([row["tweet_id"] for row in open_archive(result.archive)], ["old-60-0", "old-60-1", "old-60-2"])
+            check.equal({tweet.conversation_id for tweet in session.query(Tweet)}, {"recent"})
+            check.equal(summary.tweet_count, 3)
+            check.equal(summary.participants, "user0,user1,user2")
+            check.equal(summary.last_tweet_id, "old-60-2")
+            check.equal(summary.archive, result.archive)
+
+    def test_summaries_accumulate_across_runs(self, database, tmp_path):
+        _, Session = database
+        compact_tweets(Session, retain_days=30, archive_dir=str(tmp_path / "archive"), now=NOW)
+        add_tweets(Session, "old", days_ago=40, count=2)
+
+        compact_tweets(Session, retain_days=30, archive_dir=str(tmp_path / "archive"), now=NOW + timedelta(seconds=1))
+
+        summary = Session().get(ConversationSummary, "old")
+        with check:
+            check.equal(summary.tweet_count, 5)
+            check.equal(summary.last_tweet_id, "old-40-1")
+            check.equal(summary.first_tweet_at, NOW - timedelta(days=60, minutes=3))
+
+    def test_dry_run_changes_nothing(self, database, tmp_path):
+        _, Session = database
+
+        result = compact_tweets(Session, archive_dir=str(tmp_path / "archive"), now=NOW, dry_run=True)
+
+        with check:
+            check.equal((result.conversations, result.tweets, result.archive), (1, 3, None))
+            check.equal(Session().query(Tweet).count(), 6)
+            check.is_false(os.path.exists(tmp_path / "archive"))
+
+    def test_old_timeline_is_pruned(self, database):
+        _, Session = database
+        session = Session()
+        session.add_all([
+            TimelineTweet(tweet_id="1", text="old", fetched_at=NOW - timedelta(days=31)),
+            TimelineTweet(tweet_id="2", text="recent", fetched_at=NOW - timedelta(days=29)),
+        ])
+        session.commit()
+
+        deleted = prune_timeline(Session, retain_days=30, now=NOW)
+
+        with check:
+            check.equal(deleted, 1)
+            check.equal([row.tweet_id for row in session.query(TimelineTweet)], ["2"])
+
+    def test_unknown_compression(self, database):
+        with pytest.raises(ValueError):
+            compact_tweets(database[1], compression="lz4")
+
+    @pytest.mark.parametrize("incremental", [False, True])
+    def test_vacuum_shrinks_the_database(self, database, tmp_path, incremental):
+        engine, Session = database
+        add_tweets(Session, "large", days_ago=90, count=5000)
+        compact_tweets(Session, archive_dir=str(tmp_path / "archive"), now=NOW)
+        if incremental:
+            vacuum(engine, incremental=True)  # switches the database to incremental auto_vacuum
+            add_tweets(Session, "large", days_ago=90, count=5000)
+            compact_tweets(Session, archive_dir=str(tmp_path / "archive"), now=NOW + timedelta(seconds=1))
+
+        assert vacuum(engine, incremental=incremental) > 0
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+from pytest_check import check
+from sqlalchemy import text
+from app.db.Init_db import get_engine, init_db
+from app.db.models.Storage_model import Storage
+
+
+class TestSqliteTuning:
+    def test_engine_connections_are_tuned(self, tmp_path):
+        engine, _ = init_db(str(tmp_path / "tweets.db"))
+
+        with engine.connect() as connection:
+            with check:
+                check.equal(connection.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+                check.equal(connection.execute(text("PRAGMA synchronous")).scalar(), 1)  # NORMAL
+                check.equal(connection.execute(text("PRAGMA cache_size")).scalar(), -64000)
+
+    def test_engine_is_shared_per_file(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+
+        first, _ = init_db(path)
+        second, _ = init_db(path)
+
+        with check:
+            check.is_(first, second)
+            check.is_(get_engine(path), first)
+            check.is_not(get_engine(str(tmp_path / "other.db")), first)
+
+    def test_new_columns_are_added_to_existing_tables(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE tweets (id INTEGER PRIMARY KEY, tweet_id VARCHAR UNIQUE, text VARCHAR)")
+        connection.execute("INSERT INTO tweets (tweet_id, text) VALUES ('1', 'gm')")
+        connection.commit()
+
+        init_db(path)
+
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(tweets)")}
+        with check:
+            check.is_in("in_reply_to_tweet_id", columns)
+            check.equal(connection.execute("SELECT text FROM tweets").fetchall(), [("gm",)])
+
+    def test_storage_shares_the_database(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+        init_db(path)
+        storage = Storage(path)
+
+        storage.set("last_mention_id", 42)
+
+        tables = {row[0] for row in sqlite3.connect(path).execute("SELECT name FROM sqlite_master")}
+        with check:
+            check.equal(storage.get("last_mention_id"), 42)
+            check.is_in("tweets", tables)
+            check.is_in("storage", tables)
+
+    def test_storage_from_many_threads(self, tmp_path):
+        storage = Storage(str(tmp_path / "tweets.db"))
+
+        threads = [threading.Thread(target=storage.set, args=(f"key{i}", i)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [storage.get(f"key{i}") for i in range(20)] == list(range(20))
+
+    def test_legacy_storage_is_migrated(self, tmp_path):
+        legacy_path = tmp_path / "storage.db"
+        legacy = Storage(str(legacy_path))
+        legacy.set("thread_checkpoint:abc", "{}")
+        legacy.set("identity:123", "old")
+        legacy.close()
+        storage = Storage(str(tmp_path / "tweets.db"))
+        storage.set("identity:123", "new")
+        storage.close()
+
+        storage = Storage(str(tmp_path / "tweets.db"), legacy_path=str(legacy_path))
+
+        with check:
+            check.equal(storage.get("thread_checkpoint:abc"), "{}")
+            check.equal(storage.get("identity:123"), "new")
+            check.is_false(legacy_path.exists())
+
+    def test_readers_are_not_blocked_by_a_writer(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+        storage = Storage(path)
+        storage.set("key", "committed")
+        writer = sqlite3.connect(path)
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("UPDATE storage SET value = 'uncommitted' WHERE key = 'key'")
+        storage.invalidate()
+
+        value = storage.get("key")
+
+        writer.rollback()
+        assert value == "committed"
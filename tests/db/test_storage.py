@@ -0,0 +1,98 @@
+import sqlite3
+from datetime import datetime
+from unittest.mock import patch
+from pytest_check import check
+from app.db.models.Storage_model import Storage
+
+
+class TestStorage:
+    def test_values_keep_their_type(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+        storage = Storage(path)
+        now = datetime(2024, 11, 25, 12, 0)
+
+        storage.set_many({"int": 42, "dict": {"a": [1, 2]}, "str": "42", "bytes": b"\x00\x01", "time": now})
+        storage.close()
+        storage = Storage(path)
+
+        with check:
+            check.equal(storage.get("int"), 42)
+            check.equal(storage.get("dict"), {"a": [1, 2]})
+            check.equal(storage.get("str"), "42")
+            check.equal(storage.get("bytes"), b"\x00\x01")
+            check.equal(storage.get_timestamp("time"), now)
+
+    def test_legacy_string_values_are_read_as_strings(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE storage (key TEXT PRIMARY KEY, value TEXT, updated_at TIMESTAMP)")
+        conn.execute("INSERT INTO storage VALUES ('last_check', '2024-11-25T12:00:00', NULL)")
+        conn.commit()
+        conn.close()
+
+        storage = Storage(path)
+
+        with check:
+            check.equal(storage.get("last_check"), "2024-11-25T12:00:00")
+            check.equal(storage.get_timestamp("last_check"), datetime(2024, 11, 25, 12, 0))
+
+    def test_reads_are_served_from_the_cache(self, tmp_path):
+        storage = Storage(str(tmp_path / "tweets.db"))
+        storage.set("key", "value")
+        storage.get("missing")
+        storage._conn = sqlite3.connect(":memory:")  # any query would fail, there is no table
+
+        with check:
+            check.equal(storage.get("key"), "value")
+            check.is_none(storage.get("missing"))
+            check.equal(storage.get_many(["key", "missing"]), {"key": "value"})
+
+    def test_cached_values_are_copies(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+        storage = Storage(path)
+        progress = {"done": ["alice"]}
+        storage.set("progress", progress)
+        storage.set("pair", (1, 2))
+
+        progress["done"].append("bob")
+        storage.get("progress")["done"].append("carol")
+
+        with check:
+            check.equal(storage.get("progress"), {"done": ["alice"]})
+            check.equal(storage.get_many(["progress"]), {"progress": {"done": ["alice"]}})
+            # The same type as after a restart
+            check.equal(storage.get("pair"), [1, 2])
+            check.equal(Storage(path).get("pair"), [1, 2])
+
+    def test_get_many_reads_uncached_keys(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+        writer = Storage(path)
+        writer.set_many({f"key{i}": i for i in range(1200)})
+        storage = Storage(path)
+
+        values = storage.get_many([f"key{i}" for i in range(1200)] + ["missing"])
+
+        assert values == {f"key{i}": i for i in range(1200)}
+
+    def test_values_expire(self, tmp_path):
+        storage = Storage(str(tmp_path / "tweets.db"))
+        with patch("app.db.models.Storage_model.time.time", return_value=1000.0):
+            storage.set("short", 1, ttl=60)
+            storage.set("forever", 2)
+
+        with patch("app.db.models.Storage_model.time.time", return_value=1061.0):
+            with check:
+                check.equal(storage.get("short", "expired"), "expired")
+                check.equal(storage.get("forever"), 2)
+                check.equal(storage.get_many(["short", "forever"]), {"forever": 2})
+
+    def test_delete(self, tmp_path):
+        path = str(tmp_path / "tweets.db")
+        storage = Storage(path)
+        storage.set("key", "value")
+
+        storage.delete("key")
+
+        with check:
+            check.is_none(storage.get("key"))
+            check.is_none(Storage(path).get("key"))
@@ -0,0 +1,117 @@
+import threading
+import pytest
+from pytest_check import check
+from app.scheduler.Scheduler import Job, Scheduler
+from app.twitter.RateLimits import RateLimits
+
+
+class TestScheduler:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.scheduler = Scheduler(max_workers=4, tick=0.01)
+        yield
+        self.scheduler.stop(wait=True)
+
+    def test_overlapping_runs_are_skipped(self):
+        """A job still running is not started again"""
+        release = threading.Event()
+        finished = threading.Event()
+        job = self.scheduler.add_job(Job(name="slow", func=release.wait, interval=0))
+        self.scheduler.on_finished = lambda _: finished.set()
+
+        first = self.scheduler.run_pending()
+        second = self.scheduler.run_pending()
+        release.set()
+        finished.wait(1)
+
+        with check:
+            check.equal(first, ["slow"])
+            check.equal(second, [])
+            check.equal(job.stats.skipped, 1)
+            check.equal(job.stats.runs, 1)
+
+    def test_failures_and_timing_are_recorded(self):
+        """Failed runs are counted and timed"""
+        finished = threading.Event()
+        self.scheduler.on_finished = lambda _: finished.set()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        self.scheduler.add_job(Job(name="failing", func=fail, interval=60))
+        self.scheduler.run_pending()
+        finished.wait(1)
+
+        stats = self.scheduler.stats()["failing"]
+        with check:
+            check.equal(stats["failures"], 1)
+            check.equal(stats["last_error"], "boom")
+            check.greater_equal(stats["last_duration"], 0)
+
+    def test_failed_command_runs_are_counted(self, monkeypatch):
+        """A command run by the daemon that fails is a failed job run"""
+        from app.cli import commands
+
+        def unavailable():
+            raise RuntimeError("CoinGecko unavailable")
+
+        monkeypatch.setattr(commands, "get_crypto_service", unavailable)
+        finished = threading.Event()
+        self.scheduler.on_finished = lambda _: finished.set()
+        self.scheduler.add_job(commands.parse_job_spec("trending-crypto:60:--dry-run", jitter=0))
+        self.scheduler.run_pending()
+        finished.wait(1)
+
+        stats = self.scheduler.stats()["trending-crypto --dry-run"]
+        with check:
+            check.equal(stats["failures"], 1)
+            check.equal(stats["last_error"], "CoinGecko unavailable")
+
+    def test_failed_posts_are_counted(self):
+        """A journal entry that fails to post fails the job run that posted it"""
+        from types import SimpleNamespace
+        from app.cli import commands
+        from app.core.exceptions import TwitterRateLimitError
+
+        def post_entry(entry_id):
+            raise TwitterRateLimitError("POST /2/tweets", 60)
+
+        client = SimpleNamespace(post_entry=post_entry)
+        finished = threading.Event()
+        self.scheduler.on_finished = lambda _: finished.set()
+        self.scheduler.add_job(Job(name="post", func=lambda: commands.post_journal_entry(client, 7), interval=60))
+        self.scheduler.run_pending()
+        finished.wait(1)
+
+        stats = self.scheduler.stats()["post"]
+        with check:
+            check.equal(stats["failures"], 1)
+            check.is_in("Error posting journal entry 7", stats["last_error"])
+
+    def test_jobs_run_on_their_interval(self):
+        """A job is not due again before its interval has passed"""
+        job = self.scheduler.add_job(Job(name="tick", func=lambda: None, interval=60, jitter=5))
+        now = job.next_run
+        self.scheduler.run_pending(now=now)
+
+        with check:
+            check.greater_equal(job.next_run, now + 60)
+            check.less_equal(job.next_run, now + 65)
+            check.equal(self.scheduler.run_pending(now=now + 30), [])
+
+    def test_jobs_on_exhausted_endpoints_are_deferred(self):
+        """A job whose endpoint has no requests left waits for the reset, the others still run"""
+        limits = RateLimits(clock=lambda: 1000.0)
+        limits.update("GET", "/2/users/1/mentions",
+                      {"x-rate-limit-limit": "180", "x-rate-limit-remaining": "0", "x-rate-limit-reset": "1300"})
+        self.scheduler.rate_limits = limits
+        reply = self.scheduler.add_job(Job(name="reply", func=lambda: None, interval=60,
+                                           endpoints=[("GET", "/2/users/:id/mentions")]))
+        post = self.scheduler.add_job(Job(name="post", func=lambda: None, interval=60,
+                                          endpoints=[("POST", "/2/tweets")]))
+        now = post.next_run
+
+        with check:
+            check.equal(self.scheduler.run_pending(now=now), ["post"])
+            check.equal(reply.next_run, now + 300)
+            check.equal(reply.stats.deferred, 1)
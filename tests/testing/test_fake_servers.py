@@ -0,0 +1,116 @@
+import requests
+import pytest
+import tweepy
+from pytest_check import check
+from app.ai.TweetGeneratorOpenAI import TweetGeneratorOpenAI
+from app.ai.models import TweetModel, TweetThreadModel
+from app.core.exceptions import RateLimitError
+from app.services.CryptoService import CryptoService
+from app.testing.fake_servers import FakeCoinGeckoServer, FakeOpenAIServer, FakeTwitterServer
+from app.twitter.TwitterClient import TwitterClient
+
+
+class TestFakeTwitter:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with FakeTwitterServer(mentions=3) as server:
+            self.server = server
+            self.client = TwitterClient("key", "secret", "token", "token_secret", "bearer",
+                                        db_path=str(tmp_path / "tweets.db"), base_url=server.base_url)
+            yield
+
+    def test_identity(self):
+        with check:
+            check.equal(self.client.username, "AIpe6571")
+            check.equal(self.client.user_id, 1)
+
+    def test_post_thread(self):
+        thread = TweetThreadModel(
+            topic="eth",
+            tweets=[TweetModel(quote_tweet_id=None, text=f"tweet {i}", username="AIpe6571") for i in range(3)],
+            timestamp="2024-01-01T00:00:00Z",
+        )
+
+        self.client.post_thread(thread)
+
+        posted = sorted((t for t in self.server.tweets.values() if t["author_id"] == "1"), key=lambda t: int(t["id"]))
+        with check:
+            check.equal([t["text"] for t in posted], ["tweet 0", "tweet 1", "tweet 2"])
+            check.equal({t["conversation_id"] for t in posted}, {posted[0]["id"]})
+
+    def test_conversations_from_mentions(self):
+        conversations = self.client.get_conversations()
+
+        with check:
+            check.equal(set(conversations), {tweet["conversation_id"] for tweet in self.server.tweets.values()})
+            # API tweets and the ones saved while fetching them are merged, not repeated
+            check.equal(sum(len(conversation) for conversation in conversations.values()), len(self.server.tweets))
+
+    def test_rate_limit_headers_and_429(self):
+        self.server.windows.clear()
+        self.server.rate_limit_for(("GET", "^/2/users/me$"), 1, 900)
+        api = tweepy.Client(bearer_token="bearer", consumer_key="key", consumer_secret="secret",
+                            access_token="token", access_token_secret="token_secret")
+        self.client.client = api
+        self.client._use_base_url(self.server.base_url)
+
+        api.get_me()
+        with pytest.raises(tweepy.TooManyRequests) as error:
+            api.get_me()
+
+        with check:
+            check.equal(error.value.response.headers["x-rate-limit-remaining"], "0")
+            check.equal(self.server.statuses[429], 1)
+
+
+class TestFakeCoinGecko:
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch):
+        with FakeCoinGeckoServer(coins=50) as server:
+            self.server = server
+            monkeypatch.setenv("COINGECKO_BASE_URL", server.base_url)
+            self.service = CryptoService()
+            yield
+
+    def test_trending_and_markets(self):
+        trending = self.service.get_search_trending_coins(limit=3)
+        gainers = self.service.get_market_trending_coins(category="gainers", limit=3)
+
+        changes = [coin["quote"]["USD"]["percent_change_24h"] for coin in gainers]
+        with check:
+            check.equal([coin["symbol"] for coin in trending], ["C0", "C1", "C2"])
+            check.equal(changes, sorted(changes, reverse=True))
+
+    def test_rate_limit(self):
+        self.server.rate_limit_for(("GET", "^/search/trending$"), 30, 60).remaining = 0
+
+        with pytest.raises(RateLimitError):
+            self.service._make_request("/search/trending")
+
+    def test_injected_errors(self):
+        self.server.error_rate = 1.0
+
+        response = requests.get(f"{self.server.base_url}/global")
+
+        assert response.status_code == 503
+
+
+class TestFakeOpenAI:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        with FakeOpenAIServer() as server:
+            self.server = server
+            self.generator = TweetGeneratorOpenAI(api_key="test", base_url=server.base_url)
+            self.generator.client = self.generator.client.with_options(max_retries=0)
+            yield
+
+    def test_structured_output(self):
+        tweet = self.generator.create_tweet(timeline=[])
+
+        assert tweet.text == "fake tweet"
+
+    def test_streamed_thread(self):
+        tweets = list(self.generator.stream_thread(timeline=[]))
+
+        assert [tweet.text for tweet in tweets] == ["fake tweet 1", "fake tweet 2", "fake tweet 3"]
@@ -0,0 +1,98 @@
+import pytest
+import tweepy
+from pytest_check import check
+from app.testing.fake_servers import FakeTwitterServer
+from app.twitter.BulkFollower import BulkFollower
+from app.twitter.TwitterClient import TwitterClient
+
+
+class TestBulkFollower:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with FakeTwitterServer(mentions=0) as server:
+            self.server = server
+            self.client = TwitterClient("key", "secret", "1-token", "token_secret", "bearer",
+                                        db_path=str(tmp_path / "tweets.db"), base_url=server.base_url)
+            self.slept = []
+            self.follower = BulkFollower(self.client, sleep=self.slept.append)
+            yield
+
+    def requests(self, method, fragment):
+        return sum(count for (m, path), count in self.server.requests.items() if m == method and fragment in path)
+
+    def test_resolves_in_batches_and_skips_followed_accounts(self):
+        for i in range(140):
+            self.server.following.add(self.server.add_user(f"user{i}")["id"])
+        usernames = [f"@user{i}" for i in range(150)] + ["Bob", "not-a-user!"]
+
+        result = self.follower.follow(usernames)
+
+        with check:
+            check.equal(self.requests("GET", "/2/users/by"), 2)
+            check.equal(len(result.followed), 11)
+            check.equal(len(result.already_following), 140)
+            check.equal(result.not_found, ["not-a-user!"])
+            check.equal(self.requests("POST", "/following"), 11)
+            check.equal(len(self.server.following), 151)
+
+    def test_malformed_usernames_are_not_looked_up(self):
+        usernames = ["alice", "bad-name", "dot.name", "a_username_too_long", "bob"]
+
+        result = self.follower.follow(usernames)
+
+        with check:
+            check.equal(sorted(result.not_found), ["a_username_too_long", "bad-name", "dot.name"])
+            check.equal(sorted(result.followed), ["alice", "bob"])
+            check.equal(self.requests("GET", "/2/users/by"), 1)
+            check.equal(self.server.statuses[400], 0)
+
+    def test_rejected_batch_is_looked_up_one_at_a_time(self):
+        resolved = self.follower._lookup(["alice", "bad-name", "bob"])
+
+        with check:
+            check.equal(resolved["bad-name"], None)
+            check.is_not_none(resolved["alice"])
+            check.is_not_none(resolved["bob"])
+            check.equal(self.server.statuses[400], 2)
+
+    def test_follows_are_paced_by_the_rate_limit_headers(self):
+        self.follower.follow(["alice", "bob", "carol"])
+
+        # The first follow has no budget to go by, the next ones spread the
+        # remaining requests over the window
+        with check:
+            check.equal(len(self.slept), 2)
+            check.is_true(all(0 < seconds < 900 / 48 for seconds in self.slept))
+
+    def test_interrupted_list_resumes(self):
+        usernames = ["alice", "bob", "carol"]
+        follow_user = self.client.client.follow_user
+
+        def flaky_follow(target_user_id, **kwargs):
+            if self.server.users[str(target_user_id)]["username"] == "bob":
+                raise tweepy.TweepyException("connection reset")
+            return follow_user(target_user_id, **kwargs)
+
+        self.client.client.follow_user = flaky_follow
+        first = self.follower.follow(usernames)
+        del self.client.client.follow_user
+        lookups = self.requests("GET", "/2/users/by")
+
+        # Forget the cached following list, the progress alone knows who was done
+        self.client.storage.delete(self.follower.following_key)
+        second = BulkFollower(self.client, sleep=self.slept.append).follow(usernames)
+
+        with check:
+            check.equal(first.followed, ["alice", "carol"])
+            check.equal(list(first.failed), ["bob"])
+            check.equal(second.followed, ["bob"])
+            check.equal(second.already_following, ["alice", "carol"])
+            check.equal(self.requests("GET", "/2/users/by"), lookups)
+            check.is_none(self.client.storage.get(BulkFollower.progress_key(usernames)))
+
+    def test_following_list_is_cached(self):
+        self.follower.follow(["alice"])
+        self.follower.follow(["bob"])
+
+        assert self.requests("GET", "/following") == 1
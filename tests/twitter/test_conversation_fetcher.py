@@ -0,0 +1,176 @@
+import time
+from datetime import timedelta
+import pytest
+from pytest_check import check
+from app.core import metrics
+from app.testing.fake_servers import FakeTwitterServer, snowflake_id
+from app.twitter.ConversationFetcher import ConversationFetcher
+from app.twitter.TwitterClient import TwitterClient
+from app.twitter.TweetRecord import TweetRecord
+
+
+class TestConversationFetcher:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with FakeTwitterServer(mentions=0) as server:
+            self.server = server
+            self.alice = server.add_user("alice")
+            self.root = server.add_tweet(self.alice["id"], "gm @AIpe6571, what is your take on $ETH?")
+            for i in range(3):
+                server.add_tweet(self.alice["id"], f"@AIpe6571 reply {i}", conversation_id=self.root["id"])
+            self.client = TwitterClient("key", "secret", "1-token", "token_secret", "bearer",
+                                        db_path=str(tmp_path / "tweets.db"), base_url=server.base_url)
+            yield
+
+    def searches(self):
+        return self.server.requests[("GET", "^/2/tweets/search/recent$")]
+
+    def test_fresh_conversation_is_not_fetched_again(self):
+        fresh = metrics.conversation_fetches.get(result="fresh")
+        first = self.client.get_tweets_for_conversation(self.root["id"])
+        second = self.client.get_tweets_for_conversation(self.root["id"])
+
+        with check:
+            check.equal(self.searches(), 1)
+            check.equal(len(first), 4)
+            check.equal(second, first)
+            check.equal(first[0].id, self.root["id"])
+            check.equal(metrics.conversation_fetches.get(result="fresh"), fresh + 1)
+
+    def test_stale_conversation_only_fetches_new_replies(self):
+        self.client.conversations.fresh_for = timedelta(0)
+        incremental = metrics.conversation_fetches.get(result="incremental")
+        self.client.get_tweets_for_conversation(self.root["id"])
+        reply = self.server.add_tweet(self.alice["id"], "@AIpe6571 one more thing", conversation_id=self.root["id"])
+
+        tweets = self.client.get_tweets_for_conversation(self.root["id"])
+        state = self.client.storage.get(self.client.conversations.state_key(self.root["id"]))
+
+        with check:
+            check.equal(self.searches(), 2)
+            check.equal(len(tweets), 5)
+            check.equal(tweets[-1].id, reply["id"])
+            check.equal(state["newest_id"], reply["id"])
+            check.equal(metrics.conversation_fetches.get(result="incremental"), incremental + 1)
+
+    def test_refresh_ignores_the_freshness_window(self):
+        self.client.conversations.fetch(self.root["id"])
+        self.client.conversations.fetch(self.root["id"], refresh=True)
+
+        assert self.searches() == 2
+
+    def age_state(self, days):
+        """Pretend the conversation was last fetched when its newest tweet was `days` old"""
+        key = self.client.conversations.state_key(self.root["id"])
+        state = self.client.storage.get(key)
+        state["newest_id"] = str(snowflake_id(time.time() - days * 24 * 3600))
+        self.client.storage.set(key, state)
+
+    def test_since_id_past_the_search_window_is_dropped(self):
+        self.client.conversations.fresh_for = timedelta(0)
+        full = metrics.conversation_fetches.get(result="full")
+        self.client.get_tweets_for_conversation(self.root["id"])
+        self.age_state(6.5)
+
+        tweets = self.client.get_tweets_for_conversation(self.root["id"])
+        state = self.client.storage.get(self.client.conversations.state_key(self.root["id"]))
+
+        with check:
+            check.equal(self.server.statuses[400], 0)
+            check.equal(len(tweets), 4)
+            check.equal(metrics.conversation_fetches.get(result="full"), full + 2)
+            check.equal(state["newest_id"], tweets[-1].id)
+
+    def test_rejected_since_id_is_cleared_and_refetched(self):
+        self.client.conversations.fresh_for = timedelta(0)
+        self.client.get_tweets_for_conversation(self.root["id"])
+        self.server.search_window = 24 * 3600
+        self.age_state(2)
+        reply = self.server.add_tweet(self.alice["id"], "@AIpe6571 one more thing", conversation_id=self.root["id"])
+
+        tweets = self.client.get_tweets_for_conversation(self.root["id"])
+        state = self.client.storage.get(self.client.conversations.state_key(self.root["id"]))
+
+        with check:
+            check.equal(self.server.statuses[400], 1)
+            check.equal(self.searches(), 3)
+            check.equal(tweets[-1].id, reply["id"])
+            check.equal(state["newest_id"], reply["id"])
+
+    def add_replies(self, count):
+        return [self.server.add_tweet(self.alice["id"], f"@AIpe6571 more {i}", conversation_id=self.root["id"])
+                for i in range(count)]
+
+    def test_long_conversations_are_paged(self):
+        self.add_replies(25)
+        self.client.conversations.page_size = 10
+
+        tweets = self.client.conversations.fetch(self.root["id"])
+
+        with check:
+            check.equal(self.searches(), 3)
+            check.equal(len(tweets), 29)
+            check.equal(len(self.client.conversations.stored(self.root["id"])), 29)
+
+    def test_pages_stop_at_the_cap(self):
+        replies = self.add_replies(25)
+        self.client.conversations.page_size = 10
+        self.client.conversations.max_tweets = 15
+
+        tweets = self.client.conversations.fetch(self.root["id"])
+
+        # The newest tweets come first
+        with check:
+            check.equal(self.searches(), 2)
+            check.equal([t.id for t in tweets], [r["id"] for r in replies[-15:]])
+            check.equal(len(self.client.conversations.stored(self.root["id"])), 15)
+
+    def test_replies_past_the_cap_are_fetched_next_time(self):
+        fetcher = self.client.conversations
+        fetcher.fresh_for = timedelta(0)
+        first = fetcher.fetch(self.root["id"])
+        replies = self.add_replies(25)
+        fetcher.page_size = 10
+        fetcher.max_tweets = 15
+
+        fetcher.fetch(self.root["id"])
+        capped = self.client.storage.get(fetcher.state_key(self.root["id"]))
+        tweets = fetcher.fetch(self.root["id"])
+        state = self.client.storage.get(fetcher.state_key(self.root["id"]))
+
+        with check:
+            # since_id only moves once the fetch stopped by the cap is finished
+            check.equal(capped["newest_id"], first[-1].id)
+            check.is_not_none(capped.get("next_token"))
+            check.equal(self.searches(), 5)
+            check.equal(len(fetcher.stored(self.root["id"])), 29)
+            check.equal(tweets[-1].id, replies[-1]["id"])
+            check.equal(state["newest_id"], replies[-1]["id"])
+            check.is_none(state.get("next_token"))
+
+    def test_reply_chain_walks_referenced_tweets(self):
+        parent = self.root
+        chain = [self.root]
+        for i in range(3):
+            parent = self.server.add_tweet(self.alice["id"], f"@AIpe6571 chain {i}", conversation_id=self.root["id"],
+                                           referenced_tweets=[{"type": "replied_to", "id": parent["id"]}])
+            chain.append(parent)
+        mention = TweetRecord(id=chain[-1]["id"], text=chain[-1]["text"], username="alice",
+                              conversation_id=self.root["id"], in_reply_to_tweet_id=chain[-2]["id"])
+        fetcher = ConversationFetcher(self.client, reply_chain_only=True)
+
+        tweets = self.client.get_tweets_for_conversation(self.root["id"], reply_to=mention, fetcher=fetcher)
+        lookups = self.server.requests[("GET", r"^/2/tweets/(\d+)$")]
+        again = self.client.get_tweets_for_conversation(self.root["id"], reply_to=mention, fetcher=fetcher)
+
+        with check:
+            # The options of a run do not leak into the client's own fetcher
+            check.is_false(self.client.conversations.reply_chain_only)
+            check.equal([t.id for t in tweets], [t["id"] for t in chain])
+            check.equal(tweets[0].username, "alice")
+            check.equal(self.searches(), 0)
+            # Each lookup also brings the tweet above it
+            check.equal(lookups, 2)
+            check.equal([t.id for t in again], [t.id for t in tweets])
+            check.equal(self.server.requests[("GET", r"^/2/tweets/(\d+)$")], 2)
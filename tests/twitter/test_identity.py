@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from pytest_check import check
+from app.twitter.TwitterClient import TwitterClient
+
+
+class TestIdentityCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        """Patch tweepy.Client and keep the databases in a temporary directory"""
+        monkeypatch.chdir(tmp_path)
+        self.tmp_path = tmp_path
+        with patch("app.twitter.TwitterClient.tweepy.Client") as tweepy_client:
+            self.api = tweepy_client.return_value
+            self.api.get_me.return_value = SimpleNamespace(
+                data=SimpleNamespace(username="AIpe6571", id=1)
+            )
+            yield
+
+    def make_client(self, access_token="token", **kwargs):
+        return TwitterClient("key", "secret", access_token, "token_secret", "bearer",
+                             db_path=str(self.tmp_path / "tweets.db"), **kwargs)
+
+    def test_construction_does_not_call_get_me(self):
+        self.make_client()
+
+        self.api.get_me.assert_not_called()
+
+    def test_identity_is_cached_across_clients(self):
+        first = self.make_client()
+        with check:
+            check.equal(first.username, "AIpe6571")
+            check.equal(first.user_id, 1)
+
+        second = self.make_client()
+        with check:
+            check.equal(second.user_id, 1)
+            check.equal(self.api.get_me.call_count, 1)
+
+    def test_identity_is_keyed_by_access_token(self):
+        self.make_client("token").user_id
+        self.make_client("other token").user_id
+
+        assert self.api.get_me.call_count == 2
+
+    def test_expired_identity_is_revalidated(self):
+        client = self.make_client()
+        stale = {"id": 1, "username": "old_name",
+                 "fetched_at": (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()}
+        client.storage.set(client.identity_key, json.dumps(stale))
+
+        with check:
+            check.equal(client.username, "AIpe6571")
+            check.equal(self.api.get_me.call_count, 1)
+
+    def test_stale_identity_is_kept_when_revalidation_fails(self):
+        client = self.make_client()
+        stale = {"id": 1, "username": "old_name",
+                 "fetched_at": (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()}
+        client.storage.set(client.identity_key, json.dumps(stale))
+        self.api.get_me.side_effect = RuntimeError("429 Too Many Requests")
+
+        assert client.username == "old_name"
+
+    def test_missing_identity_raises_when_get_me_fails(self):
+        client = self.make_client()
+        self.api.get_me.side_effect = RuntimeError("401 Unauthorized")
+
+        with pytest.raises(RuntimeError):
+            client.user_id
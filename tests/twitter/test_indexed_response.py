@@ -0,0 +1,47 @@
+import tweepy
+from pytest_check import check
+from app.twitter.IndexedResponse import IndexedResponse
+
+
+def make_response():
+    tweets = [
+        tweepy.Tweet({"id": "1", "text": "gm", "author_id": "10", "edit_history_tweet_ids": ["1"],
+                      "attachments": {"media_keys": ["3_1"]}}),
+        tweepy.Tweet({"id": "2", "text": "reply", "author_id": "11", "edit_history_tweet_ids": ["2"],
+                      "referenced_tweets": [{"type": "replied_to", "id": "1"}, {"type": "quoted", "id": "99"}]}),
+        tweepy.Tweet({"id": "3", "text": "who?", "author_id": "12", "edit_history_tweet_ids": ["3"]}),
+    ]
+    includes = {
+        "users": [tweepy.User({"id": "10", "name": "A", "username": "alice"}),
+                  tweepy.User({"id": "11", "name": "B", "username": "bob"})],
+        "tweets": [tweets[0]],
+        "media": [tweepy.Media({"media_key": "3_1", "type": "photo"})],
+    }
+    return tweepy.Response(data=tweets, includes=includes, errors=[], meta={"result_count": 3})
+
+
+class TestIndexedResponse:
+    def test_lookups(self):
+        response = IndexedResponse(make_response())
+        first, second, third = response.data
+
+        with check:
+            check.equal(response.author(first).username, "alice")
+            check.equal(response.username(second), "bob")
+            check.equal(response.username(third), "unknown")
+            check.is_none(response.author(third))
+            check.equal([(kind, tweet.id) for kind, tweet in response.referenced_tweets(second)], [("replied_to", 1)])
+            check.equal([media.type for media in response.media_of(first)], ["photo"])
+            check.equal(response.meta["result_count"], 3)
+
+    def test_empty_response(self):
+        response = IndexedResponse(tweepy.Response(data=None, includes={}, errors=[], meta={"result_count": 0}))
+
+        with check:
+            check.equal(response.data, [])
+            check.equal(response.users, {})
+
+    def test_of_reuses_an_index(self):
+        response = IndexedResponse(make_response())
+
+        assert IndexedResponse.of(response) is response
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from pytest_check import check
+from app.ai.models import TweetModel, TweetThreadModel
+from app.twitter.TwitterClient import TwitterClient
+
+
+def make_thread(count):
+    return TweetThreadModel(
+        topic="eth",
+        tweets=[TweetModel(quote_tweet_id=None, text=f"tweet {i}", username="AIpe6571") for i in range(count)],
+        timestamp="2024-01-01T00:00:00Z",
+    )
+
+
+class TestPostingJournal:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        """TwitterClient with a mocked tweepy client and temporary databases"""
+        monkeypatch.chdir(tmp_path)
+        with patch("app.twitter.TwitterClient.tweepy.Client") as tweepy_client:
+            tweepy_client.return_value.get_me.return_value = SimpleNamespace(
+                data=SimpleNamespace(username="AIpe6571", id=1)
+            )
+            self.client = TwitterClient("key", "secret", "token", "token_secret", "bearer",
+                                        db_path=str(tmp_path / "tweets.db"))
+        self.api = self.client.client
+        self.posted = []
+        self.fail_on = None
+
+        def create_tweet(text, quote_tweet_id=None, in_reply_to_tweet_id=None, **kwargs):
+            if text == self.fail_on:
+                raise RuntimeError("503 Service Unavailable")
+            tweet_id = str(100 + len(self.posted))
+            self.posted.append((text, in_reply_to_tweet_id))
+            return SimpleNamespace(data={"id": tweet_id})
+
+        self.api.create_tweet.side_effect = create_tweet
+
+    def test_resume_after_failure(self):
+        """A failed thread resumes after the last journaled tweet"""
+        entry_id = self.client.journal.record(make_thread(4), source="test")
+        self.fail_on = "tweet 2"
+        with pytest.raises(RuntimeError):
+            self.client.post_entry(entry_id)
+
+        with check:
+            check.equal(self.client.journal.get_entry(entry_id).status, "failed")
+            check.equal([entry.id for entry in self.client.journal.unfinished()], [entry_id])
+
+        self.fail_on = None
+        self.api.get_users_tweets.return_value = SimpleNamespace(data=[])
+        self.client.post_entry(entry_id)
+
+        planned = self.client.journal.planned_tweets(entry_id)
+        with check:
+            check.equal([text for text, _ in self.posted], ["tweet 0", "tweet 1", "tweet 2", "tweet 3"])
+            check.equal(self.posted[2][1], "101")
+            check.equal([tweet.tweet_id for tweet in planned], ["100", "101", "102", "103"])
+            check.equal(self.client.journal.get_entry(entry_id).status, "done")
+            check.equal(self.client.journal.unfinished(), [])
+
+    def test_attempted_tweet_is_not_reposted(self):
+        """A tweet posted before the process died is recovered from our timeline"""
+        entry_id = self.client.journal.record(make_thread(2), source="test")
+        self.client.journal.mark_attempt(entry_id, 0)
+        self.api.get_users_tweets.return_value = SimpleNamespace(
+            data=[SimpleNamespace(id=555, text="tweet 0")]
+        )
+
+        self.client.post_entry(entry_id)
+
+        with check:
+            check.equal(self.posted, [("tweet 1", "555")])
+            check.equal(self.client.journal.planned_tweets(entry_id)[0].tweet_id, "555")
+
+    def test_attempted_reply_is_recovered_from_the_api_text(self):
+        """The API returns the reply escaped, with a t.co link and the replied to user in front"""
+        reply = TweetModel(quote_tweet_id=None, text="$BTC & $ETH <3 https://example.com/chart", username="AIpe6571")
+        entry_id = self.client.journal.record(reply, source="test", reply_to_tweet_id="42", conversation_id="42")
+        self.client.journal.mark_attempt(entry_id, 0)
+        api_text = "@alice $BTC &amp; $ETH &lt;3 https://t.co/AbC123"
+        self.api.get_users_tweets.return_value = SimpleNamespace(data=[
+            SimpleNamespace(id=554, text=api_text, referenced_tweets=[SimpleNamespace(type="replied_to", id=41)]),
+            SimpleNamespace(id=555, text=api_text, referenced_tweets=[SimpleNamespace(type="replied_to", id=42)]),
+        ])
+
+        self.client.post_entry(entry_id)
+
+        with check:
+            check.equal(self.posted, [])
+            check.equal(self.client.journal.planned_tweets(entry_id)[0].tweet_id, "555")
+            check.equal(self.client.journal.get_entry(entry_id).status, "done")
+
+    def test_streamed_thread_is_resumed_from_the_journal(self):
+        """A thread journaled as it streams is resumed after the last posted tweet"""
+        entry_id = self.client.journal.record(
+            TweetThreadModel(topic="eth", tweets=[], timestamp="2024-01-01T00:00:00Z"), source="test"
+        )
+        self.fail_on = "tweet 2"
+        with pytest.raises(RuntimeError):
+            self.client.post_entry_stream(entry_id, iter(make_thread(4).tweets))
+
+        journaled = [tweet.text for tweet in self.client.journal.planned_tweets(entry_id)]
+        self.fail_on = None
+        self.api.get_users_tweets.return_value = SimpleNamespace(data=[])
+        self.client.post_entry(entry_id)
+
+        with check:
+            check.equal(journaled[:3], ["tweet 0", "tweet 1", "tweet 2"])
+            check.equal([text for text, _ in self.posted], journaled)
+            check.equal(self.posted[2][1], "101")
+            check.equal(self.client.journal.load_content(self.client.journal.get_entry(entry_id)).tweets[0].text,
+                        "tweet 0")
+            check.equal(self.client.journal.get_entry(entry_id).status, "done")
@@ -0,0 +1,87 @@
+import pytest
+from pytest_check import check
+from app.core import metrics
+from app.core.exceptions import TwitterRateLimitError
+from app.testing.fake_servers import FakeTwitterServer, RateLimitWindow
+from app.twitter.RateLimits import RateLimits, endpoint
+from app.twitter.TwitterClient import TwitterClient
+
+
+class TestRateLimits:
+    def test_delay_spreads_the_remaining_budget(self):
+        limits = RateLimits(clock=lambda: 1000.0)
+        limits.update("POST", "/2/users/1/following",
+                      {"x-rate-limit-limit": "50", "x-rate-limit-remaining": "9", "x-rate-limit-reset": "1100"})
+
+        with check:
+            check.equal(endpoint("POST", "/2/users/1/following"), ("POST", "/2/users/:id/following"))
+            check.equal(limits.delay("POST", "/2/users/2/following"), 10.0)
+            check.equal(limits.delay("GET", "/2/users/by"), 0.0)
+
+    def test_exhausted_budget_waits_for_the_reset(self):
+        now = [1000.0]
+        limits = RateLimits(clock=lambda: now[0])
+        limits.update("POST", "/2/users/1/following",
+                      {"x-rate-limit-limit": "50", "x-rate-limit-remaining": "0", "x-rate-limit-reset": "1300"})
+
+        with check:
+            check.equal(limits.delay("POST", "/2/users/1/following"), 300.0)
+            now[0] = 1300.0
+            check.equal(limits.delay("POST", "/2/users/1/following"), 0.0)
+            check.is_none(limits.update("GET", "/2/users/by", {}))
+
+    def test_budgets(self):
+        limits = RateLimits(clock=lambda: 1000.0)
+        limits.update("GET", "/2/users/1/mentions",
+                      {"x-rate-limit-limit": "180", "x-rate-limit-remaining": "179", "x-rate-limit-reset": "1900"})
+        limits.update("GET", "/2/tweets/search/recent",
+                      {"x-rate-limit-limit": "450", "x-rate-limit-remaining": "0", "x-rate-limit-reset": "1200"})
+
+        with check:
+            check.equal(limits.budgets()["GET /2/users/:id/mentions"],
+                        {"limit": 180, "remaining": 179, "reset_in": 900.0})
+            check.equal(limits.retry_after([("GET", "/2/users/:id/mentions")]), 0.0)
+            check.equal(limits.retry_after([("GET", "/2/users/:id/mentions"), ("GET", "/2/tweets/search/recent")]),
+                        200.0)
+            check.equal(metrics.twitter_rate_limit_remaining.get(method="GET", route="/2/tweets/search/recent"), 0)
+
+
+class TestClientRateLimits:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with FakeTwitterServer(mentions=0) as server:
+            self.server = server
+            # One users lookup left in the window
+            server.windows[("GET", "^/2/users/by$")] = RateLimitWindow(1, 900)
+            self.db_path = str(tmp_path / "tweets.db")
+            self.client = self.new_client()
+            yield
+
+    def new_client(self):
+        return TwitterClient("key", "secret", "1-token", "token_secret", "bearer",
+                             db_path=self.db_path, base_url=self.server.base_url)
+
+    def test_exhausted_endpoint_fails_fast_without_blocking_others(self):
+        self.client.client.get_users(usernames=["alice"], user_auth=True)
+
+        with pytest.raises(TwitterRateLimitError) as error:
+            self.client.client.get_users(usernames=["bob"], user_auth=True)
+        response = self.client.client.get_users_following(id="1", user_auth=True)
+
+        with check:
+            check.equal(self.server.requests[("GET", "^/2/users/by$")], 1)
+            check.equal(error.value.endpoint, "GET /2/users/by")
+            check.greater(error.value.retry_after, 800)
+            check.equal(response.meta["result_count"], 0)
+
+    def test_429_raises_instead_of_waiting(self):
+        self.client.client.get_users(usernames=["alice"], user_auth=True)
+
+        # A client that has not seen the headers yet gets the 429
+        with pytest.raises(TwitterRateLimitError) as error:
+            self.new_client().client.get_users(usernames=["bob"], user_auth=True)
+
+        with check:
+            check.equal(self.server.requests[("GET", "^/2/users/by$")], 2)
+            check.greater(error.value.retry_after, 800)
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+from pytest_check import check
+from app.twitter.ReplyContext import ReplyContextBuilder
+from app.twitter.TimelineRanker import estimate_tokens
+from app.twitter.TweetRecord import Conversation, TweetRecord
+from app.utils.utils import format_tweet_timeline
+
+START = datetime(2024, 11, 25, 12, 0, tzinfo=timezone.utc)
+
+
+def build_conversation(*tweets):
+    """Tweets as (id, parent id, username), one minute apart"""
+    conversation = Conversation("1", "AIpe6571")
+    for minute, (tweet_id, parent_id, username) in enumerate(tweets):
+        conversation.add(TweetRecord(id=tweet_id, text=f"tweet {tweet_id} " + "words " * 10, username=username,
+                                     conversation_id="1", in_reply_to_tweet_id=parent_id,
+                                     created_at=START + timedelta(minutes=minute)))
+    return conversation
+
+
+class TestReplyContextBuilder:
+    def test_side_branches_are_elided(self):
+        conversation = build_conversation(
+            ("1", None, "alice"),
+            ("2", "1", "bob"),
+            ("3", "1", "carol"),
+            ("4", "1", "dave"),
+            ("5", "1", "erin"),
+            ("6", "1", "AIpe6571"),
+            ("7", "6", "alice"),
+        )
+
+        context = ReplyContextBuilder(side_tweets=2).build(conversation)
+
+        with check:
+            check.equal([t.id for t in context], ["1", "4", "5", "6", "omitted", "7"])
+            check.equal(context[-2].text, "[2 replies in other branches omitted, from @bob, @carol]")
+
+    def test_long_chains_are_cut_below_the_root(self):
+        conversation = build_conversation(("1", None, "alice"),
+                                          *((str(i), str(i - 1), "bob") for i in range(2, 30)))
+        per_tweet = estimate_tokens(format_tweet_timeline([conversation.tweets[1]]))
+
+        context = ReplyContextBuilder(token_budget=per_tweet * 5).build(conversation)
+
+        with check:
+            check.equal([t.id for t in context], ["1", "omitted", "26", "27", "28", "29"])
+            check.equal(context[1].text, "[24 earlier replies in this thread omitted]")
+
+    def test_tweets_without_reply_links_fall_back_to_the_latest(self):
+        conversation = build_conversation(*((str(i), None, "bob") for i in range(1, 10)))
+        per_tweet = estimate_tokens(format_tweet_timeline([conversation.tweets[1]]))
+
+        context = ReplyContextBuilder(token_budget=per_tweet * 3).build(conversation)
+
+        assert [t.id for t in context] == ["1", "omitted", "8", "9"]
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from pytest_check import check
+from app.db.Init_db import init_db
+from app.testing.fake_servers import FakeTwitterServer
+from app.twitter.ReplyQueue import MAX_ATTEMPTS, ReplyQueue
+from app.twitter.TweetRecord import Conversation, TweetRecord
+from app.twitter.TwitterClient import TwitterClient
+
+NOW = datetime(2024, 11, 25, 12, 0, tzinfo=timezone.utc)
+
+
+def conversation(conversation_id, text="what is your take on $ETH?", minutes=0, tweet_id=None, username="alice",
+                 now=NOW):
+    conversation = Conversation(conversation_id, "AIpe6571")
+    conversation.add(TweetRecord(id=tweet_id or conversation_id, text=text, username=username,
+                                 conversation_id=conversation_id, created_at=now - timedelta(minutes=minutes)))
+    return conversation
+
+
+class TestReplyQueue:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        _, Session = init_db(str(tmp_path / "tweets.db"))
+        self.queue = ReplyQueue(Session, ttl=timedelta(hours=2))
+
+    def pending_ids(self, now=NOW):
+        return [item.conversation_id for item in self.queue.pending(now)]
+
+    def test_priority_order(self):
+        self.queue.push(conversation("1", minutes=90))
+        self.queue.push(conversation("2"))
+        self.queue.push(conversation("3"), followers=100000)
+        self.queue.push(conversation("4", text="airdrop giveaway claim free https://t.co/x"))
+
+        assert self.pending_ids() == ["3", "2", "1", "4"]
+
+    def test_conversations_age_out(self):
+        self.queue.push(conversation("1", minutes=150))
+        self.queue.push(conversation("2", minutes=30))
+
+        with check:
+            check.equal(self.queue.expire(NOW), 1)
+            check.equal(self.pending_ids(), ["2"])
+            check.equal(self.pending_ids(NOW + timedelta(hours=2)), [])
+
+    def test_answered_conversations_come_back_with_a_new_tweet(self):
+        self.queue.push(conversation("1"))
+        self.queue.set_status("1", "done")
+        self.queue.push(conversation("1"))
+        answered = self.pending_ids()
+        self.queue.push(conversation("1", tweet_id="5"))
+
+        with check:
+            check.equal(answered, [])
+            check.equal(self.pending_ids(), ["1"])
+            check.equal(self.queue.pending(NOW)[0].reply_to_tweet_id, "5")
+
+    def test_failed_replies_are_retried(self):
+        self.queue.push(conversation("1"))
+        statuses = []
+        for _ in range(MAX_ATTEMPTS):
+            self.queue.set_status("1", "failed", error="boom")
+            statuses.append(self.pending_ids())
+
+        assert statuses == [["1"]] * (MAX_ATTEMPTS - 1) + [[]]
+
+
+class TestPendingReplies:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with FakeTwitterServer(mentions=0) as server:
+            self.server = server
+            for username, followers in (("small", 10), ("big", 50000), ("medium", 1000)):
+                user = server.add_user(username, followers=followers)
+                server.add_tweet(user["id"], f"gm @AIpe6571, what is your take on $ETH? from {username}")
+            self.client = TwitterClient("key", "secret", "1-token", "token_secret", "bearer",
+                                        db_path=str(tmp_path / "tweets.db"), base_url=server.base_url)
+            yield
+
+    def test_pending_replies_are_ordered_and_persisted(self):
+        pending = self.client.get_pending_replies()
+        order = [conversation.last_tweet.username for conversation in pending.values()]
+        self.client.reply_queue.set_status(next(iter(pending)), "done")
+
+        with check:
+            check.equal(order, ["big", "medium", "small"])
+            check.equal(self.client.follower_counts[pending[next(iter(pending))].last_tweet.author_id], 50000)
+            check.equal([c.last_tweet.username for c in self.client.get_pending_replies().values()],
+                        ["medium", "small"])
+
+    def test_queued_conversations_missing_from_a_run_wait_for_their_deadline(self):
+        now = datetime.now(timezone.utc)
+        # Queued by earlier runs, one still within its deadline and one past it
+        self.client.reply_queue.push(conversation("999", now=now))
+        self.client.reply_queue.push(conversation("998"))
+
+        pending = self.client.get_pending_replies()
+
+        with check:
+            check.is_not_in("999", pending)
+            check.is_in("999", [item.conversation_id for item in self.client.reply_queue.pending(now)])
+            check.is_not_in("998", [item.conversation_id for item in self.client.reply_queue.pending(NOW)])
+            check.equal(len(pending), 3)
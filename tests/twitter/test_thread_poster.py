@@ -0,0 +1,81 @@
+import pytest
+from pytest_check import check
+from app.ai.models import TweetModel
+from app.db.models.Storage_model import Storage
+from app.twitter.ThreadPoster import StorageCheckpoints, ThreadPoster
+
+
+class FakeClient:
+    """Records posted tweets and fails on a given text"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.posted = []
+
+    def post_thread_tweet(self, tweet, in_reply_to_tweet_id=None):
+        if tweet.text == self.fail_on:
+            raise RuntimeError("create_tweet failed")
+        tweet_id = str(100 + len(self.posted))
+        self.posted.append((tweet.text, in_reply_to_tweet_id, tweet_id))
+        return tweet_id
+
+
+def make_tweets(count):
+    return [TweetModel(quote_tweet_id=None, text=f"tweet {i}", username="AIpe6571") for i in range(count)]
+
+
+class TestThreadPoster:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.checkpoints = StorageCheckpoints(Storage(str(tmp_path / "storage.db")))
+
+    def test_posts_through_stages_in_order(self):
+        """Stages are applied to each tweet and replies are chained"""
+        client = FakeClient()
+        poster = ThreadPoster(client, self.checkpoints, stages=[
+            lambda tweet: tweet.model_copy(update={"text": tweet.text.upper()}),
+            lambda tweet: tweet.model_copy(update={"text": tweet.text + "!"}),
+        ])
+
+        posted = poster.post(iter(make_tweets(3)), "key")
+
+        with check:
+            check.equal(
+                client.posted,
+                [("TWEET 0!", None, "100"), ("TWEET 1!", "100", "101"), ("TWEET 2!", "101", "102")],
+            )
+            check.equal([p.index for p in posted], [0, 1, 2])
+            check.is_true(all(p.posted_after >= p.ready_after for p in posted))
+            check.equal(poster.get_checkpoint("key"), {"index": 2, "tweet_id": "102", "done": True})
+
+    def test_resumes_after_failure(self):
+        """A failed thread continues after its last posted tweet"""
+        tweets = make_tweets(4)
+        client = FakeClient(fail_on="tweet 2")
+        with pytest.raises(RuntimeError):
+            ThreadPoster(client, self.checkpoints).post(iter(tweets), "key")
+
+        client.fail_on = None
+        posted = ThreadPoster(client, self.checkpoints).post(iter(tweets), "key")
+
+        with check:
+            check.equal([p.index for p in posted], [2, 3])
+            check.equal(
+                [text for text, _, _ in client.posted],
+                ["tweet 0", "tweet 1", "tweet 2", "tweet 3"],
+            )
+            check.equal(client.posted[2][1], "101")
+            # A finished thread is not posted again
+            check.equal(ThreadPoster(client, self.checkpoints).post(iter(tweets), "key"), [])
+
+    def test_stage_error_is_raised(self):
+        """Errors raised in a stage stop the thread"""
+        def failing_stage(tweet):
+            if tweet.text == "tweet 1":
+                raise ValueError("bad tweet")
+            return tweet
+
+        client = FakeClient()
+        with pytest.raises(ValueError):
+            ThreadPoster(client, self.checkpoints, stages=[failing_stage]).post(iter(make_tweets(3)), "key")
+        check.equal(len(client.posted), 1)
@@ -0,0 +1,71 @@
+import pytest
+from pytest_check import check
+from app.testing.fake_servers import FakeTwitterServer
+from app.twitter.TwitterClient import TwitterClient
+from app.twitter.TweetRecord import TweetRecord
+
+
+class TestTimelineIngester:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with FakeTwitterServer(mentions=0) as server:
+            self.server = server
+            self.alice = server.add_user("alice")
+            for i in range(25):
+                server.add_tweet(self.alice["id"], f"timeline tweet {i}",
+                                 public_metrics={"retweet_count": 0, "reply_count": 0, "like_count": i, "quote_count": 0})
+            server.add_tweet("1", "our own tweet")
+            self.client = TwitterClient("key", "secret", "1-token", "token_secret", "bearer",
+                                        db_path=str(tmp_path / "tweets.db"), base_url=server.base_url)
+            self.client.timeline.page_size = 10
+            yield
+
+    def timeline_requests(self):
+        return sum(count for (method, path), count in self.server.requests.items() if "timelines" in path)
+
+    def test_sync_pages_through_the_timeline(self):
+        stored = self.client.timeline.sync()
+
+        timeline = self.client.timeline.recent()
+        with check:
+            check.equal(stored, 25)
+            check.equal(self.timeline_requests(), 3)
+            check.equal(len(timeline), 25)
+            check.equal(timeline[0].text, "timeline tweet 24")
+            check.equal(timeline[0].username, "alice")
+            check.equal(timeline[0].public_metrics["like_count"], 24)
+
+    def test_sync_only_fetches_new_tweets(self):
+        self.client.timeline.sync()
+        self.server.add_tweet(self.alice["id"], "new tweet")
+
+        stored = self.client.timeline.sync()
+
+        with check:
+            check.equal(stored, 1)
+            check.equal(self.timeline_requests(), 4)
+            check.equal(self.client.timeline.recent(limit=1)[0].text, "new tweet")
+
+    def test_interrupted_sync_continues_from_its_page(self):
+        self.client.timeline.max_pages = 1
+
+        stored = [self.client.timeline.sync() for _ in range(3)]
+        self.server.add_tweet(self.alice["id"], "new tweet")
+        stored.append(self.client.timeline.sync())
+
+        with check:
+            check.equal(stored, [10, 10, 5, 1])
+            check.equal(len(self.client.timeline.recent()), 26)
+
+    def test_duplicate_tweets_are_stored_once(self):
+        tweet = TweetRecord(id="1", text="gm", username="alice", author_id=self.alice["id"])
+
+        stored = [self.client.timeline.store([tweet, tweet]), self.client.timeline.store([tweet])]
+
+        assert stored == [1, 0]
+
+    def test_sample_timeline_has_unique_ids(self):
+        ids = [tweet.id for tweet in self.client.get_sample_timeline()]
+
+        assert len(ids) == len(set(ids))
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+from pytest_check import check
+from app.db.Init_db import init_db
+from app.db.models.Tweet_model import Tweet
+from app.twitter.TimelineRanker import TimelineRanker
+from app.twitter.TweetRecord import TweetRecord
+
+NOW = datetime(2024, 11, 25, 12, 0, tzinfo=timezone.utc)
+
+
+def tweet(tweet_id, text="eth is moving past its range high", hours=1, likes=0, **fields):
+    fields.setdefault("username", "alice")
+    return TweetRecord(id=tweet_id, text=text, created_at=NOW - timedelta(hours=hours),
+                       public_metrics={"like_count": likes, "retweet_count": 0, "reply_count": 0, "quote_count": 0},
+                       **fields)
+
+
+class TestTimelineRanker:
+    def test_noise_is_dropped(self):
+        tweets = [
+            tweet("1"),
+            tweet("2", text="https://t.co/abc @bob"),
+            tweet("3", text="airdrop claim giveaway https://t.co/abc"),
+        ]
+
+        assert [t.id for t in TimelineRanker().rank(tweets, NOW)] == ["1"]
+
+    def test_retweets_are_collapsed_into_the_original(self):
+        tweets = [
+            tweet("1", text="RT @alice: eth is moving past its range high", retweeted_id="3", username="bob"),
+            tweet("2", text="RT @alice: eth is moving past its range high", retweeted_id="3", username="carol"),
+            tweet("3"),
+            tweet("4", text="RT @dave: sol is moving too", username="bob"),
+            tweet("5", text="RT @dave: sol is moving too", username="carol"),
+        ]
+
+        ranked = TimelineRanker().rank(tweets, NOW)
+
+        with check:
+            check.equal(sorted(t.id for t in ranked), ["3", "4"])
+
+    def test_engagement_recency_and_affinity(self, tmp_path):
+        _, Session = init_db(str(tmp_path / "tweets.db"))
+        session = Session()
+        session.add_all(Tweet(tweet_id=f"c{i}", text="hi", author_id="20", conversation_id="c") for i in range(5))
+        session.commit()
+        tweets = [
+            tweet("1", likes=0, author_id="10"),
+            tweet("2", likes=500, author_id="10"),
+            tweet("3", likes=500, hours=48, author_id="10"),
+            tweet("4", likes=0, author_id="20"),
+        ]
+
+        ranked = TimelineRanker(Session).rank(tweets, NOW)
+
+        with check:
+            check.equal(ranked[0].id, "2")
+            check.equal(ranked[-1].id, "3")
+            check.less(ranked.index(tweets[3]), ranked.index(tweets[0]))
+
+    def test_spam_penalty_does_not_decay(self):
+        text = "airdrop claim season for @a @b @c on eth"
+        tweets = [tweet("1", text=text, hours=48), tweet("2", text=text)]
+
+        ranked = TimelineRanker().rank(tweets, NOW)
+
+        with check:
+            check.equal([t.id for t in ranked], ["2", "1"])
+            check.less(TimelineRanker().score(tweets[1], now=NOW), 0)
+
+    def test_select_keeps_the_timeline_order_within_the_budget(self):
+        tweets = [tweet(str(i), likes=i, hours=0) for i in range(10)]
+
+        with check:
+            check.equal([t.id for t in TimelineRanker().select(tweets, max_tweets=3, now=NOW)], ["7", "8", "9"])
+            # Each entry is about 20 tokens
+            check.equal(len(TimelineRanker().select(tweets, token_budget=50, now=NOW)), 2)
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from pytest_check import check
+from app.twitter.TweetRecord import Conversation, TweetRecord
+
+START = datetime(2024, 11, 25, 12, 0, tzinfo=timezone.utc)
+
+
+def tweet(tweet_id, minutes, username="alice"):
+    return TweetRecord(id=tweet_id, text=f"tweet {tweet_id}", username=username, conversation_id=1,
+                       created_at=START + timedelta(minutes=minutes))
+
+
+class TestTweetRecord:
+    def test_ids_are_strings_and_times_are_utc(self):
+        row = SimpleNamespace(tweet_id="5", text="gm", username="alice", author_id="10", conversation_id="1",
+                              in_reply_to_user_id=None, created_at=START.replace(tzinfo=None))
+
+        record = TweetRecord.from_row(row)
+
+        with check:
+            check.equal(TweetRecord(id=5, text="gm", author_id=10, conversation_id=1).conversation_id, "1")
+            check.equal(record.created_at, START)
+            check.equal(record, TweetRecord(id=5, text="gm", username="alice", author_id="10",
+                                            conversation_id=1, created_at=START))
+
+    def test_has_no_instance_dict(self):
+        assert not hasattr(tweet("1", 0), "__dict__")
+
+
+class TestConversation:
+    def test_tweets_are_kept_in_time_order(self):
+        conversation = Conversation(1, our_username="nate")
+
+        for record in [tweet("3", 2), tweet("1", 0), tweet("4", 3, username="nate"), tweet("2", 1)]:
+            conversation.add(record)
+
+        with check:
+            check.equal([record.id for record in conversation], ["1", "2", "3", "4"])
+            check.equal(conversation.last_tweet.id, "4")
+            check.equal(conversation.participants, {"alice", "nate"})
+            check.equal(conversation.last_tweet_time, START + timedelta(minutes=3))
+            check.equal(conversation.our_last_tweet_time, START + timedelta(minutes=3))
+
+    def test_a_tweet_is_added_once(self):
+        conversation = Conversation("1")
+
+        added = [conversation.add(tweet("1", 0)), conversation.add(tweet("1", 0))]
+
+        with check:
+            check.equal(added, [True, False])
+            check.equal(len(conversation), 1)
+            check.is_in(1, conversation)
+
+    def test_tweets_without_time_sort_first(self):
+        conversation = Conversation("1")
+        conversation.add(tweet("2", 0))
+        conversation.add(TweetRecord(id="1", text="from the sample timeline"))
+
+        with check:
+            check.equal([record.id for record in conversation], ["1", "2"])
+            check.equal(conversation.last_tweet_time, START)